@@ -0,0 +1,74 @@
+"""Настройки gunicorn для продакшена.
+
+Режим выбирается переменной SERVER_MODE:
+
+* ``wsgi`` (по умолчанию) — воркеры ``gthread``: процессы × потоки. Каждый
+  поток занят запросом целиком, включая ожидание базы и SMTP;
+* ``asgi`` — воркеры uvicorn с асинхронными представлениями
+  (``hotels.async_views``): один процесс держит много медленных соединений,
+  а синхронный код выполняется в пуле потоков.
+
+Медленных клиентов в обоих режимах лучше принимать буферизующим
+reverse-proxy (nginx) перед gunicorn.
+
+    gunicorn -c gunicorn.conf.py
+    SERVER_MODE=asgi WEB_CONCURRENCY=4 CACHE_URL=redis://redis:6379/0 gunicorn -c gunicorn.conf.py
+
+Без общего кэша (``CACHE_URL``) запускается один воркер: сбросы кэша поиска
+в памяти процесса не доходят до других воркеров.
+
+Соединения с базой (``DATABASES`` в settings.py): в режиме ``wsgi`` каждый
+поток держит постоянное соединение ``DB_CONN_MAX_AGE`` секунд, в режиме
+``asgi`` соединения лучше держать в pgbouncer (``DB_PGBOUNCER=1``). Выигрыш
+от постоянных соединений на коротких представлениях:
+
+    DB_CONN_MAX_AGE=0 gunicorn -c gunicorn.conf.py
+    python manage.py load_test --paths /hotels/room/1/ --slow-clients 0 --label conn-0 --output conn-0.json
+    DB_CONN_MAX_AGE=60 gunicorn -c gunicorn.conf.py
+    python manage.py load_test --paths /hotels/room/1/ --slow-clients 0 --label conn-60 --compare conn-0.json
+"""
+import logging
+import multiprocessing
+import os
+
+server_mode = os.environ.get('SERVER_MODE', 'wsgi')
+cpu_count = multiprocessing.cpu_count()
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+
+# Версии кэша, сбрасывающие результаты поиска, должны быть общими для воркеров
+# (settings.py: все, кроме redis:// и file://, — память процесса). Без общего
+# кэша по умолчанию работает один воркер
+shared_cache = os.environ.get('CACHE_URL', '').startswith(('redis://', 'rediss://', 'file://'))
+
+if server_mode == 'asgi':
+    wsgi_app = 'hotel_project.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    # Event loop не блокируется ожиданием, хватает процесса на ядро
+    workers = int(os.environ.get('WEB_CONCURRENCY', cpu_count if shared_cache else 1))
+else:
+    wsgi_app = 'hotel_project.wsgi:application'
+    worker_class = 'gthread'
+    workers = int(os.environ.get('WEB_CONCURRENCY', cpu_count * 2 + 1 if shared_cache else 1))
+    # Потоки покрывают ожидание ввода-вывода; GIL ограничивает пользу от большего числа
+    threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+if workers > 1 and not shared_cache:
+    logging.getLogger('gunicorn.error').warning(
+        '%s воркеров с кэшем в памяти процесса не видят сброса кэша друг друга: '
+        'результаты поиска могут устаревать до истечения таймаута. '
+        'Укажите общий кэш (CACHE_URL=redis://...) или WEB_CONCURRENCY=1', workers,
+    )
+
+# Постоянных соединений с базой workers × threads: не больше max_connections или пула pgbouncer
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# Перезапуск воркеров ограничивает рост памяти процесса
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = max_requests // 10
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
@@ -0,0 +1,135 @@
+"""Чтение поиска и страниц с реплик базы.
+
+``ReplicaMiddleware`` отправляет на реплики (``DATABASE_REPLICAS``) только
+GET/HEAD-запросы к представлениям из ``DATABASE_REPLICA_VIEWS`` — списки
+гостиниц и номеров, поиск свободных номеров и страницы Wagtail; одна
+случайная реплика обслуживает весь запрос. Все записи и все остальные
+представления идут в основную базу (``default``).
+
+Реплика отстает от основной базы не больше чем на ``DATABASE_REPLICA_LAG``
+секунд, поэтому:
+
+* после любого изменяющего запроса (бронирование, удержание номера, форма
+  в админке) клиент получает cookie ``DATABASE_PRIMARY_COOKIE`` на это время
+  и читает из основной базы — так он видит свою бронь и после редиректа;
+* результаты, прочитанные с реплики в течение этого окна после последней
+  записи, кэшируются только до его конца (``result_timeout``), иначе кэш
+  надолго сохранил бы данные до записи под уже новой версией.
+
+Для проверки на двух локальных базах достаточно описать в ``DATABASES``
+вторую базу (например, копию файла SQLite) и указать ее в
+``DATABASE_REPLICAS``.
+"""
+from contextvars import ContextVar
+import math
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+# Время последней записи, после которой сбрасывались кэши
+WRITE_KEY = 'db:last-write'
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+class _ReadState:
+    """База чтения текущего запроса; объект общий для потоков sync_to_async"""
+    __slots__ = ('alias',)
+
+    def __init__(self):
+        self.alias = None
+
+
+_state = ContextVar('db_read_state', default=None)
+
+
+def replica_alias():
+    """Реплика, с которой читает текущий запрос, или None"""
+    state = _state.get()
+    return state.alias if state is not None else None
+
+
+def write_marker():
+    """Отметка записи для ``cache.set_many`` вместе с новыми версиями кэша"""
+    return {WRITE_KEY: time.time()}
+
+
+def result_timeout(timeout):
+    """Срок хранения в кэше результата, вычисленного в текущем запросе"""
+    if replica_alias() is None:
+        return timeout
+    written = cache.get(WRITE_KEY)
+    if written is None:
+        return timeout
+    remaining = settings.DATABASE_REPLICA_LAG - (time.time() - written)
+    if remaining <= 0:
+        return timeout
+    window = max(1, math.ceil(remaining))
+    return window if timeout is None else min(timeout, window)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return replica_alias() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Явно: иначе Django сохранял бы объект в базу, из которой его прочитал
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная база
+        return True
+
+
+class ReplicaMiddleware:
+    """Выбирает базу чтения для запроса; подключается после AuthenticationMiddleware"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        self.replicas = list(getattr(settings, 'DATABASE_REPLICAS', []))
+        self.views = set(getattr(settings, 'DATABASE_REPLICA_VIEWS', []))
+        self.lag = getattr(settings, 'DATABASE_REPLICA_LAG', 0)
+        self.cookie = getattr(settings, 'DATABASE_PRIMARY_COOKIE', 'db_primary')
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        token = _state.set(_ReadState())
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self._pin(request, response)
+
+    async def __acall__(self, request):
+        token = _state.set(_ReadState())
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self._pin(request, response)
+
+    def _pin(self, request, response):
+        """После записи клиент читает из основной базы, пока реплики не догонят ее"""
+        if request.method not in SAFE_METHODS and self.replicas and self.lag:
+            response.set_cookie(self.cookie, '1', max_age=self.lag, httponly=True, samesite='Lax')
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _state.get()
+        if (
+            state is not None
+            and self.replicas
+            and request.method in SAFE_METHODS
+            and self.cookie not in request.COOKIES
+            and request.resolver_match.view_name in self.views
+        ):
+            state.alias = random.choice(self.replicas)
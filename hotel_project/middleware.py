@@ -0,0 +1,246 @@
+"""Замеры производительности запросов.
+
+``PerformanceMiddleware`` для каждого запроса считает общее время, число и
+время SQL-запросов, время рендеринга шаблонов и обращения к кэшу. Запись
+помечается именем URL (``hotels:hotel_list``) или типом страницы Wagtail
+(``wagtail:pages.HotelPage``) и попадает:
+
+* в заголовок ``Server-Timing`` (видно во вкладке Network браузера);
+* в структурированную строку лога ``hotel_project.performance`` уровня
+  DEBUG — по умолчанию логгер выключен (``PERFORMANCE_LOG_LEVEL`` в settings.py);
+* в гистограмму внутри процесса, доступную сотрудникам по
+  ``/performance/`` (``hotel_project.views.performance_stats``).
+
+Middleware работает и в синхронном, и в асинхронном стеке (WSGI/ASGI).
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+import bisect
+import json
+import logging
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from hotels.caching import cache_accessed
+
+logger = logging.getLogger('hotel_project.performance')
+
+# Границы корзин гистограммы времени ответа, мс
+BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_ms = 0.0
+        self.template_ms = 0.0
+        self.template_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+
+_current = ContextVar('request_metrics', default=None)
+
+
+@contextmanager
+def template_timer():
+    """Учитывает время рендеринга; вложенные шаблоны не считаются дважды"""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    metrics.template_depth += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.template_depth -= 1
+        if metrics.template_depth == 0:
+            metrics.template_ms += (time.perf_counter() - started) * 1000
+
+
+def _count_cache(sender, hits=0, misses=0, **kwargs):
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.cache_hits += hits
+        metrics.cache_misses += misses
+
+
+cache_accessed.connect(_count_cache, dispatch_uid='hotel_project.performance.cache')
+
+
+class Histogram:
+    """Агрегированная статистика по меткам запросов внутри процесса"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._labels = {}
+
+    def add(self, label, record):
+        with self._lock:
+            entry = self._labels.setdefault(label, {
+                'count': 0,
+                'total_ms': 0.0,
+                'max_ms': 0.0,
+                'sql_count': 0,
+                'sql_ms': 0.0,
+                'template_ms': 0.0,
+                'cache_hits': 0,
+                'cache_misses': 0,
+                'buckets': [0] * (len(BUCKETS_MS) + 1),
+            })
+            entry['count'] += 1
+            entry['total_ms'] += record['total_ms']
+            entry['max_ms'] = max(entry['max_ms'], record['total_ms'])
+            entry['sql_count'] += record['sql_count']
+            entry['sql_ms'] += record['sql_ms']
+            entry['template_ms'] += record['template_ms']
+            entry['cache_hits'] += record['cache_hits']
+            entry['cache_misses'] += record['cache_misses']
+            entry['buckets'][bisect.bisect_left(BUCKETS_MS, record['total_ms'])] += 1
+
+    def snapshot(self):
+        with self._lock:
+            labels = {label: dict(entry, buckets=list(entry['buckets'])) for label, entry in self._labels.items()}
+        result = {}
+        for label, entry in labels.items():
+            count = entry['count']
+            bounds = [f'le_{bound}' for bound in BUCKETS_MS] + ['inf']
+            result[label] = {
+                'count': count,
+                'avg_ms': round(entry['total_ms'] / count, 3),
+                'max_ms': round(entry['max_ms'], 3),
+                'p50_ms': self._quantile(entry['buckets'], count, 0.5),
+                'p95_ms': self._quantile(entry['buckets'], count, 0.95),
+                'avg_sql_count': round(entry['sql_count'] / count, 2),
+                'avg_sql_ms': round(entry['sql_ms'] / count, 3),
+                'avg_template_ms': round(entry['template_ms'] / count, 3),
+                'cache_hits': entry['cache_hits'],
+                'cache_misses': entry['cache_misses'],
+                'buckets': dict(zip(bounds, entry['buckets'])),
+            }
+        return result
+
+    @staticmethod
+    def _quantile(buckets, count, q):
+        """Верхняя граница корзины, в которую попадает квантиль q"""
+        target = q * count
+        seen = 0
+        for bound, hits in zip(BUCKETS_MS + [None], buckets):
+            seen += hits
+            if seen >= target:
+                return bound
+        return None
+
+    def reset(self):
+        with self._lock:
+            self._labels.clear()
+
+
+histogram = Histogram()
+
+
+def request_label(request):
+    label = getattr(request, 'performance_label', None)
+    if label:
+        return label
+    match = getattr(request, 'resolver_match', None)
+    if match and match.view_name:
+        return match.view_name
+    return 'unresolved'
+
+
+def _sql_wrapper(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.sql_count += 1
+        metrics.sql_ms += (time.perf_counter() - started) * 1000
+
+
+def _install_sql_wrapper(connection):
+    if _sql_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_sql_wrapper)
+
+
+@receiver(connection_created, dispatch_uid='hotel_project.performance.sql')
+def _on_connection_created(sender, connection, **kwargs):
+    # Async-представления ходят в базу из потоков sync_to_async, где
+    # соединения свои; метрики запроса доходят туда через contextvars
+    _install_sql_wrapper(connection)
+
+
+class PerformanceMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.server_timing = getattr(settings, 'PERFORMANCE_SERVER_TIMING', True)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        for connection in connections.all():
+            _install_sql_wrapper(connection)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, metrics, started)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, metrics, started)
+
+    def _finish(self, request, response, metrics, started):
+        total_ms = (time.perf_counter() - started) * 1000
+        record = {
+            'label': request_label(request),
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(total_ms, 3),
+            'sql_count': metrics.sql_count,
+            'sql_ms': round(metrics.sql_ms, 3),
+            'template_ms': round(metrics.template_ms, 3),
+            'cache_hits': metrics.cache_hits,
+            'cache_misses': metrics.cache_misses,
+        }
+        histogram.add(record['label'], record)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(json.dumps(record, ensure_ascii=False))
+        if self.server_timing:
+            response['Server-Timing'] = self._server_timing(record)
+        return response
+
+    @staticmethod
+    def _server_timing(record):
+        return ', '.join([
+            f'total;dur={record["total_ms"]:.1f}',
+            f'db;dur={record["sql_ms"]:.1f};desc="{record["sql_count"]} queries"',
+            f'tpl;dur={record["template_ms"]:.1f}',
+            f'cache;desc="hits={record["cache_hits"]} misses={record["cache_misses"]}"',
+        ])
@@ -51,6 +51,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'hotel_project.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -59,13 +60,17 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'wagtail.contrib.redirects.middleware.RedirectMiddleware',
+    # До кэша страниц: страница, отрисованная с реплики, кэшируется с учетом отставания
+    'hotel_project.db_router.ReplicaMiddleware',
+    # Последним: ответ из кэша проходит через все остальные middleware
+    'pages.cache.PageCacheMiddleware',
 ]
 
 ROOT_URLCONF = 'hotel_project.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'hotel_project.template_backend.TimedDjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -80,6 +85,13 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'hotel_project.wsgi.application'
+ASGI_APPLICATION = 'hotel_project.asgi.application'
+
+# Асинхронные версии публичных представлений (hotels.async_views).
+# По умолчанию включаются вместе с ASGI-режимом сервера (gunicorn.conf.py)
+ASYNC_VIEWS = os.environ.get(
+    'ASYNC_VIEWS', '1' if os.environ.get('SERVER_MODE') == 'asgi' else '0'
+) == '1'
 
 
 # Database
@@ -93,9 +105,129 @@ DATABASES = {
         'PASSWORD': os.environ.get('POSTGRES_PASSWORD', 'hotel_password'),
         'HOST': os.environ.get('DB_HOST', 'db'),
         'PORT': os.environ.get('DB_PORT', '5432'),
+        # Постоянные соединения: секунды жизни, 0 — новое соединение на каждый
+        # запрос. В ASGI-режиме по умолчанию 0: соединения привязаны к потокам
+        # sync_to_async и не переиспользуются, там соединения держит pgbouncer
+        'CONN_MAX_AGE': int(os.environ.get(
+            'DB_CONN_MAX_AGE', '0' if os.environ.get('SERVER_MODE') == 'asgi' else '60'
+        )),
+        # Проверять соединение перед повторным использованием: перезапуск базы
+        # или pgbouncer не оборачивается ошибкой первого запроса
+        'CONN_HEALTH_CHECKS': os.environ.get('DB_CONN_HEALTH_CHECKS', '1') == '1',
+        # pgbouncer в режиме pool_mode=transaction (DB_PGBOUNCER=1) отдает между
+        # транзакциями разные серверные соединения, и серверный курсор
+        # iterator() (выгрузки, отчеты) пропал бы; читаем порциями обычным курсором
+        'DISABLE_SERVER_SIDE_CURSORS': os.environ.get('DB_PGBOUNCER', '0') == '1',
     }
 }
 
+# Реплики только для чтения (hotel_project.db_router): DB_REPLICA_HOSTS=host[:port],...
+# В тестах реплики зеркалируют основную базу
+for index, replica in enumerate(filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(',')), 1):
+    host, _, port = replica.strip().partition(':')
+    DATABASES[f'replica{index}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['hotel_project.db_router.ReplicaRouter']
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+# Представления, которые читают с реплик (только GET и HEAD)
+DATABASE_REPLICA_VIEWS = [
+    'hotels:hotel_list',
+    'hotels:room_list',
+    'hotels:api_availability',
+    'wagtail_serve',
+]
+# Допустимое отставание реплик, секунды: столько после записи клиент читает
+# из основной базы, а прочитанное с реплик кэшируется не дольше этого окна
+DATABASE_REPLICA_LAG = int(os.environ.get('DB_REPLICA_LAG', '5'))
+DATABASE_PRIMARY_COOKIE = 'db_primary'
+
+
+# Cache
+# Бэкенд задается переменной CACHE_URL:
+#   locmem://                       — память процесса (по умолчанию)
+#   file:///var/tmp/hotel_cache     — файлы на диске
+#   redis://redis:6379/0            — Redis-совместимый сервер (нужен пакет redis)
+# Кэши поиска и страниц сбрасываются повышением версий в кэше, поэтому
+# несколько процессов (воркеры gunicorn, sweep_holds) должны видеть один
+# кэш: locmem годится только для одного процесса (runserver)
+
+CACHE_URL = os.environ.get('CACHE_URL', 'locmem://')
+
+if CACHE_URL.startswith(('redis://', 'rediss://')):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
+    }
+elif CACHE_URL.startswith('file://'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': CACHE_URL[len('file://'):],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'hotel-project',
+        }
+    }
+
+
+# Email
+# Уведомления о бронированиях (hotels.notifications); в разработке письма
+# печатаются в консоль
+
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', '25'))
+EMAIL_TIMEOUT = 10
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'info@hotels.ru')
+BOOKING_NOTIFICATION_EMAILS = [
+    email for email in os.environ.get('BOOKING_NOTIFICATION_EMAILS', '').split(',') if email
+]
+
+
+# Кэш HTML страниц Wagtail для анонимных посетителей (pages.cache), секунды; 0 — выключен.
+# Работает только с общим кэшем (CACHE_URL redis:// или file://)
+PAGE_CACHE_TIMEOUT = int(os.environ.get('PAGE_CACHE_TIMEOUT', '3600'))
+
+# Сколько секунд номер удерживается за гостем, заполняющим форму (hotels.holds)
+ROOM_HOLD_TTL = int(os.environ.get('ROOM_HOLD_TTL', '600'))
+# Сколько активных удержаний может быть у одной сессии
+ROOM_HOLD_LIMIT = int(os.environ.get('ROOM_HOLD_LIMIT', '3'))
+
+
+# Performance instrumentation (hotel_project.middleware)
+
+PERFORMANCE_SERVER_TIMING = os.environ.get('PERFORMANCE_SERVER_TIMING', '1') == '1'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        # Строка замеров на каждый запрос (hotel_project.middleware) пишется
+        # уровнем DEBUG: включается PERFORMANCE_LOG_LEVEL=DEBUG
+        'hotel_project.performance': {
+            'handlers': ['console'],
+            'level': os.environ.get('PERFORMANCE_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -138,6 +270,9 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Процессы Pillow для копий фото, создаваемых при загрузке (hotels.renditions)
+RENDITION_WORKERS = int(os.environ.get('RENDITION_WORKERS', '2'))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -0,0 +1,28 @@
+"""Шаблонный бэкенд Django с замером времени рендеринга.
+
+Подключается в ``TEMPLATES`` вместо стандартного ``DjangoTemplates``;
+время попадает в метрики ``hotel_project.middleware``.
+"""
+from django.template.backends.django import DjangoTemplates
+
+from .middleware import template_timer
+
+
+class TimedTemplate:
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        with template_timer():
+            return self.template.render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
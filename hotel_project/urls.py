@@ -8,12 +8,14 @@ from django.conf.urls.static import static
 from wagtail.admin import urls as wagtailadmin_urls
 from wagtail import urls as wagtail_urls
 from wagtail.documents import urls as wagtaildocs_urls
+from .views import performance_stats
 
 urlpatterns = [
     path('django-admin/', admin.site.urls),
     path('admin/', include(wagtailadmin_urls)),
     path('documents/', include(wagtaildocs_urls)),
     path('hotels/', include('hotels.urls')),
+    path('performance/', performance_stats, name='performance_stats'),
     path('', include(wagtail_urls)),
 ]
 
@@ -0,0 +1,17 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+
+from hotels import caching
+from .middleware import histogram
+
+
+@staff_member_required
+def performance_stats(request):
+    """Гистограммы времени ответа по видам страниц в текущем процессе"""
+    if request.GET.get('reset'):
+        histogram.reset()
+        caching.stats.reset()
+    return JsonResponse(
+        {'requests': histogram.snapshot(), 'cache': caching.stats.snapshot()},
+        json_dumps_params={'ensure_ascii': False, 'indent': 2},
+    )
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Hotel, HotelImage, Room, Booking
+from . import search
+from .models import Hotel, HotelImage, Room, Booking, BookingArchive, RateSeason, RoomHold, StayDiscount
 
 
 class HotelImageInline(admin.TabularInline):
@@ -8,11 +9,27 @@ class HotelImageInline(admin.TabularInline):
     fields = ['image', 'caption', 'order']
 
 
+class RateSeasonInline(admin.TabularInline):
+    model = RateSeason
+    extra = 0
+    fields = ['name', 'date_from', 'date_to', 'multiplier']
+
+
+class StayDiscountInline(admin.TabularInline):
+    model = StayDiscount
+    extra = 0
+    fields = ['min_nights', 'percent']
+
+
 @admin.register(Hotel)
 class HotelAdmin(admin.ModelAdmin):
-    list_display = ['name', 'address', 'created_at']
+    list_display = ['name', 'city', 'address', 'created_at']
     search_fields = ['name', 'address']
-    inlines = [HotelImageInline]
+    inlines = [HotelImageInline, RateSeasonInline, StayDiscountInline]
+
+    def get_search_results(self, request, queryset, search_term):
+        # Индекс полнотекстового поиска вместо icontains по каждому полю
+        return search.search_hotels(queryset, search_term), False
 
 
 @admin.register(Room)
@@ -28,3 +45,25 @@ class BookingAdmin(admin.ModelAdmin):
     list_filter = ['status', 'check_in', 'check_out']
     search_fields = ['guest_name', 'guest_email', 'room__name']
 
+
+@admin.register(RoomHold)
+class RoomHoldAdmin(admin.ModelAdmin):
+    list_display = ['room', 'check_in', 'check_out', 'expires_at']
+    list_select_related = ['room__hotel']
+    ordering = ['expires_at']
+
+
+@admin.register(BookingArchive)
+class BookingArchiveAdmin(admin.ModelAdmin):
+    list_display = ['id', 'room', 'guest_name', 'check_in', 'check_out', 'status', 'archived_at']
+    list_filter = ['status']
+    search_fields = ['guest_name', 'guest_email', 'room__name']
+    list_select_related = ['room__hotel']
+    date_hierarchy = 'check_out'
+
+    # Архив только для чтения: записи переносит команда archive_bookings
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
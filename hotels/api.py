@@ -0,0 +1,129 @@
+"""JSON API поиска свободных номеров для виджетов и channel manager'ов.
+
+``GET /hotels/api/availability/?hotel=<id>&check_in=YYYY-MM-DD&check_out=YYYY-MM-DD``
+или ``?city=Сочи&ranges=2026-07-01:2026-07-03,2026-07-02:2026-07-05`` —
+до ``MAX_RANGES`` диапазонов за один запрос. Номера, занятость (брони и
+временные удержания) и тарифы (``hotels.pricing``) читаются фиксированным
+числом запросов ``values_list`` независимо от числа диапазонов; ответ
+компактный (колонки + строки) и поддерживает ETag / If-None-Match.
+"""
+from datetime import date
+import json
+
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_GET
+
+from . import availability, caching, pricing, search
+from .models import Room
+
+MAX_RANGES = 62
+MAX_NIGHTS = 60
+ROOM_COLUMNS = ['room_id', 'hotel_id', 'name', 'area', 'price_per_night', 'nights', 'total']
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _parse_date(value, name):
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise BadRequest(f'Некорректная дата {name}: {value!r}, ожидается YYYY-MM-DD')
+
+
+def _parse_ranges(params):
+    if params.get('ranges'):
+        pairs = [part.split(':', 1) for part in params['ranges'].split(',') if part]
+        if any(len(pair) != 2 for pair in pairs):
+            raise BadRequest('ranges: ожидается список check_in:check_out через запятую')
+    else:
+        pairs = [(params.get('check_in'), params.get('check_out'))]
+    if not pairs or len(pairs) > MAX_RANGES:
+        raise BadRequest(f'Нужно от 1 до {MAX_RANGES} диапазонов дат')
+
+    ranges = []
+    for check_in, check_out in pairs:
+        check_in = _parse_date(check_in, 'check_in')
+        check_out = _parse_date(check_out, 'check_out')
+        if not 0 < (check_out - check_in).days <= MAX_NIGHTS:
+            raise BadRequest(f'Дата выезда должна быть позже даты заезда не более чем на {MAX_NIGHTS} ночей')
+        ranges.append((check_in, check_out))
+    return ranges
+
+
+def _error(message):
+    return JsonResponse({'error': message}, status=400, json_dumps_params={'ensure_ascii': False})
+
+
+@require_GET
+def availability_search(request):
+    """Свободные номера и стоимость проживания по одному или нескольким диапазонам"""
+    try:
+        ranges = _parse_ranges(request.GET)
+        hotel_id = request.GET.get('hotel')
+        city = request.GET.get('city', '').strip()
+        if hotel_id is not None:
+            if not hotel_id.isdigit():
+                raise BadRequest('hotel: ожидается id гостиницы')
+            hotel_id = int(hotel_id)
+        elif not city:
+            raise BadRequest('Укажите hotel или city')
+    except BadRequest as e:
+        return _error(str(e))
+
+    first_night = min(check_in for check_in, _ in ranges)
+    last_check_out = max(check_out for _, check_out in ranges)
+    etag = '"%s"' % caching.search_etag(request.GET.urlencode(), first_night, last_check_out, hotel_id)
+    if etag in request.headers.get('If-None-Match', ''):
+        return HttpResponseNotModified(headers={'ETag': etag})
+
+    rooms = Room.objects.order_by('hotel_id', 'name', 'id')
+    if hotel_id is not None:
+        rooms = rooms.filter(hotel_id=hotel_id)
+    else:
+        rooms = search.filter_city(rooms, city, lookup='hotel__city_key')
+    room_rows = list(rooms.values_list('id', 'hotel_id', 'name', 'area', 'price_per_night'))
+
+    # Все брони и удержания, задевающие хотя бы один диапазон, — одним запросом
+    room_ids = rooms.values('id')
+    busy = list(
+        availability.overlapping_bookings(first_night, last_check_out)
+        .filter(room__in=room_ids)
+        .order_by()
+        .values_list('room_id', 'check_in', 'check_out')
+        .union(
+            availability.active_holds(first_night, last_check_out)
+            .filter(room__in=room_ids)
+            .order_by()
+            .values_list('room_id', 'check_in', 'check_out'),
+            all=True,
+        )
+    )
+
+    # Стоимость всех номеров по всем диапазонам — одной матричной операцией
+    quotes = pricing.quote_ranges([row[0] for row in room_rows], ranges)
+
+    results = []
+    for (check_in, check_out), range_quotes in zip(ranges, quotes):
+        nights = (check_out - check_in).days
+        taken = {room_id for room_id, start, end in busy if start < check_out and end > check_in}
+        results.append({
+            'check_in': check_in.isoformat(),
+            'check_out': check_out.isoformat(),
+            'rooms': [
+                [room_id, hotel, name, str(area), str(price), nights, str(range_quotes[room_id].total)]
+                for room_id, hotel, name, area, price in room_rows
+                if room_id not in taken
+            ],
+        })
+
+    body = json.dumps(
+        {'columns': ROOM_COLUMNS, 'results': results},
+        ensure_ascii=False, separators=(',', ':'),
+    )
+    response = HttpResponse(body, content_type='application/json; charset=utf-8')
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, max_age=0, must_revalidate=True)
+    return response
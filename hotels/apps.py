@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class HotelsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'hotels'
+    verbose_name = 'Гостиницы'
+
+    def ready(self):
+        from . import signals  # noqa: F401
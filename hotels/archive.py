@@ -0,0 +1,59 @@
+"""Перенос старых бронирований в архив (``BookingArchive``).
+
+В архив уходят брони с выездом раньше ``before`` и отмененные брони, не
+менявшиеся с ``cancelled_before``. Ни те, ни другие не влияют на поиск
+свободных номеров и карты занятости (их горизонт начинается с сегодняшнего
+дня), поэтому строки удаляются без сигналов и пересчетов. Каждая порция
+копируется и удаляется в одной транзакции.
+"""
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Booking, BookingArchive
+
+BATCH_SIZE = 5000
+# Параметров в одном DELETE: меньше предела SQLite в 999 переменных
+DELETE_CHUNK = 500
+FIELDS = [
+    'id', 'room_id', 'guest_name', 'guest_email', 'guest_phone',
+    'check_in', 'check_out', 'status', 'created_at', 'updated_at',
+]
+
+
+def archivable(before, cancelled_before=None):
+    """Брони, подлежащие переносу в архив"""
+    condition = Q(check_out__lt=before)
+    if cancelled_before:
+        condition |= Q(status='cancelled', updated_at__lt=cancelled_before)
+    return Booking.objects.filter(condition)
+
+
+def archive_batch(before, cancelled_before=None, batch_size=BATCH_SIZE):
+    """Переносит одну порцию; возвращает число перенесенных броней"""
+    with transaction.atomic():
+        rows = list(
+            archivable(before, cancelled_before)
+            .order_by('id')
+            .select_for_update(skip_locked=True)
+            .values(*FIELDS)[:batch_size]
+        )
+        if not rows:
+            return 0
+        BookingArchive.objects.bulk_create(
+            [BookingArchive(**row) for row in rows],
+            ignore_conflicts=True,
+        )
+        ids = [row['id'] for row in rows]
+        # Без сигналов post_delete: архивные брони не влияют на карты и кэш
+        for i in range(0, len(ids), DELETE_CHUNK):
+            Booking.objects.filter(id__in=ids[i:i + DELETE_CHUNK])._raw_delete(Booking.objects.db)
+    return len(rows)
+
+
+def archive(before, cancelled_before=None, batch_size=BATCH_SIZE):
+    """Переносит все подходящие брони порциями; генерирует размеры порций"""
+    while True:
+        moved = archive_batch(before, cancelled_before, batch_size)
+        if not moved:
+            return
+        yield moved
@@ -0,0 +1,161 @@
+"""Асинхронные версии публичных представлений.
+
+Подключаются вместо ``hotels.views`` при ``ASYNC_VIEWS = True`` (по умолчанию
+под ASGI-сервером, см. ``gunicorn.conf.py``). Запросы к базе идут через
+асинхронный ORM; код, который пока есть только в синхронном виде
+(транзакция бронирования, кэш карточек, рендеринг шаблонов с тегами Wagtail),
+выполняется через ``sync_to_async``. Пока запрос ждет базу или SMTP, воркер
+обслуживает другие соединения.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.http import Http404
+from django.shortcuts import redirect, render
+
+from . import availability
+from . import booking as booking_service
+from . import caching
+from . import group_search
+from . import notifications
+from . import occupancy
+from . import search
+from .forms import BookingForm, GroupSearchForm, HotelSearchForm
+from .models import Hotel, Room
+from .pagination import akeyset_paginate, page_size_from
+from .views import (
+    _group_params, _group_query, _page_query, group_hotels_page, hotel_cards, render_hotel_offers, room_offers,
+)
+
+arender = sync_to_async(render)
+
+
+async def _aget_or_404(queryset, **kwargs):
+    try:
+        return await queryset.aget(**kwargs)
+    except queryset.model.DoesNotExist:
+        raise Http404(f'{queryset.model._meta.verbose_name} не найден(а)')
+
+
+async def hotel_list(request):
+    """Список гостиниц с поиском и фильтрацией по датам"""
+    form = HotelSearchForm(request.GET)
+    hotels = Hotel.objects.all()
+    group = _group_params(form)
+
+    check_in = None
+    check_out = None
+
+    if form.is_valid():
+        check_in = form.cleaned_data.get('check_in')
+        check_out = form.cleaned_data.get('check_out')
+        # Текст и город — условия WHERE того же queryset; фильтр по датам
+        # добавляется к ним через EXISTS, и список строится одним запросом
+        hotels = search.filter_city(
+            search.search_hotels(hotels, form.cleaned_data.get('q')),
+            form.cleaned_data.get('city'),
+        )
+
+        if check_in and check_out and not group:
+            hotels = occupancy.hotels_with_free_rooms(check_in, check_out, hotels)
+
+    if group:
+        page, offers = await sync_to_async(group_hotels_page)(request, hotels, check_in, check_out, *group)
+    else:
+        page = await akeyset_paginate(
+            hotel_cards(hotels),
+            ['name'],
+            cursor=request.GET.get('cursor'),
+            page_size=page_size_from(request.GET.get('page_size')),
+        )
+        offers = [(hotel, None) for hotel in page]
+
+    context = {
+        'hotels': page,
+        'hotel_offers': await sync_to_async(render_hotel_offers)(offers, request),
+        'page': page,
+        'page_query': _page_query(request),
+        'group_query': _group_query(form) if group else '',
+        'form': form,
+        'check_in': check_in,
+        'check_out': check_out,
+    }
+    return await arender(request, 'hotels/hotel_list.html', context)
+
+
+async def room_list(request, hotel_id):
+    """Список номеров в гостинице с фильтрацией по датам"""
+    hotel = await _aget_or_404(Hotel.objects.all(), id=hotel_id)
+    form = GroupSearchForm(request.GET)
+    rooms = hotel.rooms.all()
+    group = _group_params(form)
+    group_offer = None
+
+    check_in = None
+    check_out = None
+
+    if form.is_valid():
+        check_in = form.cleaned_data.get('check_in')
+        check_out = form.cleaned_data.get('check_out')
+
+        if group:
+            group_offer = await sync_to_async(group_search.hotel_offer)(hotel.id, check_in, check_out, *group)
+            rooms = rooms.filter(id__in=group_offer.room_ids) if group_offer else rooms.none()
+        elif check_in and check_out:
+            free_room_ids = await sync_to_async(caching.free_room_ids)(
+                hotel.id, check_in, check_out,
+                lambda: set(availability.free_rooms(check_in, check_out, rooms).values_list('id', flat=True)),
+            )
+            rooms = rooms.filter(id__in=free_room_ids)
+
+    page = await akeyset_paginate(
+        rooms,
+        ['hotel_id', 'name'],
+        cursor=request.GET.get('cursor'),
+        page_size=page_size_from(request.GET.get('page_size')),
+    )
+
+    context = {
+        'hotel': hotel,
+        'rooms': page,
+        'room_offers': await sync_to_async(
+            lambda: room_offers(page, caching.render_room_cards(page, request), check_in, check_out)
+        )(),
+        'group': group,
+        'group_offer': group_offer,
+        'page': page,
+        'page_query': _page_query(request),
+        'form': form,
+        'check_in': check_in,
+        'check_out': check_out,
+    }
+    return await arender(request, 'hotels/room_list.html', context)
+
+
+async def room_detail(request, room_id):
+    """Детальная информация о номере и форма бронирования"""
+    room = await _aget_or_404(Room.objects.select_related('hotel'), id=room_id)
+
+    if request.method == 'POST':
+        form = BookingForm(request.POST)
+        if await sync_to_async(form.is_valid)():
+            booking = form.save(commit=False)
+            booking.room = room
+
+            try:
+                await sync_to_async(booking_service.create_booking)(
+                    booking, hold_token=form.cleaned_data['hold_token'] or None,
+                )
+            except booking_service.RoomUnavailable:
+                messages.error(request, 'К сожалению, номер уже забронирован на указанные даты.')
+            else:
+                await notifications.asend_booking_notifications(booking)
+                messages.success(request, 'Ваша заявка на бронирование успешно отправлена! Мы свяжемся с вами в ближайшее время.')
+                return redirect('hotels:room_detail', room_id=room.id)
+    else:
+        form = BookingForm()
+
+    context = {
+        'room': room,
+        'form': form,
+    }
+    return await arender(request, 'hotels/room_detail.html', context)
@@ -0,0 +1,100 @@
+"""Сервис доступности номеров.
+
+Все проверки пересечения бронирований собраны здесь, чтобы представления
+не строили собственные подзапросы. Фильтры компилируются в коррелированный
+``NOT EXISTS`` по таблице бронирований, который использует индекс по
+``room_id`` вместо полного ``IN``-подзапроса. Непросроченные удержания
+(``RoomHold``) занимают номер наравне с активными бронированиями.
+"""
+from django.db.models import Count, Exists, OuterRef, Subquery
+from django.utils import timezone
+
+from .models import Booking, Hotel, Room, RoomHold
+
+# Статусы, при которых бронирование занимает номер
+ACTIVE_STATUSES = ['pending', 'confirmed']
+
+
+def overlapping_bookings(check_in, check_out):
+    """Активные бронирования, пересекающиеся с периодом [check_in, check_out)"""
+    return Booking.objects.filter(
+        check_in__lt=check_out,
+        check_out__gt=check_in,
+        status__in=ACTIVE_STATUSES,
+    )
+
+
+def active_holds(check_in, check_out, exclude_token=None):
+    """Непросроченные удержания, пересекающиеся с периодом [check_in, check_out).
+
+    Удержания с ``exclude_token`` принадлежат самому гостю и не мешают ему.
+    """
+    holds = RoomHold.objects.filter(
+        check_in__lt=check_out,
+        check_out__gt=check_in,
+        expires_at__gt=timezone.now(),
+    )
+    if exclude_token:
+        holds = holds.exclude(token=exclude_token)
+    return holds
+
+
+def _room_is_booked(check_in, check_out):
+    """Коррелированный EXISTS: есть ли у номера пересекающееся бронирование или удержание"""
+    return Exists(
+        overlapping_bookings(check_in, check_out).filter(room_id=OuterRef('pk'))
+    ) | Exists(
+        active_holds(check_in, check_out).filter(room_id=OuterRef('pk'))
+    )
+
+
+def free_rooms(check_in, check_out, rooms=None):
+    """Номера, свободные в указанные даты.
+
+    ``rooms`` позволяет сузить выборку, например до номеров одной гостиницы.
+    """
+    if rooms is None:
+        rooms = Room.objects.all()
+    return rooms.filter(~_room_is_booked(check_in, check_out))
+
+
+def free_room_ids(check_in, check_out, room_ids):
+    """Множество id свободных номеров из переданного набора одним запросом"""
+    rooms = Room.objects.filter(id__in=list(room_ids))
+    return set(free_rooms(check_in, check_out, rooms).values_list('id', flat=True))
+
+
+def hotels_with_free_rooms(check_in, check_out, min_rooms=1, hotels=None):
+    """Гостиницы, в которых свободно не меньше ``min_rooms`` номеров.
+
+    Для ``min_rooms == 1`` достаточно полусоединения EXISTS; иначе количество
+    свободных номеров считается коррелированным подзапросом только в WHERE.
+    """
+    if hotels is None:
+        hotels = Hotel.objects.all()
+
+    hotel_free_rooms = free_rooms(check_in, check_out).filter(hotel_id=OuterRef('pk'))
+
+    if min_rooms <= 1:
+        return hotels.filter(Exists(hotel_free_rooms))
+
+    free_count = (
+        hotel_free_rooms.order_by()
+        .values('hotel_id')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    return hotels.alias(
+        free_rooms_count=Subquery(free_count)
+    ).filter(free_rooms_count__gte=min_rooms)
+
+
+def is_room_free(room, check_in, check_out, hold_token=None):
+    """Свободен ли номер ``room`` (объект или id) в указанные даты.
+
+    Собственное удержание гостя (``hold_token``) номер не занимает.
+    """
+    room_id = getattr(room, 'pk', room)
+    if overlapping_bookings(check_in, check_out).filter(room_id=room_id).exists():
+        return False
+    return not active_holds(check_in, check_out, exclude_token=hold_token).filter(room_id=room_id).exists()
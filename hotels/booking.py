@@ -0,0 +1,140 @@
+"""Создание бронирований без гонок.
+
+Проверка занятости и вставка выполняются в одной транзакции под блокировкой
+строки номера (``SELECT ... FOR UPDATE``). Конкурирующие заявки на один номер
+выстраиваются в очередь, а разные номера бронируются параллельно.
+Исключающее ограничение PostgreSQL (миграция 0003) остается последним
+рубежом: его срабатывание превращается в ``RoomUnavailable``, а остальные
+ошибки целостности пробрасываются как есть.
+
+Удержания номера (``place_hold``) проверяются и создаются под той же
+блокировкой, поэтому из двух гостей, открывших форму одного номера на
+пересекающиеся даты, удержание получит только один.
+"""
+from contextlib import nullcontext
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db import IntegrityError, OperationalError, connection, transaction
+
+from . import availability, caching, holds
+from .models import Room, RoomHold
+
+
+class RoomUnavailable(Exception):
+    """Номер уже занят на запрошенные даты"""
+
+
+class TooManyHolds(Exception):
+    """У клиента уже ``ROOM_HOLD_LIMIT`` активных удержаний"""
+
+
+# Исключающее ограничение миграции 0003 и код его нарушения в PostgreSQL
+OVERLAP_CONSTRAINT = 'booking_room_no_overlap'
+EXCLUSION_VIOLATION = '23P01'
+
+# Блокировки номеров внутри процесса для СУБД без SELECT ... FOR UPDATE
+# (например, SQLite в разработке): фиксированный набор, номер выбирает
+# блокировку по остатку id, и память не растет с числом номеров
+LOCK_STRIPES = 64
+_local_locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+
+def _room_lock(room_id):
+    if connection.features.has_select_for_update:
+        return nullcontext()
+    return _local_locks[room_id % LOCK_STRIPES]
+
+
+def _is_overlap(error):
+    """Ошибка целостности — нарушение ограничения пересечения броней"""
+    cause = error.__cause__
+    if getattr(cause, 'pgcode', None) == EXCLUSION_VIOLATION:
+        return True
+    constraint = getattr(getattr(cause, 'diag', None), 'constraint_name', None)
+    return constraint == OVERLAP_CONSTRAINT or OVERLAP_CONSTRAINT in str(error)
+
+
+def _in_room_transaction(room_id, func, retries):
+    """Выполняет ``func`` в транзакции под блокировкой номера ``room_id``.
+
+    Временные ошибки СУБД (взаимоблокировки, занятая база SQLite) повторяются
+    до ``retries`` раз с небольшой случайной паузой.
+    """
+    for attempt in range(retries + 1):
+        try:
+            with _room_lock(room_id), transaction.atomic():
+                room = Room.objects.select_for_update().only('pk', 'hotel_id').get(pk=room_id)
+                return func(room)
+        except IntegrityError as e:
+            if not _is_overlap(e):
+                raise
+            raise RoomUnavailable from None
+        except OperationalError:
+            if attempt == retries:
+                raise
+            time.sleep(random.uniform(0.005, 0.05) * (attempt + 1))
+
+
+def create_booking(booking, retries=3, hold_token=None):
+    """Сохраняет ``booking``, если номер свободен, иначе ``RoomUnavailable``.
+
+    Удержание гостя с ``hold_token`` не мешает брони и снимается вместе с ее
+    сохранением.
+    """
+    def save(room):
+        # При повторе транзакция откачена, и бронь вставляется заново
+        booking.pk = None
+        if not availability.is_room_free(booking.room_id, booking.check_in, booking.check_out, hold_token):
+            raise RoomUnavailable
+        booking.save()
+        if hold_token:
+            RoomHold.objects.filter(token=hold_token).delete()
+        return booking
+
+    try:
+        return _in_room_transaction(booking.room_id, save, retries)
+    except (RoomUnavailable, OperationalError):
+        booking.pk = None
+        raise
+
+
+def place_hold(room_id, check_in, check_out, token=None, client='', retries=3):
+    """Удерживает номер на даты за ``token`` (новым, если не передан).
+
+    Повторный вызов с тем же ``token`` переносит удержание на другие даты
+    или номер и продлевает его. Если номер занят бронью или чужим
+    удержанием — ``RoomUnavailable``; несуществующий номер —
+    ``Room.DoesNotExist``. У клиента ``client`` (ключ сессии) может быть не
+    больше ``ROOM_HOLD_LIMIT`` других активных удержаний, иначе ``TooManyHolds``.
+    """
+    token = token or holds.new_token()
+
+    def hold(room):
+        if client and holds.active_for(client).exclude(token=token).count() >= settings.ROOM_HOLD_LIMIT:
+            raise TooManyHolds
+        if not availability.is_room_free(room_id, check_in, check_out, token):
+            raise RoomUnavailable
+        previous = RoomHold.objects.filter(token=token).values_list('room__hotel_id', 'check_in', 'check_out').first()
+        held, _ = RoomHold.objects.update_or_create(
+            token=token,
+            defaults={
+                'room_id': room_id,
+                'check_in': check_in,
+                'check_out': check_out,
+                'expires_at': holds.expiry(),
+                'client': client,
+            },
+        )
+        stays = [(room.hotel_id, check_in, check_out)] + ([previous] if previous else [])
+
+        def invalidate():
+            caching.note_hold(check_in, check_out, held.expires_at)
+            caching.invalidate_stays(stays)
+
+        transaction.on_commit(invalidate)
+        return held
+
+    return _in_room_transaction(room_id, hold, retries)
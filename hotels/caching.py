@@ -0,0 +1,261 @@
+"""Кэш карточек гостиниц/номеров и результатов поиска по датам.
+
+Карточки кэшируются как готовый HTML по ключу, в который входит
+``updated_at`` объекта (и счетчики для карточки гостиницы), поэтому изменение
+объекта само по себе дает новый ключ. Результаты поиска по датам зависят от
+бронирований и помечаются версиями: месяцев, которые покрывает запрос, и
+гостиницы. Сигналы (``hotels.signals``) повышают только версии, затронутые
+измененной бронью или номером.
+
+Удержания номеров истекают лениво, без записи в базу. Они истекают только
+на границах ``HOLD_STEP`` секунд (``holds.expiry``), поэтому, пока на месяц
+есть неистекшие удержания, в ключи и ETag поиска по нему входит номер
+текущего шага (``_hold_step``).
+"""
+from datetime import timedelta
+import hashlib
+import math
+import threading
+import uuid
+
+from django.core.cache import cache
+from django.dispatch import Signal
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.safestring import mark_safe
+
+from hotel_project import db_router
+
+CARD_TIMEOUT = 60 * 60 * 24
+RESULT_TIMEOUT = 60 * 10
+
+# Отправляется при каждом обращении к кэшу: sender — группа, hits, misses
+cache_accessed = Signal()
+
+
+class HitCounter:
+    """Счетчик попаданий в кэш внутри процесса, по группам"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def record(self, group, hits=0, misses=0):
+        with self._lock:
+            group_hits, group_misses = self._counts.get(group, (0, 0))
+            self._counts[group] = (group_hits + hits, group_misses + misses)
+        cache_accessed.send(sender=group, hits=hits, misses=misses)
+
+    def snapshot(self):
+        """{группа: {'hits', 'misses', 'hit_rate'}}"""
+        with self._lock:
+            counts = dict(self._counts)
+        return {
+            group: {
+                'hits': hits,
+                'misses': misses,
+                'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+            }
+            for group, (hits, misses) in counts.items()
+        }
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+
+stats = HitCounter()
+
+
+# Версии результатов поиска
+
+def _months(check_in, check_out):
+    """Месяцы ('YYYY-MM'), в которые попадают ночи [check_in, check_out)"""
+    last_night = check_out - timedelta(days=1)
+    year, month = check_in.year, check_in.month
+    months = []
+    while (year, month) <= (last_night.year, last_night.month):
+        months.append(f'{year:04d}-{month:02d}')
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def _versions(keys):
+    """Текущие версии ключей; отсутствующие создаются новыми значениями.
+
+    Пропавшую (вытесненную) версию нельзя считать нулевой — иначе снова
+    станут видны записи, сохраненные до последнего повышения версии.
+    """
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            token = uuid.uuid4().hex
+            versions[key] = token if cache.add(key, token, None) else cache.get(key, token)
+    return [versions[key] for key in keys]
+
+
+def _bump(keys):
+    tokens = {key: uuid.uuid4().hex for key in keys}
+    # Отметка записи нужна кэшу результатов, прочитанных с реплик (db_router)
+    cache.set_many({**tokens, **db_router.write_marker()}, None)
+
+
+def _month_keys(check_in, check_out):
+    return [f'hotels:v:month:{month}' for month in _months(check_in, check_out)]
+
+
+def _hotel_key(hotel_id):
+    return f'hotels:v:hotel:{hotel_id}'
+
+
+ROOMS_VERSION_KEY = 'hotels:v:rooms'
+ALL_VERSION_KEY = 'hotels:v:all'
+
+
+def _stay_keys(hotel_id, check_in, check_out):
+    keys = [_hotel_key(hotel_id)]
+    if check_in and check_out and check_in < check_out:
+        keys += _month_keys(check_in, check_out)
+    return keys
+
+
+def invalidate_stay(hotel_id, check_in, check_out):
+    """Бронь изменилась: устаревают месяцы ее дат и поиск по ее гостинице"""
+    _bump(_stay_keys(hotel_id, check_in, check_out))
+
+
+def invalidate_stays(stays):
+    """То же для многих пар (hotel_id, check_in, check_out) одним обращением к кэшу"""
+    keys = set()
+    for hotel_id, check_in, check_out in stays:
+        keys.update(_stay_keys(hotel_id, check_in, check_out))
+    if keys:
+        _bump(sorted(keys))
+
+
+def invalidate_rooms(hotel_id):
+    """Номер добавлен, изменен или удален"""
+    _bump([_hotel_key(hotel_id), ROOMS_VERSION_KEY])
+
+
+def invalidate_all():
+    """Массовая загрузка в обход сигналов: устаревает весь поиск по датам"""
+    _bump([ALL_VERSION_KEY])
+
+
+HOLD_STEP = 60
+
+
+def _hold_keys(check_in, check_out):
+    return [f'hotels:holds-until:{month}' for month in _months(check_in, check_out)]
+
+
+def note_hold(check_in, check_out, expires_at):
+    """Удержание на даты [check_in, check_out) действует до ``expires_at``"""
+    keys = _hold_keys(check_in, check_out)
+    until = cache.get_many(keys)
+    deadline = expires_at.timestamp()
+    cache.set_many({key: max(until.get(key, 0), deadline) for key in keys}, None)
+
+
+def _hold_step(check_in, check_out):
+    """Текущий шаг истечения удержаний, пока на даты есть неистекшие удержания.
+
+    После истечения последнего — постоянное значение, и ключ перестает меняться.
+    """
+    deadline = max(cache.get_many(_hold_keys(check_in, check_out)).values(), default=0)
+    return min(int(timezone.now().timestamp() // HOLD_STEP), math.ceil(deadline / HOLD_STEP))
+
+
+def _cached(group, key, compute):
+    value = cache.get(key)
+    if value is not None:
+        stats.record(group, hits=1)
+        return value
+    stats.record(group, misses=1)
+    value = compute()
+    cache.set(key, value, db_router.result_timeout(RESULT_TIMEOUT))
+    return value
+
+
+def _search_key(prefix, check_in, check_out, *params):
+    """Ключ результата поиска по всем гостиницам на даты [check_in, check_out)"""
+    versions = _versions(_month_keys(check_in, check_out) + [ROOMS_VERSION_KEY, ALL_VERSION_KEY])
+    versions.append(str(_hold_step(check_in, check_out)))
+    # Хэш вместо списка версий держит длину ключа в пределах memcached
+    digest = hashlib.md5(':'.join(versions).encode()).hexdigest()
+    return ':'.join(['hotels', prefix, str(check_in), str(check_out), *map(str, params), digest])
+
+
+def group_offers(check_in, check_out, rooms_count, min_area, compute):
+    """Кэшированные предложения гостиниц для групп (hotels.group_search)"""
+    key = _search_key('group-offers', check_in, check_out, rooms_count, min_area or 0)
+    return _cached('availability', key, compute)
+
+
+def free_room_ids(hotel_id, check_in, check_out, compute):
+    """Кэшированный набор id свободных номеров гостиницы"""
+    hotel_version, all_version = _versions([_hotel_key(hotel_id), ALL_VERSION_KEY])
+    hold_step = _hold_step(check_in, check_out)
+    key = f'hotels:free-rooms:{hotel_id}:{check_in}:{check_out}:{hotel_version}:{all_version}:{hold_step}'
+    return _cached('availability', key, compute)
+
+
+def search_etag(params, check_in, check_out, hotel_id=None):
+    """ETag ответа поиска: меняется только вместе с версиями его данных.
+
+    Позволяет ответить 304 на условный запрос, не обращаясь к базе.
+    """
+    keys = _month_keys(check_in, check_out) + [ROOMS_VERSION_KEY, ALL_VERSION_KEY]
+    if hotel_id is not None:
+        keys.append(_hotel_key(hotel_id))
+    payload = f'{params}|{":".join(_versions(keys))}|{_hold_step(check_in, check_out)}'
+    return hashlib.md5(payload.encode()).hexdigest()
+
+
+# Карточки
+
+def _timestamp(value):
+    return value.timestamp() if value else 0
+
+
+def hotel_card_key(hotel):
+    hotel_page = next(iter(hotel.pages.all()), None)
+    page_part = f'{hotel_page.pk}:{hotel_page.url_path}' if hotel_page else '-'
+    return (
+        f'hotels:card:hotel:{hotel.pk}:{_timestamp(hotel.updated_at)}:'
+        f'{hotel.rooms_count}:{hotel.photos_count}:{page_part}'
+    )
+
+
+def room_card_key(room):
+    return f'hotels:card:room:{room.pk}:{_timestamp(room.updated_at)}'
+
+
+def render_cards(objects, template_name, key_func, request=None, context_func=None):
+    """HTML карточек ``objects`` с одним обращением к кэшу на страницу"""
+    objects = list(objects)
+    keys = [key_func(obj) for obj in objects]
+    cached = cache.get_many(keys) if keys else {}
+    stats.record('cards', hits=len(cached), misses=len(keys) - len(cached))
+
+    cards = []
+    rendered = {}
+    for obj, key in zip(objects, keys):
+        html = cached.get(key)
+        if html is None:
+            context = context_func(obj) if context_func else {'object': obj}
+            html = render_to_string(template_name, context, request=request)
+            rendered[key] = html
+        cards.append(mark_safe(html))
+    if rendered:
+        cache.set_many(rendered, CARD_TIMEOUT)
+    return cards
+
+
+def render_room_cards(rooms, request=None):
+    """Кэшированные карточки номеров для списков номеров и страниц гостиниц"""
+    return render_cards(
+        rooms, 'hotels/room_card.html', room_card_key,
+        request=request, context_func=lambda room: {'room': room},
+    )
@@ -0,0 +1,123 @@
+"""Потоковая выгрузка бронирований в CSV и JSON Lines.
+
+Строки читаются ``values_list`` с JOIN к номеру и гостинице через
+``iterator(chunk_size=...)`` (на PostgreSQL — серверный курсор) и сразу
+превращаются в текст, поэтому память не зависит от числа строк. Через
+pgbouncer серверные курсоры отключены (``DISABLE_SERVER_SIDE_CURSORS``), и
+строки читаются порциями по ключу ``id``. Заголовок
+CSV (и первая строка JSONL) отдается сразу, не дожидаясь первой порции.
+Текстовые ячейки CSV, которые табличный редактор принял бы за формулу,
+экранируются апострофом.
+Используется командой ``export_bookings`` и представлением
+``hotels.views.export_bookings``.
+"""
+import csv
+import io
+import json
+
+from django.db import connections
+
+from .models import Booking
+
+CHUNK_SIZE = 2000
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+# (колонка выгрузки, поле запроса)
+COLUMNS = [
+    ('booking_id', 'id'),
+    ('hotel_id', 'room__hotel_id'),
+    ('hotel', 'room__hotel__name'),
+    ('room_id', 'room_id'),
+    ('room', 'room__name'),
+    ('guest_name', 'guest_name'),
+    ('guest_email', 'guest_email'),
+    ('guest_phone', 'guest_phone'),
+    ('check_in', 'check_in'),
+    ('check_out', 'check_out'),
+    ('status', 'status'),
+    ('created_at', 'created_at'),
+]
+
+
+def export_rows(date_from=None, date_to=None, hotel_id=None, statuses=None):
+    """Кортежи ``COLUMNS`` для броней, пересекающих [date_from, date_to)"""
+    bookings = Booking.objects.all()
+    if date_from:
+        bookings = bookings.filter(check_out__gt=date_from)
+    if date_to:
+        bookings = bookings.filter(check_in__lt=date_to)
+    if hotel_id:
+        bookings = bookings.filter(room__hotel_id=hotel_id)
+    if statuses:
+        bookings = bookings.filter(status__in=statuses)
+    # Порядок по первичному ключу читается по индексу без сортировки
+    return bookings.order_by('id').values_list(*(field for _, field in COLUMNS))
+
+
+def iterate_rows(rows, chunk_size=CHUNK_SIZE):
+    """Строки ``rows`` из ``export_rows`` с памятью на одну порцию"""
+    if not connections[rows.db].settings_dict.get('DISABLE_SERVER_SIDE_CURSORS'):
+        yield from rows.iterator(chunk_size=chunk_size)
+        return
+    # Обычный курсор psycopg2 забрал бы весь результат сразу; id — первая колонка
+    last_id = None
+    while True:
+        batch = list((rows if last_id is None else rows.filter(id__gt=last_id))[:chunk_size])
+        yield from batch
+        if len(batch) < chunk_size:
+            return
+        last_id = batch[-1][0]
+
+
+# Начала ячеек, с которых Excel и LibreOffice читают формулу
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _csv_cell(value):
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _csv_chunks(rows, chunk_size):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        value = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return value
+
+    writer.writerow(name for name, _ in COLUMNS)
+    yield flush()
+    for i, row in enumerate(iterate_rows(rows, chunk_size), 1):
+        writer.writerow(map(_csv_cell, row))
+        if i % chunk_size == 0:
+            yield flush()
+    tail = flush()
+    if tail:
+        yield tail
+
+
+def _jsonl_chunks(rows, chunk_size):
+    names = [name for name, _ in COLUMNS]
+    lines = []
+    for i, row in enumerate(iterate_rows(rows, chunk_size)):
+        lines.append(json.dumps(dict(zip(names, row)), ensure_ascii=False, default=str))
+        # Первая строка уходит сразу, дальше — порциями
+        if i == 0 or len(lines) == chunk_size:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def stream(rows, fmt='csv', chunk_size=CHUNK_SIZE):
+    """Текст выгрузки ``rows`` порциями по ``chunk_size`` строк"""
+    if fmt == 'jsonl':
+        return _jsonl_chunks(rows, chunk_size)
+    return _csv_chunks(rows, chunk_size)
@@ -1,9 +1,22 @@
 from django import forms
 from .models import Booking
+from .group_search import MAX_ROOMS as MAX_GROUP_ROOMS
+from .pagination import DEFAULT_PAGE_SIZE
 from datetime import date
 
 
+def _validate_stay(check_in, check_out):
+    if check_in and check_out:
+        if check_in < date.today():
+            raise forms.ValidationError('Дата заезда не может быть в прошлом.')
+        if check_out <= check_in:
+            raise forms.ValidationError('Дата выезда должна быть позже даты заезда.')
+
+
 class BookingForm(forms.ModelForm):
+    # Заполняется скриптом страницы после удержания номера (booking.place_hold)
+    hold_token = forms.CharField(required=False, max_length=32, widget=forms.HiddenInput)
+
     class Meta:
         model = Booking
         fields = ['guest_name', 'guest_email', 'guest_phone', 'check_in', 'check_out']
@@ -24,15 +37,19 @@ class BookingForm(forms.ModelForm):
 
     def clean(self):
         cleaned_data = super().clean()
-        check_in = cleaned_data.get('check_in')
-        check_out = cleaned_data.get('check_out')
+        _validate_stay(cleaned_data.get('check_in'), cleaned_data.get('check_out'))
+        return cleaned_data
+
 
-        if check_in and check_out:
-            if check_in < date.today():
-                raise forms.ValidationError('Дата заезда не может быть в прошлом.')
-            if check_out <= check_in:
-                raise forms.ValidationError('Дата выезда должна быть позже даты заезда.')
+class RoomHoldForm(forms.Form):
+    """Даты удержания номера, пока гость заполняет форму бронирования"""
+    check_in = forms.DateField()
+    check_out = forms.DateField()
+    hold_token = forms.CharField(required=False, max_length=32)
 
+    def clean(self):
+        cleaned_data = super().clean()
+        _validate_stay(cleaned_data.get('check_in'), cleaned_data.get('check_out'))
         return cleaned_data
 
 
@@ -47,5 +64,85 @@ class DateFilterForm(forms.Form):
         widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
         label='Дата выезда'
     )
+    # Значение разбирает и ограничивает pagination.page_size_from; форма его
+    # не проверяет, чтобы ни число, ни мусор не сбрасывали фильтр по датам
+    page_size = forms.CharField(
+        required=False,
+        widget=forms.Select(
+            choices=[(size, size) for size in (12, 24, 48, 96)],
+            attrs={'class': 'form-select'},
+        ),
+        initial=DEFAULT_PAGE_SIZE,
+        label='На странице'
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        check_in = cleaned_data.get('check_in')
+        check_out = cleaned_data.get('check_out')
+        if check_in and check_out and check_out <= check_in:
+            raise forms.ValidationError('Дата выезда должна быть позже даты заезда.')
+        return cleaned_data
+
+
+class GroupSearchForm(DateFilterForm):
+    """Фильтр по датам с поиском нескольких номеров для группы (hotels.group_search)"""
+    rooms = forms.IntegerField(
+        required=False,
+        min_value=1,
+        max_value=MAX_GROUP_ROOMS,
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'placeholder': '1'}),
+        label='Номеров'
+    )
+    min_area = forms.DecimalField(
+        required=False,
+        min_value=0,
+        max_digits=8,
+        decimal_places=2,
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'placeholder': 'м²'}),
+        label='Общая площадь от'
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if self.group_mode(cleaned_data) and not (cleaned_data.get('check_in') and cleaned_data.get('check_out')):
+            raise forms.ValidationError('Для поиска нескольких номеров укажите даты заезда и выезда.')
+        return cleaned_data
 
+    def group_mode(self, cleaned_data=None):
+        """Ищутся несколько номеров или номера с общей площадью (hotels.group_search)"""
+        data = cleaned_data if cleaned_data is not None else self.cleaned_data
+        return (data.get('rooms') or 1) > 1 or bool(data.get('min_area'))
 
+
+class HotelSearchForm(GroupSearchForm):
+    """Фильтр списка гостиниц: текст, город, даты и группа (hotels.search)"""
+    q = forms.CharField(
+        required=False,
+        max_length=200,
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Название, описание, удобства'}),
+        label='Поиск'
+    )
+    city = forms.CharField(
+        required=False,
+        max_length=100,
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Москва'}),
+        label='Город'
+    )
+
+
+class BookingExportForm(forms.Form):
+    """Фильтры выгрузки бронирований (hotels.exports)"""
+    format = forms.ChoiceField(choices=[('csv', 'CSV'), ('jsonl', 'JSON Lines')], required=False)
+    date_from = forms.DateField(required=False, label='Проживание с')
+    date_to = forms.DateField(required=False, label='Проживание по')
+    hotel = forms.IntegerField(required=False, min_value=1, label='Гостиница (id)')
+    status = forms.MultipleChoiceField(choices=Booking.STATUS_CHOICES, required=False, label='Статус')
+
+    def clean(self):
+        cleaned_data = super().clean()
+        date_from = cleaned_data.get('date_from')
+        date_to = cleaned_data.get('date_to')
+        if date_from and date_to and date_to <= date_from:
+            raise forms.ValidationError('Конец периода должен быть позже начала.')
+        return cleaned_data
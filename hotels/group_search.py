@@ -0,0 +1,186 @@
+"""Поиск для групп: несколько номеров в одной гостинице на одни даты.
+
+Предложение гостиницы — самый дешевый набор из ``rooms_count`` свободных
+номеров общей площадью не меньше ``min_area``. Подходящие гостиницы
+отбираются в SQL одним запросом ``GROUP BY hotel_id ... HAVING`` по
+свободным номерам (``occupancy.free_rooms``) с местами по цене и по
+площади; затем читаются только самые дешевые ``rooms_count`` номеров каждой
+гостиницы. Обычно они и подходят. Если их площади не хватает, а самых
+больших номеров гостиницы хватило бы, набор для такой гостиницы подбирается
+точно (``_cheapest_with_area``). Стоимость выбранных номеров
+считается одним пакетным расчетом ``pricing.quote_rooms``. Сезоны, наценки и
+скидки действуют на все номера гостиницы одинаково, поэтому выбор по базовой
+цене совпадает с выбором по итоговой стоимости.
+"""
+from collections import namedtuple
+from decimal import Decimal
+
+import numpy as np
+from django.db import connections
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from . import occupancy, pricing
+from .models import Room
+
+MAX_ROOMS = 20
+# Предел шагов площади в таблице подбора; при более мелких долях площадь
+# округляется вниз, и подобранный набор все равно достаточен
+MAX_AREA_STEPS = 2000
+
+
+class GroupOffer(namedtuple('GroupOffer', ['total_kopecks', 'hotel_id', 'room_ids', 'area', 'nights'])):
+    """Предложение гостиницы для группы; порядок полей — порядок ранжирования"""
+    __slots__ = ()
+
+    @property
+    def id(self):
+        return self.hotel_id
+
+    @property
+    def rooms_count(self):
+        return len(self.room_ids)
+
+    @property
+    def total(self):
+        return Decimal(self.total_kopecks).scaleb(-2)
+
+
+def _cheapest_with_area(prices, areas, count, min_area):
+    """Индексы ``count`` номеров общей площадью от ``min_area`` с наименьшей ценой или None.
+
+    Рюкзак по (число номеров, набранная площадь с потолком ``min_area``);
+    площади в сотых долях м² делятся на общий делитель, поэтому для целых
+    квадратных метров таблица невелика.
+    """
+    step = max(int(np.gcd.reduce(np.append(areas, min_area))), 1, -(-min_area // MAX_AREA_STEPS))
+    target = -(-min_area // step)
+    units = np.minimum(areas // step, target)
+    infinity = np.iinfo(np.int64).max // 4
+    cost = np.full((count + 1, target + 1), infinity, dtype=np.int64)
+    cost[0, 0] = 0
+    # source[i, k, a] — площадь до добавления номера i, если он улучшил (k, a)
+    source = np.full((len(prices), count + 1, target + 1), -1, dtype=np.int16)
+    candidate = np.empty(target + 1, dtype=np.int64)
+    for i in range(len(prices)):
+        unit = int(units[i])
+        for k in range(min(i + 1, count), 0, -1):
+            previous = cost[k - 1]
+            candidate.fill(infinity)
+            candidate[unit:target] = previous[:target - unit] + prices[i]
+            first = target - unit
+            best = first + int(np.argmin(previous[first:]))
+            candidate[target] = previous[best] + prices[i]
+            better = np.flatnonzero(candidate < cost[k])
+            cost[k, better] = candidate[better]
+            source[i, k, better] = np.where(better == target, best, better - unit)
+    if cost[count, target] >= infinity:
+        return None
+    picked = []
+    k, area = count, target
+    for i in range(len(prices) - 1, -1, -1):
+        if k and source[i, k, area] >= 0:
+            picked.append(i)
+            k, area = k - 1, int(source[i, k, area])
+    return np.array(picked[::-1], dtype=np.int64)
+
+
+def _ranked_rooms(check_in, check_out, rooms=None, by_area=True):
+    """Свободные номера с местом по цене и по площади внутри своей гостиницы.
+
+    Без ``by_area`` место по площади совпадает с местом по цене: одинаковое
+    окно СУБД считает за один проход.
+    """
+    by_price = [F('price_per_night').asc(), F('id').asc()]
+    return (
+        occupancy.free_rooms(check_in, check_out, rooms)
+        .order_by()
+        .values('id', 'hotel_id', 'area', 'price_per_night')
+        .annotate(
+            price_rank=Window(RowNumber(), partition_by=F('hotel_id'), order_by=by_price),
+            area_rank=Window(
+                RowNumber(), partition_by=F('hotel_id'),
+                order_by=[F('area').desc(), F('id').asc()] if by_area else by_price,
+            ),
+        )
+    )
+
+
+# Площадь сравнивается в сотых долях м² целыми числами: так одинаково ведут
+# себя SQLite, где numeric хранится как REAL, и PostgreSQL
+HOTELS_SQL = """
+    SELECT hotel_id,
+           SUM(CASE WHEN price_rank <= %s THEN CAST(ROUND(area * 100) AS INTEGER) ELSE 0 END) >= %s
+    FROM ({ranked}) ranked
+    WHERE price_rank <= %s OR area_rank <= %s
+    GROUP BY hotel_id
+    HAVING SUM(CASE WHEN price_rank <= %s THEN 1 ELSE 0 END) = %s
+       AND SUM(CASE WHEN area_rank <= %s THEN CAST(ROUND(area * 100) AS INTEGER) ELSE 0 END) >= %s
+"""
+
+
+def _suitable_hotels(ranked, rooms_count, required_area):
+    """{id гостиницы: хватает ли площади самых дешевых номеров}.
+
+    Один запрос ``GROUP BY hotel_id ... HAVING``: в гостинице свободно не
+    меньше ``rooms_count`` номеров, и самые большие из них набирают
+    ``required_area`` (в сотых долях м²).
+    """
+    sql, params = ranked.query.get_compiler(using=ranked.db).as_sql()
+    n = rooms_count
+    with connections[ranked.db].cursor() as cursor:
+        cursor.execute(HOTELS_SQL.format(ranked=sql), [n, required_area, *params, n, n, n, n, n, required_area])
+        return {hotel_id: bool(enough) for hotel_id, enough in cursor.fetchall()}
+
+
+def group_offers(check_in, check_out, rooms_count, min_area=None, rooms=None):
+    """Предложения всех подходящих гостиниц по возрастанию итоговой стоимости.
+
+    ``rooms`` сужает поиск, например до номеров одной гостиницы.
+    """
+    required_area = pricing.kopecks(min_area) if min_area else 0
+    hotels = _suitable_hotels(_ranked_rooms(check_in, check_out, rooms, bool(required_area)), rooms_count, required_area)
+    if not hotels:
+        return []
+
+    # Гостиница -> [(id, площадь)] выбранных номеров
+    chosen = {}
+    cheapest = _ranked_rooms(check_in, check_out, rooms, by_area=False).filter(price_rank__lte=rooms_count)
+    for room_id, hotel_id, area in cheapest.values_list('id', 'hotel_id', 'area'):
+        if hotels.get(hotel_id):
+            chosen.setdefault(hotel_id, []).append((room_id, pricing.kopecks(area)))
+    short = [hotel_id for hotel_id, enough in hotels.items() if not enough]
+    for i in range(0, len(short), 500):
+        members = {}
+        batch = occupancy.free_rooms(check_in, check_out, rooms).filter(hotel_id__in=short[i:i + 500])
+        for room_id, hotel_id, area, price in batch.order_by('price_per_night', 'id').values_list('id', 'hotel_id', 'area', 'price_per_night'):
+            members.setdefault(hotel_id, []).append((room_id, pricing.kopecks(area), pricing.kopecks(price)))
+        for hotel_id, hotel_rooms in members.items():
+            prices = np.array([room[2] for room in hotel_rooms], dtype=np.int64)
+            areas = np.array([room[1] for room in hotel_rooms], dtype=np.int64)
+            picked = _cheapest_with_area(prices, areas, rooms_count, required_area)
+            if picked is not None:
+                chosen[hotel_id] = [hotel_rooms[row][:2] for row in picked.tolist()]
+    if not chosen:
+        return []
+
+    quotes = pricing.quote_rooms([room_id for hotel_rooms in chosen.values() for room_id, _ in hotel_rooms], check_in, check_out)
+    nights = (check_out - check_in).days
+    offers = [
+        GroupOffer(
+            hotel_id=hotel_id,
+            total_kopecks=sum(pricing.kopecks(quotes[room_id].total) for room_id, _ in hotel_rooms),
+            room_ids=tuple(sorted(room_id for room_id, _ in hotel_rooms)),
+            area=Decimal(sum(area for _, area in hotel_rooms)).scaleb(-2),
+            nights=nights,
+        )
+        for hotel_id, hotel_rooms in chosen.items()
+    ]
+    offers.sort()
+    return offers
+
+
+def hotel_offer(hotel_id, check_in, check_out, rooms_count, min_area=None):
+    """Предложение одной гостиницы или None"""
+    offers = group_offers(check_in, check_out, rooms_count, min_area, Room.objects.filter(hotel_id=hotel_id))
+    return offers[0] if offers else None
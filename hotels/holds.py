@@ -0,0 +1,73 @@
+"""Временные удержания номеров (``RoomHold``).
+
+Пока гость заполняет форму бронирования, номер удерживается за ним на
+``ROOM_HOLD_TTL`` секунд (см. ``booking.place_hold``). Остальные посетители
+сразу видят номер занятым и не отправляют заведомо неудачную заявку.
+Истечение ленивое: проверки доступности сравнивают ``expires_at`` с текущим
+временем, а строки просроченных удержаний удаляет порциями ``sweep``
+(команда ``sweep_holds``), заодно сбрасывая кэш поиска по их датам. Момент
+истечения округляется вверх до ``caching.HOLD_STEP`` секунд: ключи кэша
+поиска по датам с активными удержаниями меняются на этих границах, и
+истекшее удержание не остается в кэше до прихода ``sweep``.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+import math
+import secrets
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import caching
+from .models import RoomHold
+
+BATCH_SIZE = 5000
+
+
+def new_token():
+    return secrets.token_hex(16)
+
+
+def expiry(ttl=None):
+    """Момент истечения удержания, созданного сейчас, на границе ``caching.HOLD_STEP``"""
+    if ttl is None:
+        ttl = settings.ROOM_HOLD_TTL
+    moment = (timezone.now() + timedelta(seconds=ttl)).timestamp()
+    return datetime.fromtimestamp(math.ceil(moment / caching.HOLD_STEP) * caching.HOLD_STEP, dt_timezone.utc)
+
+
+def active_for(client, now=None):
+    """Неистекшие удержания клиента"""
+    return RoomHold.objects.filter(client=client, expires_at__gt=now or timezone.now())
+
+
+def expired(now=None):
+    return RoomHold.objects.filter(expires_at__lte=now or timezone.now())
+
+
+def sweep_batch(now=None, batch_size=BATCH_SIZE):
+    """Удаляет одну порцию просроченных удержаний; возвращает их число"""
+    now = now or timezone.now()
+    with transaction.atomic():
+        rows = list(
+            expired(now)
+            .order_by('expires_at')
+            .values_list('id', 'room__hotel_id', 'check_in', 'check_out')[:batch_size]
+        )
+        if not rows:
+            return 0
+        # Удержание могли продлить после выборки — его не трогаем
+        expired(now).filter(id__in=[row[0] for row in rows]).delete()
+        stays = {row[1:] for row in rows}
+        transaction.on_commit(lambda: caching.invalidate_stays(stays))
+    return len(rows)
+
+
+def sweep(now=None, batch_size=BATCH_SIZE):
+    """Удаляет все просроченные удержания порциями; генерирует размеры порций"""
+    now = now or timezone.now()
+    while True:
+        removed = sweep_batch(now, batch_size)
+        if not removed:
+            return
+        yield removed
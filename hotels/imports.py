@@ -0,0 +1,163 @@
+"""Пакетный импорт бронирований из выгрузок партнеров (OTA).
+
+Файл читается построчно (CSV с заголовком или JSON Lines) и обрабатывается
+порциями. Для порции одним запросом читаются активные брони ее номеров в
+общем диапазоне дат, после чего конфликты ищутся проходом по отсортированным
+интервалам каждого номера — без запроса на строку. Принятые строки
+вставляются ``bulk_create`` в транзакции под блокировкой строк номеров, как и
+в ``hotels.booking``, поэтому импорт не пересекается с бронированием на сайте.
+
+Внутри порции из пересекающихся заявок на один номер принимается заявка с
+более ранним заездом; последующие порции видят уже вставленные брони.
+"""
+from datetime import date
+import csv
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from . import availability
+from .models import Booking, Room
+
+CHUNK_SIZE = 5000
+FIELDS = ['room_id', 'guest_name', 'guest_email', 'guest_phone', 'check_in', 'check_out', 'status']
+STATUSES = {status for status, _ in Booking.STATUS_CHOICES}
+
+# Причины отказа
+INVALID = 'invalid'
+UNKNOWN_ROOM = 'unknown_room'
+CONFLICT_EXISTING = 'conflict_existing'
+CONFLICT_IN_FILE = 'conflict_in_file'
+
+
+class RowError(ValueError):
+    pass
+
+
+def read_rows(path, fmt=None):
+    """Словари строк файла по одной; формат определяется по расширению"""
+    fmt = fmt or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+    with open(path, encoding='utf-8', newline='') as f:
+        if fmt == 'jsonl':
+            for line in f:
+                line = line.strip()
+                if line:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        yield {'_raw': line}
+        else:
+            yield from csv.DictReader(f)
+
+
+def parse_row(row, default_status='confirmed'):
+    """Booking без сохранения; RowError, если строку нельзя импортировать"""
+    if not isinstance(row, dict):
+        # В JSON Lines строка может быть корректным JSON, но не объектом
+        raise RowError(f'строка не объект, а {type(row).__name__}')
+    missing = [field for field in FIELDS[:-1] if not str(row.get(field) or '').strip()]
+    if missing:
+        raise RowError(f'нет полей: {", ".join(missing)}')
+    try:
+        room_id = int(row['room_id'])
+        check_in = date.fromisoformat(str(row['check_in']).strip())
+        check_out = date.fromisoformat(str(row['check_out']).strip())
+        validate_email(str(row['guest_email']).strip())
+    except (TypeError, ValueError, ValidationError) as e:
+        raise RowError(str(e.messages[0] if isinstance(e, ValidationError) else e))
+    if check_out <= check_in:
+        raise RowError('дата выезда не позже даты заезда')
+    status = str(row.get('status') or default_status).strip()
+    if status not in STATUSES:
+        raise RowError(f'неизвестный статус {status!r}')
+    return Booking(
+        room_id=room_id,
+        guest_name=str(row['guest_name']).strip()[:200],
+        guest_email=str(row['guest_email']).strip(),
+        guest_phone=str(row['guest_phone']).strip()[:20],
+        check_in=check_in,
+        check_out=check_out,
+        status=status,
+    )
+
+
+def _busy_intervals(bookings):
+    """Активные брони порции по номерам: {room_id: [(check_in, check_out), ...]}.
+
+    Интервалы каждого номера отсортированы и объединены.
+    """
+    active = [b for b in bookings if b.status in availability.ACTIVE_STATUSES]
+    if not active:
+        return {}
+    rows = (
+        availability.overlapping_bookings(
+            min(b.check_in for b in active), max(b.check_out for b in active),
+        )
+        .filter(room_id__in={b.room_id for b in active})
+        .order_by('room_id', 'check_in')
+        .values_list('room_id', 'check_in', 'check_out')
+    )
+    busy = {}
+    for room_id, check_in, check_out in rows:
+        intervals = busy.setdefault(room_id, [])
+        if intervals and check_in < intervals[-1][1]:
+            intervals[-1] = (intervals[-1][0], max(intervals[-1][1], check_out))
+        else:
+            intervals.append((check_in, check_out))
+    return busy
+
+
+def sweep_conflicts(bookings, busy):
+    """Делит брони порции на принятые и отклоненные [(booking, причина)].
+
+    Заявки каждого номера просматриваются по возрастанию заезда. Указатель
+    по занятым интервалам базы только движется вперед, а пересечение с уже
+    принятыми заявками сводится к сравнению с максимальной датой выезда.
+    """
+    by_room = {}
+    accepted = []
+    for booking in bookings:
+        if booking.status in availability.ACTIVE_STATUSES:
+            by_room.setdefault(booking.room_id, []).append(booking)
+        else:
+            # Отмененные брони номер не занимают
+            accepted.append(booking)
+
+    rejected = []
+    for room_id, candidates in by_room.items():
+        candidates.sort(key=lambda b: (b.check_in, b.check_out))
+        intervals = busy.get(room_id, [])
+        position = 0
+        accepted_until = None
+        for booking in candidates:
+            while position < len(intervals) and intervals[position][1] <= booking.check_in:
+                position += 1
+            if position < len(intervals) and intervals[position][0] < booking.check_out:
+                rejected.append((booking, CONFLICT_EXISTING))
+            elif accepted_until and booking.check_in < accepted_until:
+                rejected.append((booking, CONFLICT_IN_FILE))
+            else:
+                accepted.append(booking)
+                accepted_until = max(accepted_until or booking.check_out, booking.check_out)
+    return accepted, rejected
+
+
+def import_chunk(bookings, dry_run=False):
+    """Проверяет и вставляет порцию; возвращает (принятые, отклоненные)"""
+    room_ids = sorted({b.room_id for b in bookings})
+    with transaction.atomic():
+        # Блокировки в порядке id: импорт и сайт не заблокируют друг друга навсегда
+        locked = set(
+            Room.objects.filter(pk__in=room_ids).order_by('pk')
+            .select_for_update().values_list('pk', flat=True)
+        )
+        known = [b for b in bookings if b.room_id in locked]
+        rejected = [(b, UNKNOWN_ROOM) for b in bookings if b.room_id not in locked]
+
+        accepted, conflicts = sweep_conflicts(known, _busy_intervals(known))
+        rejected += conflicts
+        if accepted and not dry_run:
+            Booking.objects.bulk_create(accepted, batch_size=1000)
+    return accepted, rejected
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from hotels import archive
+from datetime import timedelta
+import time
+
+
+class Command(BaseCommand):
+    help = 'Переносит прошедшие и давно отмененные бронирования в архив порциями'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=90,
+                            help='Архивировать брони с выездом раньше, чем столько дней назад')
+        parser.add_argument('--cancelled-days', type=int, default=30,
+                            help='Архивировать отмененные брони, не менявшиеся столько дней')
+        parser.add_argument('--batch-size', type=int, default=archive.BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='Только посчитать брони')
+
+    def handle(self, *args, **options):
+        if options['days'] < 1 or options['cancelled_days'] < 1:
+            raise CommandError('--days и --cancelled-days должны быть положительными')
+        before = timezone.localdate() - timedelta(days=options['days'])
+        cancelled_before = timezone.now() - timedelta(days=options['cancelled_days'])
+
+        if options['dry_run']:
+            count = archive.archivable(before, cancelled_before).count()
+            self.stdout.write(f'К переносу в архив: {count} броней (выезд до {before})')
+            return
+
+        started = time.perf_counter()
+        total = 0
+        for moved in archive.archive(before, cancelled_before, options['batch_size']):
+            total += moved
+            self.stdout.write(f'  перенесено {total}')
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'В архив перенесено {total} броней за {elapsed:.1f} с (выезд до {before})'
+        ))
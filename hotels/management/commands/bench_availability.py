@@ -0,0 +1,139 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from hotels.models import Hotel, Room, Booking
+from hotels import availability, occupancy
+from datetime import date, timedelta
+import random
+import statistics
+import time
+
+
+class Command(BaseCommand):
+    help = 'Замеряет план и задержку запросов доступности на большом объеме бронирований'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bookings', type=int, default=1_000_000, help='Количество бронирований')
+        parser.add_argument('--rooms', type=int, default=2000, help='Количество номеров')
+        parser.add_argument('--runs', type=int, default=50, help='Повторов каждого запроса')
+        parser.add_argument('--batch-size', type=int, default=10000, help='Размер пачки bulk_create')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--keep', action='store_true', help='Не откатывать сгенерированные данные')
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+
+        # Все данные создаются в одной транзакции и по умолчанию откатываются
+        with transaction.atomic():
+            rooms = self.create_rooms(options['rooms'])
+            self.create_bookings(rooms, options['bookings'], options['batch_size'])
+            # bulk_create идет мимо сигналов, карты занятости строятся явно
+            occupancy.rebuild_all(room_ids=[room.pk for room in rooms])
+
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE hotels_booking')
+
+            check_in = date.today() + timedelta(days=30)
+            check_out = check_in + timedelta(days=3)
+            room = random.choice(rooms)
+            hotel = room.hotel
+
+            cases = [
+                ('free_rooms (одна гостиница)', lambda: list(
+                    availability.free_rooms(check_in, check_out, hotel.rooms.all()).values_list('id', flat=True)
+                ), availability.free_rooms(check_in, check_out, hotel.rooms.all())),
+                ('hotels_with_free_rooms', lambda: list(
+                    availability.hotels_with_free_rooms(check_in, check_out).values_list('id', flat=True)
+                ), availability.hotels_with_free_rooms(check_in, check_out)),
+                ('hotels_with_free_rooms (карты занятости)', lambda: list(
+                    occupancy.hotels_with_free_rooms(check_in, check_out, Hotel.objects.all()).values_list('id', flat=True)
+                ), occupancy.hotels_with_free_rooms(check_in, check_out, Hotel.objects.all())),
+                ('free_rooms (все номера)', lambda: list(
+                    availability.free_rooms(check_in, check_out).values_list('id', 'hotel_id')
+                ), availability.free_rooms(check_in, check_out)),
+                ('free_rooms (все номера, карты занятости)', lambda: list(
+                    occupancy.free_rooms(check_in, check_out).values_list('id', 'hotel_id')
+                ), occupancy.free_rooms(check_in, check_out)),
+                ('hotels_with_free_rooms (min_rooms=5)', lambda: list(
+                    availability.hotels_with_free_rooms(check_in, check_out, min_rooms=5).values_list('id', flat=True)
+                ), availability.hotels_with_free_rooms(check_in, check_out, min_rooms=5)),
+                ('is_room_free', lambda: availability.is_room_free(room, check_in, check_out),
+                 availability.overlapping_bookings(check_in, check_out).filter(room=room)),
+            ]
+
+            for title, run, queryset in cases:
+                self.stdout.write(self.style.MIGRATE_HEADING(f'\n{title}'))
+                self.stdout.write(queryset.explain())
+                self.report(run, options['runs'])
+
+            if not options['keep']:
+                transaction.set_rollback(True)
+
+    def create_rooms(self, count):
+        hotels = Hotel.objects.bulk_create([
+            Hotel(name=f'Бенчмарк {i + 1}', description='Тестовая гостиница', address='Москва')
+            for i in range(max(1, count // 50))
+        ])
+        rooms = Room.objects.bulk_create([
+            Room(
+                hotel=hotels[i % len(hotels)],
+                name=f'Номер {i + 1}',
+                description='Тестовый номер',
+                area=25,
+                price_per_night=3000,
+            )
+            for i in range(count)
+        ])
+        return rooms
+
+    def create_bookings(self, rooms, count, batch_size):
+        """Генерирует непересекающиеся бронирования подряд для каждого номера.
+
+        Половина истории каждого номера в прошлом, половина — впереди.
+        """
+        per_room = max(1, count // len(rooms))
+        start = date.today() - timedelta(days=per_room * 3 // 2)
+        batch = []
+        created = 0
+        started = time.perf_counter()
+
+        for room in rooms:
+            day = start + timedelta(days=random.randint(0, 3))
+            for _ in range(per_room):
+                if created + len(batch) >= count:
+                    break
+                nights = random.randint(1, 4)
+                batch.append(Booking(
+                    room=room,
+                    guest_name='Гость',
+                    guest_email='guest@example.com',
+                    guest_phone='+7 999 000-00-00',
+                    check_in=day,
+                    check_out=day + timedelta(days=nights),
+                    status=random.choice(['pending', 'confirmed', 'confirmed', 'cancelled']),
+                ))
+                day += timedelta(days=nights + random.randint(0, 2))
+                if len(batch) >= batch_size:
+                    Booking.objects.bulk_create(batch)
+                    created += len(batch)
+                    batch = []
+        if batch:
+            Booking.objects.bulk_create(batch)
+            created += len(batch)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'Создано бронирований: {created} за {elapsed:.1f} с')
+
+    def report(self, run, runs):
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            run()
+            timings.append((time.perf_counter() - started) * 1000)
+        if len(timings) > 1:
+            p50, p95, p99 = (statistics.quantiles(timings, n=100)[i] for i in (49, 94, 98))
+        else:
+            p50 = p95 = p99 = timings[0]
+        self.stdout.write(self.style.SUCCESS(
+            f'p50={p50:.2f} мс  p95={p95:.2f} мс  p99={p99:.2f} мс  (запусков: {runs})'
+        ))
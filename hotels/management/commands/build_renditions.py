@@ -0,0 +1,56 @@
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from hotels import caching, renditions
+from hotels.models import HotelImage, Room
+import os
+import time
+
+
+class Command(BaseCommand):
+    help = 'Строит WebP/JPEG-копии всех фото номеров и галерей гостиниц в пуле процессов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Процессов Pillow')
+        parser.add_argument('--batch-size', type=int, default=200, help='Файлов в одной порции')
+        parser.add_argument('--force', action='store_true', help='Пересоздать уже построенные копии')
+
+    def handle(self, *args, **options):
+        names = list(dict.fromkeys(
+            list(Room.objects.exclude(photo='').exclude(photo__isnull=True).values_list('photo', flat=True))
+            + list(HotelImage.objects.exclude(image='').values_list('image', flat=True))
+        ))
+        self.stdout.write(f'Исходных файлов: {len(names)}, процессов: {options["workers"]}')
+
+        if options['force']:
+            for name in names:
+                for width in renditions.WIDTHS:
+                    for fmt in renditions.FORMATS:
+                        path = renditions.rendition_name(name, width, fmt)
+                        if default_storage.exists(path):
+                            default_storage.delete(path)
+
+        started = time.perf_counter()
+        written = 0
+        failed = 0
+        batch_size = options['batch_size']
+        with renditions.process_pool(options['workers']) as executor:
+            for i in range(0, len(names), batch_size):
+                results = renditions.generate(names[i:i + batch_size], executor=executor)
+                for result in results.values():
+                    if isinstance(result, Exception):
+                        failed += 1
+                    else:
+                        written += result
+                self.stdout.write(f'  {min(i + batch_size, len(names))}/{len(names)}')
+
+        # Закэшированные карточки номеров ссылаются на исходные файлы
+        cache.delete_many([
+            caching.room_card_key(room)
+            for room in Room.objects.exclude(photo='').exclude(photo__isnull=True).only('id', 'updated_at')
+        ])
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Записано копий: {written}, ошибок: {failed}, {elapsed:.1f} с'
+        ))
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+from hotels import exports
+from hotels.forms import BookingExportForm
+import sys
+import time
+
+
+class Command(BaseCommand):
+    help = 'Потоковая выгрузка бронирований в CSV или JSON Lines с постоянным расходом памяти'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(exports.FORMATS), default='csv')
+        parser.add_argument('--output', '-o', help='Файл (по умолчанию — stdout)')
+        parser.add_argument('--from', dest='date_from', help='Брони, выезд которых позже даты, YYYY-MM-DD')
+        parser.add_argument('--to', dest='date_to', help='Брони, заезд которых раньше даты, YYYY-MM-DD')
+        parser.add_argument('--hotel', type=int, help='id гостиницы')
+        parser.add_argument('--status', action='append', default=[], help='Статус; можно указать несколько раз')
+        parser.add_argument('--chunk-size', type=int, default=exports.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        # Те же правила проверки, что и у выгрузки через сайт
+        form = BookingExportForm({
+            'format': options['format'],
+            'date_from': options['date_from'],
+            'date_to': options['date_to'],
+            'hotel': options['hotel'],
+            'status': options['status'],
+        })
+        if not form.is_valid():
+            raise CommandError(form.errors.as_text())
+
+        rows = exports.export_rows(
+            date_from=form.cleaned_data['date_from'],
+            date_to=form.cleaned_data['date_to'],
+            hotel_id=form.cleaned_data['hotel'],
+            statuses=form.cleaned_data['status'],
+        )
+        started = time.perf_counter()
+        out = open(options['output'], 'w', encoding='utf-8', newline='') if options['output'] else sys.stdout
+        written = 0
+        try:
+            for chunk in exports.stream(rows, options['format'], chunk_size=options['chunk_size']):
+                out.write(chunk)
+                written += len(chunk)
+        finally:
+            if options['output']:
+                out.close()
+
+        if options['output']:
+            self.stderr.write(
+                f'Выгружено в {options["output"]}: {written / 1024 / 1024:.1f} МБ '
+                f'за {time.perf_counter() - started:.1f} с'
+            )
@@ -0,0 +1,86 @@
+from django.core.management.base import BaseCommand, CommandError
+from hotels import availability, caching, imports, occupancy
+import csv
+import os
+import time
+
+
+class Command(BaseCommand):
+    help = (
+        'Импорт бронирований партнеров из CSV/JSON Lines порциями: конфликты ищутся '
+        'проходом по отсортированным интервалам, принятые строки вставляются bulk_create'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл .csv или .jsonl')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Формат, если не ясен из расширения')
+        parser.add_argument('--chunk-size', type=int, default=imports.CHUNK_SIZE, help='Строк в порции')
+        parser.add_argument('--default-status', choices=sorted(imports.STATUSES), default='confirmed',
+                            help='Статус для строк без колонки status')
+        parser.add_argument('--rejects', help='CSV для отклоненных строк (номер записи, причина, данные)')
+        parser.add_argument('--dry-run', action='store_true', help='Только проверить, ничего не записывать')
+
+    def handle(self, *args, **options):
+        if not os.path.exists(options['path']):
+            raise CommandError(f'Файл {options["path"]} не найден')
+
+        rejects_file = open(options['rejects'], 'w', encoding='utf-8', newline='') if options['rejects'] else None
+        rejects = csv.writer(rejects_file) if rejects_file else None
+        if rejects:
+            rejects.writerow(['row', 'reason', 'detail'] + imports.FIELDS)
+
+        self.counts = {}
+        self.accepted = 0
+        self.room_ids = set()
+        started = time.perf_counter()
+        chunk = []
+        total = 0
+        try:
+            for line, row in enumerate(imports.read_rows(options['path'], options['format']), 1):
+                total += 1
+                try:
+                    booking = imports.parse_row(row, options['default_status'])
+                except imports.RowError as e:
+                    self.reject(rejects, line, imports.INVALID, str(e), row)
+                    continue
+                booking._import_line = line
+                booking._import_row = row
+                chunk.append(booking)
+                if len(chunk) >= options['chunk_size']:
+                    self.flush(chunk, rejects, options['dry_run'])
+                    chunk = []
+                    elapsed = time.perf_counter() - started
+                    self.stdout.write(f'  {total} строк, {total / elapsed:.0f} строк/с')
+            if chunk:
+                self.flush(chunk, rejects, options['dry_run'])
+        finally:
+            if rejects_file:
+                rejects_file.close()
+
+        if self.room_ids and not options['dry_run']:
+            # bulk_create не вызывает сигналы: карты занятости и кэш поиска обновляем сами
+            occupancy.rebuild_all(room_ids=self.room_ids)
+            caching.invalidate_all()
+
+        elapsed = time.perf_counter() - started
+        rejected = sum(self.counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'{"Проверено" if options["dry_run"] else "Импортировано"}: {self.accepted} из {total}, '
+            f'отклонено {rejected}, {elapsed:.1f} с ({total / elapsed if elapsed else 0:.0f} строк/с)'
+        ))
+        for reason, count in sorted(self.counts.items()):
+            self.stdout.write(f'  {reason}: {count}')
+
+    def flush(self, chunk, rejects, dry_run):
+        accepted, rejected = imports.import_chunk(chunk, dry_run=dry_run)
+        self.accepted += len(accepted)
+        self.room_ids.update(b.room_id for b in accepted if b.status in availability.ACTIVE_STATUSES)
+        for booking, reason in rejected:
+            self.reject(rejects, booking._import_line, reason, '', booking._import_row)
+
+    def reject(self, rejects, line, reason, detail, row):
+        self.counts[reason] = self.counts.get(reason, 0) + 1
+        if rejects:
+            # Строка JSON Lines может быть не объектом: тогда колонки полей пустые
+            values = [row.get(field, '') for field in imports.FIELDS] if isinstance(row, dict) else [''] * len(imports.FIELDS)
+            rejects.writerow([line, reason, detail] + values)
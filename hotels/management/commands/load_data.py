@@ -1,10 +1,20 @@
-from django.core.management.base import BaseCommand
+from array import array
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
 from hotels.models import Hotel, HotelImage, Room, Booking
+from hotels import availability, caching, occupancy, pricing, search
 from pages.models import HomePage, ContactPage, HotelPage
-from wagtail.models import Site, Page
+from wagtail.models import Site, Page, Locale
+from wagtail.rich_text import RichText
 from datetime import date, timedelta
+import io
+import csv
 import random
 import re
+import time
+import uuid
 
 
 def create_slug(text):
@@ -40,10 +50,43 @@ def create_slug(text):
     return result
 
 
+CITIES = [
+    'Москва', 'Санкт-Петербург', 'Сочи', 'Казань', 'Калининград', 'Екатеринбург',
+    'Новосибирск', 'Владивосток', 'Нижний Новгород', 'Ярославль', 'Суздаль', 'Мурманск',
+]
+STREETS = ['ул. Ленина', 'Невский проспект', 'ул. Приморская', 'ул. Тверская', 'ул. Садовая', 'наб. Реки']
+HOTEL_WORDS = ['Гранд', 'Морской', 'Северный', 'Парк', 'Старый', 'Центральный', 'Бриз', 'Сияние', 'Уют', 'Панорама']
+ROOM_TYPES = [
+    ('Стандартный номер', 25, 3000, 'Уютный номер с одной кроватью, телевизором и мини-баром.'),
+    ('Улучшенный номер', 35, 4500, 'Просторный номер с видом, кондиционером и рабочим местом.'),
+    ('Семейный номер', 45, 6000, 'Просторный номер для семьи с двумя спальнями и детской зоной.'),
+    ('Люкс', 50, 7000, 'Роскошный номер с гостиной зоной, джакузи и панорамным видом.'),
+    ('Президентский люкс', 80, 12000, 'Эксклюзивный номер с отдельной гостиной, столовой и персональным дворецким.'),
+]
+BOOKING_COLUMNS = [
+    'room_id', 'guest_name', 'guest_email', 'guest_phone',
+    'check_in', 'check_out', 'status', 'created_at', 'updated_at',
+]
+
+
 class Command(BaseCommand):
     help = 'Заполняет базу данных тестовыми данными'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--hotels', type=int, help='Массовый режим: количество гостиниц')
+        parser.add_argument('--rooms-per-hotel', type=int, default=20, help='Номеров в каждой гостинице')
+        parser.add_argument('--bookings', type=int, default=0, help='Всего бронирований')
+        parser.add_argument('--seed', type=int, help='Зерно генератора для воспроизводимости')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Строк в одной пачке')
+        parser.add_argument('--no-pages', action='store_true', help='Не создавать страницы Wagtail')
+
     def handle(self, *args, **options):
+        if options['seed'] is not None:
+            random.seed(options['seed'])
+        if options['hotels']:
+            self.load_scaled(options)
+            return
+
         self.stdout.write('Создание тестовых данных...')
         
         # Создаем гостиницы
@@ -139,6 +182,8 @@ class Command(BaseCommand):
                 room = random.choice(rooms)
                 check_in = date.today() + timedelta(days=random.randint(10, 30))
                 check_out = check_in + timedelta(days=random.randint(1, 5))
+                if not availability.is_room_free(room, check_in, check_out):
+                    continue
                 
                 booking = Booking.objects.create(
                     room=room,
@@ -152,8 +197,6 @@ class Command(BaseCommand):
                 self.stdout.write(self.style.SUCCESS(f'Создано бронирование: {booking}'))
         
         # Создаем главную страницу Wagtail
-        from wagtail.models import Page
-        
         root = Page.get_first_root_node()
         if root:
             # Проверяем, есть ли уже главная страница HomePage
@@ -187,9 +230,9 @@ class Command(BaseCommand):
             # Создаем StreamField контент
             home_page.body = [
                 ('heading', 'Добро пожаловать!'),
-                ('paragraph', '<p>Мы рады приветствовать вас в нашей сети гостиниц. Мы предлагаем комфортабельные номера, отличный сервис и незабываемые впечатления от отдыха.</p>'),
+                ('paragraph', RichText('<p>Мы рады приветствовать вас в нашей сети гостиниц. Мы предлагаем комфортабельные номера, отличный сервис и незабываемые впечатления от отдыха.</p>')),
                 ('heading', 'Наши преимущества'),
-                ('paragraph', '<ul><li>Удобное расположение в центре города</li><li>Современные номера с всеми удобствами</li><li>Профессиональный персонал</li><li>Лучшие цены на рынке</li></ul>'),
+                ('paragraph', RichText('<ul><li>Удобное расположение в центре города</li><li>Современные номера с всеми удобствами</li><li>Профессиональный персонал</li><li>Лучшие цены на рынке</li></ul>')),
             ]
             
             home_page.save()
@@ -226,8 +269,8 @@ class Command(BaseCommand):
             
             contact_page.body = [
                 ('heading', 'Свяжитесь с нами'),
-                ('paragraph', '<p>Мы всегда рады ответить на ваши вопросы и помочь с бронированием.</p>'),
-                ('paragraph', '<p>Работаем круглосуточно, 7 дней в неделю.</p>'),
+                ('paragraph', RichText('<p>Мы всегда рады ответить на ваши вопросы и помочь с бронированием.</p>')),
+                ('paragraph', RichText('<p>Работаем круглосуточно, 7 дней в неделю.</p>')),
             ]
             
             contact_page.save()
@@ -238,10 +281,200 @@ class Command(BaseCommand):
         # Инициализируем страницы Wagtail
         self.stdout.write('\nИнициализация страниц Wagtail...')
         from django.core.management import call_command
-        call_command('init_wagtail_pages')
+        call_command('init_wagtail_pages', stdout=self.stdout)
         
         self.stdout.write(self.style.SUCCESS('\n✅ Все данные успешно загружены!'))
         self.stdout.write(self.style.SUCCESS('\n📝 Данные для входа:'))
         self.stdout.write(self.style.SUCCESS('   Логин: admin'))
         self.stdout.write(self.style.SUCCESS('   Пароль: admin123'))
 
+    def load_scaled(self, options):
+        """Массовая генерация данных для нагрузочного тестирования"""
+        batch_size = options['batch_size']
+        total_started = time.perf_counter()
+
+        started = time.perf_counter()
+        hotel_ids = array('q')
+        for offset in range(0, options['hotels'], batch_size):
+            count = min(batch_size, options['hotels'] - offset)
+            hotels = Hotel.objects.bulk_create([self.fake_hotel(offset + i) for i in range(count)])
+            hotel_ids.extend(hotel.id for hotel in hotels)
+        self.report_rate('Гостиниц', len(hotel_ids), started)
+
+        started = time.perf_counter()
+        room_ids = array('q')
+        batch = []
+        for hotel_id in hotel_ids:
+            for i in range(options['rooms_per_hotel']):
+                name, area, price, description = ROOM_TYPES[i % len(ROOM_TYPES)]
+                batch.append(Room(
+                    hotel_id=hotel_id,
+                    name=f'{name} {i // len(ROOM_TYPES) + 1}',
+                    description=description,
+                    area=area,
+                    price_per_night=price + random.randint(-5, 10) * 100,
+                ))
+            if len(batch) >= batch_size:
+                room_ids.extend(room.id for room in Room.objects.bulk_create(batch))
+                batch = []
+        if batch:
+            room_ids.extend(room.id for room in Room.objects.bulk_create(batch))
+        self.report_rate('Номеров', len(room_ids), started)
+
+        if options['bookings'] and room_ids:
+            started = time.perf_counter()
+            created = self.create_fake_bookings(room_ids, options['bookings'], batch_size)
+            self.report_rate('Бронирований', created, started)
+
+        if not options['no_pages']:
+            started = time.perf_counter()
+            created = self.bulk_create_hotel_pages(hotel_ids, batch_size)
+            self.report_rate('Страниц Wagtail', created, started)
+
+        # Массовые вставки идут в обход сигналов
+        started = time.perf_counter()
+        occupancy.rebuild_all()
+        caching.invalidate_all()
+        self.report_rate('Карт занятости', len(room_ids), started)
+
+        started = time.perf_counter()
+        pricing.rebuild_all()
+        self.report_rate('Тарифных календарей', len(room_ids), started)
+
+        started = time.perf_counter()
+        self.report_rate('Поисковых записей гостиниц', search.refresh(), started)
+
+        elapsed = time.perf_counter() - total_started
+        self.stdout.write(self.style.SUCCESS(f'\n✅ Массовая загрузка завершена за {elapsed:.1f} с'))
+
+    def report_rate(self, label, count, started):
+        elapsed = time.perf_counter() - started
+        rate = count / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(f'{label}: {count} за {elapsed:.1f} с ({rate:,.0f} строк/с)'))
+
+    def fake_hotel(self, index):
+        city = random.choice(CITIES)
+        name = f'{random.choice(HOTEL_WORDS)} {random.choice(HOTEL_WORDS)} {index + 1}'
+        return Hotel(
+            name=name,
+            description=f'Гостиница «{name}» в городе {city}. Ресторан, спа-центр и бесплатный Wi-Fi.',
+            address=f'{city}, {random.choice(STREETS)}, д. {random.randint(1, 200)}',
+        )
+
+    def fake_bookings(self, room_ids, total):
+        """Непересекающиеся бронирования: для каждого номера проживания идут подряд"""
+        per_room, extra = divmod(total, len(room_ids))
+        horizon_start = date.today() - timedelta(days=180)
+        now = timezone.now()
+        n = 0
+        for index, room_id in enumerate(room_ids):
+            day = horizon_start + timedelta(days=random.randint(0, 14))
+            for _ in range(per_room + (1 if index < extra else 0)):
+                nights = random.choices((1, 2, 3, 4, 5, 7, 10), weights=(20, 25, 20, 12, 10, 8, 5))[0]
+                n += 1
+                yield (
+                    room_id,
+                    f'Гость {n}',
+                    f'guest{n}@example.com',
+                    f'+7 9{random.randint(10, 99)} {random.randint(100, 999)}-{random.randint(10, 99)}-{random.randint(10, 99)}',
+                    day,
+                    day + timedelta(days=nights),
+                    random.choices(('confirmed', 'pending', 'cancelled'), weights=(70, 15, 15))[0],
+                    now,
+                    now,
+                )
+                day += timedelta(days=nights + random.choices((0, 1, 2, 5, 10), weights=(30, 25, 20, 15, 10))[0])
+
+    def create_fake_bookings(self, room_ids, total, batch_size):
+        rows = self.fake_bookings(room_ids, total)
+        created = 0
+        while True:
+            batch = [row for _, row in zip(range(batch_size), rows)]
+            if not batch:
+                break
+            if connection.vendor == 'postgresql':
+                self.copy_bookings(batch)
+            else:
+                Booking.objects.bulk_create([Booking(**dict(zip(BOOKING_COLUMNS, row))) for row in batch])
+            created += len(batch)
+        return created
+
+    def copy_bookings(self, rows):
+        """Загрузка пачки через COPY — в разы быстрее INSERT на PostgreSQL"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow(row)
+        buffer.seek(0)
+        with connection.cursor() as cursor:
+            cursor.cursor.copy_expert(
+                f'COPY {Booking._meta.db_table} ({", ".join(BOOKING_COLUMNS)}) FROM STDIN WITH (FORMAT csv)',
+                buffer,
+            )
+
+    @transaction.atomic
+    def bulk_create_hotel_pages(self, hotel_ids, batch_size):
+        """Страницы гостиниц пачками: пути дерева вычисляются заранее,
+        поэтому не нужен add_child() с отдельными запросами на каждую страницу"""
+        root = Page.get_first_root_node()
+        if not root:
+            self.stdout.write(self.style.WARNING('Корневая страница не найдена, страницы не созданы'))
+            return 0
+        parent = HomePage.objects.filter(slug='home').first() or root
+        parent = Page.objects.select_for_update().get(pk=parent.pk)
+
+        last_child = parent.get_last_child()
+        next_step = Page._str2int(last_child.path[-Page.steplen:]) + 1 if last_child else 1
+        content_type = ContentType.objects.get_for_model(HotelPage)
+        locale = Locale.get_default()
+        now = timezone.now()
+        table = HotelPage._meta.db_table
+        created = 0
+
+        for offset in range(0, len(hotel_ids), batch_size):
+            chunk = hotel_ids[offset:offset + batch_size]
+            hotels = Hotel.objects.in_bulk(list(chunk))
+            pages = []
+            for i, hotel_id in enumerate(chunk):
+                hotel = hotels[hotel_id]
+                slug = f'{create_slug(hotel.name)}-{hotel.id}'
+                pages.append(Page(
+                    title=hotel.name,
+                    draft_title=hotel.name,
+                    slug=slug,
+                    url_path=f'{parent.url_path}{slug}/',
+                    path=Page._get_path(parent.path, parent.depth + 1, next_step + offset + i),
+                    depth=parent.depth + 1,
+                    numchild=0,
+                    content_type=content_type,
+                    locale=locale,
+                    translation_key=uuid.uuid4(),
+                    live=True,
+                    has_unpublished_changes=False,
+                    first_published_at=now,
+                    last_published_at=now,
+                ))
+            pages = Page.objects.bulk_create(pages)
+            # Строки дочерней таблицы многотабличного наследования: bulk_create
+            # для HotelPage Django не поддерживает
+            with connection.cursor() as cursor:
+                cursor.executemany(
+                    f'INSERT INTO {table} (page_ptr_id, hotel_id, body) VALUES (%s, %s, %s)',
+                    [(page.pk, hotel_id, '[]') for page, hotel_id in zip(pages, chunk)],
+                )
+            created += len(pages)
+
+        Page.objects.filter(pk=parent.pk).update(numchild=parent.numchild + created)
+
+        # Пути и numchild заданы вручную, мимо treebeard: дерево проверяется
+        # до фиксации, и при ошибке вся вставка откатывается
+        problems = dict(zip(
+            ('недопустимые символы пути', 'длина пути', 'без родителя', 'глубина', 'numchild'),
+            Page.find_problems(),
+        ))
+        problems = {name: ids for name, ids in problems.items() if ids}
+        if problems:
+            raise CommandError('Дерево страниц повреждено, страницы не созданы: ' + '; '.join(
+                f'{name} — {len(ids)} (id {", ".join(map(str, ids[:10]))})' for name, ids in problems.items()
+            ))
+        return created
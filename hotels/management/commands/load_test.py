@@ -0,0 +1,190 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from datetime import date, timedelta
+from urllib.parse import urlsplit
+import asyncio
+import json
+import ssl
+import statistics
+import time
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[q - 1]
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест запущенного сервера: быстрые клиенты меряют пропускную '
+        'способность, пока медленные клиенты держат соединения. Запустите его против '
+        'SERVER_MODE=wsgi и SERVER_MODE=asgi (gunicorn.conf.py) и сравните через --compare'
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Адрес сервера')
+        parser.add_argument('--paths', help='Пути через запятую (по умолчанию — списки гостиниц и номеров)')
+        parser.add_argument('--concurrency', type=int, default=32, help='Быстрых клиентов')
+        parser.add_argument('--slow-clients', type=int, default=64, help='Медленных клиентов')
+        parser.add_argument('--slow-delay', type=float, default=0.5,
+                            help='Пауза медленного клиента между порциями запроса и ответа, с')
+        parser.add_argument('--duration', type=float, default=20, help='Длительность, с')
+        parser.add_argument('--timeout', type=float, default=30, help='Таймаут одного запроса, с')
+        parser.add_argument('--label', default='', help='Метка прогона, например wsgi или asgi')
+        parser.add_argument('--output', help='Сохранить результат в JSON')
+        parser.add_argument('--compare', help='JSON предыдущего прогона для сравнения')
+
+    def handle(self, *args, **options):
+        target = urlsplit(options['url'])
+        if target.scheme not in ('http', 'https') or not target.hostname:
+            raise CommandError('--url должен быть вида http://host:port')
+        self.host = target.hostname
+        self.port = target.port or (443 if target.scheme == 'https' else 80)
+        self.ssl = ssl.create_default_context() if target.scheme == 'https' else None
+        self.options = options
+
+        if options['paths']:
+            paths = [path for path in options['paths'].split(',') if path]
+        else:
+            check_in = date.today() + timedelta(days=30)
+            dates = f'check_in={check_in}&check_out={check_in + timedelta(days=3)}'
+            paths = ['/hotels/', f'/hotels/?{dates}', '/hotels/hotel/1/', f'/hotels/hotel/1/?{dates}']
+
+        self.stdout.write(
+            f'{options["url"]}: {options["concurrency"]} быстрых и {options["slow_clients"]} '
+            f'медленных клиентов, {options["duration"]:.0f} с'
+        )
+        result = asyncio.run(self.run(paths))
+        result['label'] = options['label']
+        result['created_at'] = timezone.now().isoformat()
+        result['options'] = {
+            key: options[key]
+            for key in ('url', 'concurrency', 'slow_clients', 'slow_delay', 'duration')
+        }
+        result['paths'] = paths
+        self.report(result)
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(result, f, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'Результат сохранен в {options["output"]}'))
+        if options['compare']:
+            self.compare(options['compare'], result)
+
+    async def run(self, paths):
+        deadline = time.perf_counter() + self.options['duration']
+        fast = {'latencies': [], 'statuses': {}, 'errors': 0}
+        slow = {'completed': 0, 'errors': 0}
+
+        async def fast_client(i):
+            n = i
+            while time.perf_counter() < deadline:
+                path = paths[n % len(paths)]
+                n += 1
+                started = time.perf_counter()
+                try:
+                    status = await asyncio.wait_for(self.request(path), self.options['timeout'])
+                except (OSError, asyncio.TimeoutError, ValueError):
+                    fast['errors'] += 1
+                    continue
+                fast['latencies'].append((time.perf_counter() - started) * 1000)
+                fast['statuses'][status] = fast['statuses'].get(status, 0) + 1
+
+        async def slow_client(i):
+            n = i
+            while time.perf_counter() < deadline:
+                path = paths[n % len(paths)]
+                n += 1
+                try:
+                    await self.request(path, delay=self.options['slow_delay'])
+                except (OSError, ValueError):
+                    slow['errors'] += 1
+                    continue
+                slow['completed'] += 1
+
+        started = time.perf_counter()
+        tasks = [asyncio.create_task(slow_client(i)) for i in range(self.options['slow_clients'])]
+        # Медленные клиенты занимают соединения раньше, чем приходят быстрые
+        await asyncio.sleep(min(1.0, self.options['duration'] / 10))
+        tasks += [asyncio.create_task(fast_client(i)) for i in range(self.options['concurrency'])]
+        await asyncio.wait(tasks, timeout=self.options['duration'] + self.options['timeout'])
+        for task in tasks:
+            task.cancel()
+        elapsed = time.perf_counter() - started
+
+        latencies = fast['latencies']
+        return {
+            'requests': len(latencies),
+            'requests_per_second': round(len(latencies) / elapsed, 2),
+            'errors': fast['errors'],
+            'statuses': {str(code): count for code, count in sorted(fast['statuses'].items())},
+            'p50_ms': round(percentile(latencies, 50), 2) if latencies else None,
+            'p95_ms': round(percentile(latencies, 95), 2) if latencies else None,
+            'p99_ms': round(percentile(latencies, 99), 2) if latencies else None,
+            'slow_completed': slow['completed'],
+            'slow_errors': slow['errors'],
+        }
+
+    async def request(self, path, delay=0):
+        """Один GET-запрос; медленный клиент отправляет и читает его порциями с паузами"""
+        reader, writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+        try:
+            lines = [
+                f'GET {path} HTTP/1.1',
+                f'Host: {self.host}:{self.port}',
+                'User-Agent: hotels-load-test',
+                'Accept: text/html',
+                'Connection: close',
+                '',
+                '',
+            ]
+            if delay:
+                for line in lines[:-1]:
+                    writer.write(f'{line}\r\n'.encode())
+                    await writer.drain()
+                    await asyncio.sleep(delay)
+            else:
+                writer.write('\r\n'.join(lines).encode())
+                await writer.drain()
+
+            status_line = await reader.readline()
+            parts = status_line.split()
+            if len(parts) < 2:
+                raise ValueError('Пустой ответ сервера')
+            while True:
+                chunk = await reader.read(4096 if delay else 65536)
+                if not chunk:
+                    break
+                if delay:
+                    await asyncio.sleep(delay)
+            return int(parts[1])
+        finally:
+            writer.close()
+
+    def report(self, result):
+        self.stdout.write(
+            f'Быстрые клиенты: {result["requests"]} запросов, {result["requests_per_second"]} запр/с, '
+            f'p50={result["p50_ms"]} мс p95={result["p95_ms"]} мс p99={result["p99_ms"]} мс, '
+            f'ошибок {result["errors"]}, статусы {result["statuses"]}'
+        )
+        self.stdout.write(
+            f'Медленные клиенты: завершено {result["slow_completed"]}, ошибок {result["slow_errors"]}'
+        )
+
+    def compare(self, path, result):
+        with open(path, encoding='utf-8') as f:
+            previous = json.load(f)
+        old_rps = previous['requests_per_second']
+        ratio = result['requests_per_second'] / old_rps if old_rps else 0
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'\n{previous.get("label") or path} → {result["label"] or "текущий прогон"}'
+        ))
+        self.stdout.write(
+            f'запр/с {old_rps} → {result["requests_per_second"]} (x{ratio:.2f}), '
+            f'p95 {previous["p95_ms"]} → {result["p95_ms"]} мс, '
+            f'ошибок {previous["errors"]} → {result["errors"]}'
+        )
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from hotels import occupancy
+import time
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает битовые карты занятости номеров и удаляет прошедшие блоки (запускать ежедневно)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Номеров в одной пачке')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        total = occupancy.rebuild_all(batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано карт занятости: {total} за {elapsed:.1f} с (блоки по {occupancy.BLOCK_NIGHTS} ночей)'
+        ))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from hotels import caching, pricing
+import time
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает тарифные календари номеров (запускать ежедневно для сдвига горизонта)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Номеров в одной пачке')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        total = pricing.rebuild_all(batch_size=options['batch_size'])
+        caching.invalidate_all()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано тарифных календарей: {total} за {elapsed:.1f} с (горизонт {pricing.HORIZON_DAYS} дней)'
+        ))
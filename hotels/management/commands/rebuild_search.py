@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from hotels import caching, search
+import time
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает город и поисковый текст гостиниц (после массовых загрузок в обход сигналов)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=search.BATCH_SIZE, help='Гостиниц в одной пачке')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        total = search.refresh(batch_size=options['batch_size'])
+        caching.invalidate_all()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Обновлено поисковых записей: {total} за {elapsed:.1f} с'))
@@ -0,0 +1,164 @@
+from django.core.management.base import BaseCommand, CommandError
+from hotels.models import Hotel, Room
+from hotels import availability
+from datetime import date, timedelta
+from itertools import islice
+from pathlib import Path
+import csv
+import re
+import time
+
+import numpy as np
+
+
+def room_type(name):
+    """Тип номера — название без порядкового номера ('Люкс 2' -> 'Люкс')"""
+    return re.sub(r'\s*\d+$', '', name).strip() or name
+
+
+class Command(BaseCommand):
+    help = 'Считает загрузку, ADR и RevPAR по гостиницам, типам номеров и дням'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=date.fromisoformat, help='Первая ночь периода (YYYY-MM-DD), по умолчанию 30 дней назад')
+        parser.add_argument('--end', type=date.fromisoformat, help='Ночь после конца периода (YYYY-MM-DD), по умолчанию сегодня')
+        parser.add_argument('--output', default='reports', help='Каталог для результатов')
+        parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+        parser.add_argument('--chunk-size', type=int, default=200_000, help='Бронирований в одной пачке')
+
+    def handle(self, *args, **options):
+        end = options['end'] or date.today()
+        start = options['start'] or end - timedelta(days=30)
+        days = (end - start).days
+        if days <= 0:
+            raise CommandError('Дата окончания должна быть позже даты начала.')
+        if options['format'] == 'parquet':
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise CommandError('Для формата parquet установите pyarrow.')
+
+        started = time.perf_counter()
+
+        # Справочники номеров: id -> индекс гостиницы, типа и цена
+        rooms = list(Room.objects.order_by('id').values_list('id', 'hotel_id', 'name', 'price_per_night'))
+        if not rooms:
+            raise CommandError('Нет номеров для отчета.')
+        room_ids = np.fromiter((r[0] for r in rooms), dtype=np.int64, count=len(rooms))
+        hotel_ids, room_hotel = np.unique(np.fromiter((r[1] for r in rooms), dtype=np.int64, count=len(rooms)), return_inverse=True)
+        type_names, room_kind = np.unique(np.array([room_type(r[2]) for r in rooms], dtype=object).astype(str), return_inverse=True)
+        room_price = np.fromiter((float(r[3]) for r in rooms), dtype=np.float64, count=len(rooms))
+
+        hotel_sold = np.zeros(len(hotel_ids) * days, dtype=np.int64)
+        hotel_revenue = np.zeros(len(hotel_ids) * days, dtype=np.float64)
+        type_sold = np.zeros(len(type_names) * days, dtype=np.int64)
+        type_revenue = np.zeros(len(type_names) * days, dtype=np.float64)
+
+        origin = np.datetime64(start, 'D')
+        stays = (
+            availability.overlapping_bookings(start, end)
+            .order_by()
+            .values_list('room_id', 'check_in', 'check_out')
+            .iterator(chunk_size=options['chunk_size'])
+        )
+        total = 0
+        while True:
+            chunk = list(islice(stays, options['chunk_size']))
+            if not chunk:
+                break
+            total += len(chunk)
+
+            room_idx = np.searchsorted(room_ids, np.fromiter((c[0] for c in chunk), dtype=np.int64, count=len(chunk)))
+            first = (np.array([c[1] for c in chunk], dtype='datetime64[D]') - origin).astype(np.int64)
+            last = (np.array([c[2] for c in chunk], dtype='datetime64[D]') - origin).astype(np.int64)
+            first = np.clip(first, 0, days)
+            last = np.clip(last, 0, days)
+            nights = np.maximum(last - first, 0)
+
+            # Разворачиваем проживания в отдельные ночи без цикла Python
+            night_room = np.repeat(room_idx, nights)
+            offsets = np.arange(nights.sum()) - np.repeat(np.cumsum(nights) - nights, nights)
+            night_day = np.repeat(first, nights) + offsets
+            night_price = room_price[night_room]
+
+            hotel_key = room_hotel[night_room] * days + night_day
+            type_key = room_kind[night_room] * days + night_day
+            hotel_sold += np.bincount(hotel_key, minlength=hotel_sold.size)
+            hotel_revenue += np.bincount(hotel_key, weights=night_price, minlength=hotel_revenue.size)
+            type_sold += np.bincount(type_key, minlength=type_sold.size)
+            type_revenue += np.bincount(type_key, weights=night_price, minlength=type_revenue.size)
+
+        hotel_rooms = np.bincount(room_hotel, minlength=len(hotel_ids))
+        type_rooms = np.bincount(room_kind, minlength=len(type_names))
+        hotel_names = dict(Hotel.objects.filter(id__in=hotel_ids.tolist()).values_list('id', 'name'))
+        dates = np.arange(days) + origin
+
+        output = Path(options['output'])
+        output.mkdir(parents=True, exist_ok=True)
+        hotel_labels = np.array([hotel_names.get(i, '') for i in hotel_ids.tolist()], dtype=object)
+
+        self.write(output / 'hotel_daily', options['format'], self.daily_table(
+            {'hotel_id': hotel_ids, 'hotel': hotel_labels}, hotel_rooms, hotel_sold, hotel_revenue, dates,
+        ))
+        self.write(output / 'room_type_daily', options['format'], self.daily_table(
+            {'room_type': type_names.astype(object)}, type_rooms, type_sold, type_revenue, dates,
+        ))
+        self.write(output / 'hotel_summary', options['format'], self.summary_table(
+            {'hotel_id': hotel_ids, 'hotel': hotel_labels},
+            hotel_rooms * days,
+            hotel_sold.reshape(-1, days).sum(axis=1),
+            hotel_revenue.reshape(-1, days).sum(axis=1),
+        ))
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано бронирований: {total} за {elapsed:.1f} с, отчеты в {output}/'
+        ))
+
+    def metrics(self, available, sold, revenue):
+        """Загрузка, ADR и RevPAR с нулями вместо деления на ноль"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            occupancy = np.where(available > 0, sold / available, 0.0)
+            adr = np.where(sold > 0, revenue / sold, 0.0)
+            revpar = np.where(available > 0, revenue / available, 0.0)
+        return occupancy, adr, revpar
+
+    def daily_table(self, keys, rooms, sold, revenue, dates):
+        days = len(dates)
+        available = np.repeat(rooms, days)
+        occupancy, adr, revpar = self.metrics(available, sold, revenue)
+        table = {name: np.repeat(values, days) for name, values in keys.items()}
+        table.update({
+            'date': np.tile(dates, len(rooms)).astype(str),
+            'rooms_available': available,
+            'rooms_sold': sold,
+            'revenue': revenue.round(2),
+            'occupancy': occupancy.round(4),
+            'adr': adr.round(2),
+            'revpar': revpar.round(2),
+        })
+        return table
+
+    def summary_table(self, keys, available, sold, revenue):
+        occupancy, adr, revpar = self.metrics(available, sold, revenue)
+        table = dict(keys)
+        table.update({
+            'room_nights_available': available,
+            'room_nights_sold': sold,
+            'revenue': revenue.round(2),
+            'occupancy': occupancy.round(4),
+            'adr': adr.round(2),
+            'revpar': revpar.round(2),
+        })
+        return table
+
+    def write(self, path, fmt, table):
+        if fmt == 'parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            pq.write_table(pa.table({name: column.tolist() for name, column in table.items()}), f'{path}.parquet')
+            return
+        with open(f'{path}.csv', 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(table.keys())
+            writer.writerows(zip(*(column.tolist() for column in table.values())))
@@ -0,0 +1,201 @@
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from hotels.models import Hotel, Room
+from pages.models import HomePage, HotelPage
+from datetime import date, timedelta
+from io import StringIO
+import json
+import platform
+import statistics
+import subprocess
+import time
+
+
+def percentile(values, q):
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[q - 1]
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Бенчмарк публичных сценариев (списки, бронирование, страницы Wagtail) '
+        'на нескольких объемах данных во временной тестовой базе; результат — JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10,100,1000', help='Количества гостиниц через запятую')
+        parser.add_argument('--rooms-per-hotel', type=int, default=20)
+        parser.add_argument('--bookings-per-room', type=int, default=20)
+        parser.add_argument('--iterations', type=int, default=30, help='Запросов на сценарий')
+        parser.add_argument('--warmup', type=int, default=3, help='Прогревочных запросов на сценарий')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--cold', action='store_true', help='Отключить кэш (DummyCache)')
+        parser.add_argument('--keepdb', action='store_true', help='Не удалять тестовую базу')
+        parser.add_argument('--output', default='benchmark.json', help='Файл с результатами')
+        parser.add_argument('--compare', help='JSON предыдущего прогона для сравнения')
+
+    def handle(self, *args, **options):
+        try:
+            sizes = sorted(int(size) for size in options['sizes'].split(','))
+        except ValueError:
+            raise CommandError('--sizes должен быть списком целых чисел, например 10,100,1000')
+
+        # Как и тест-раннер Django, работаем во временной базе test_*
+        runner = DiscoverRunner(verbosity=0, interactive=False, keepdb=options['keepdb'])
+        runner.setup_test_environment()
+        old_config = runner.setup_databases()
+        try:
+            if options['cold']:
+                with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}):
+                    results = self.run_sizes(sizes, options)
+            else:
+                results = self.run_sizes(sizes, options)
+        finally:
+            runner.teardown_databases(old_config)
+            runner.teardown_test_environment()
+
+        report = {
+            'meta': {
+                'commit': git_commit(),
+                'created_at': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'python': platform.python_version(),
+                'iterations': options['iterations'],
+                'rooms_per_hotel': options['rooms_per_hotel'],
+                'bookings_per_room': options['bookings_per_room'],
+                'cache': 'dummy' if options['cold'] else 'default',
+            },
+            'results': results,
+        }
+        with open(options['output'], 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'\nРезультаты сохранены в {options["output"]}'))
+
+        if options['compare']:
+            self.compare(options['compare'], results)
+
+    def run_sizes(self, sizes, options):
+        call_command('load_data', stdout=StringIO())
+        results = []
+        loaded = Hotel.objects.count()
+        for size in sizes:
+            if size > loaded:
+                call_command(
+                    'load_data',
+                    hotels=size - loaded,
+                    rooms_per_hotel=options['rooms_per_hotel'],
+                    bookings=(size - loaded) * options['rooms_per_hotel'] * options['bookings_per_room'],
+                    seed=options['seed'] + size,
+                    stdout=StringIO(),
+                )
+                loaded = Hotel.objects.count()
+            self.stdout.write(self.style.MIGRATE_HEADING(f'\nГостиниц: {loaded}'))
+            for name, method, url, data in self.scenarios():
+                row = self.measure(name, method, url, data, options)
+                row['hotels'] = loaded
+                results.append(row)
+        return results
+
+    def scenarios(self):
+        hotel = Hotel.objects.order_by('id').first()
+        room = Room.objects.filter(hotel=hotel).order_by('id').first()
+        check_in = date.today() + timedelta(days=30)
+        dates = {'check_in': check_in.isoformat(), 'check_out': (check_in + timedelta(days=3)).isoformat()}
+        # Далекие даты, чтобы POST-бронирования не конфликтовали между итерациями
+        post_counter = iter(range(10 ** 6))
+
+        def booking_data():
+            start = date.today() + timedelta(days=3000 + next(post_counter) * 3)
+            return {
+                'guest_name': 'Бенчмарк',
+                'guest_email': 'bench@example.com',
+                'guest_phone': '+7 999 000-00-00',
+                'check_in': start.isoformat(),
+                'check_out': (start + timedelta(days=2)).isoformat(),
+            }
+
+        scenarios = [
+            ('hotel_list', 'get', reverse('hotels:hotel_list'), None),
+            ('hotel_list_dates', 'get', reverse('hotels:hotel_list'), dates),
+            ('room_list', 'get', reverse('hotels:room_list', args=[hotel.id]), None),
+            ('room_list_dates', 'get', reverse('hotels:room_list', args=[hotel.id]), dates),
+            ('room_detail_get', 'get', reverse('hotels:room_detail', args=[room.id]), None),
+            ('room_detail_post', 'post', reverse('hotels:room_detail', args=[room.id]), booking_data),
+        ]
+        home = HomePage.objects.live().first()
+        if home:
+            scenarios.append(('home_page', 'get', home.url, None))
+        hotel_page = HotelPage.objects.live().order_by('id').first()
+        if hotel_page:
+            scenarios.append(('hotel_page', 'get', hotel_page.url, None))
+        return scenarios
+
+    def measure(self, name, method, url, data, options):
+        client = Client()
+        timings = []
+        queries = []
+        statuses = {}
+        for i in range(options['warmup'] + options['iterations']):
+            payload = data() if callable(data) else data
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = getattr(client, method)(url, payload)
+                elapsed = (time.perf_counter() - started) * 1000
+            if i < options['warmup']:
+                continue
+            timings.append(elapsed)
+            queries.append(len(captured))
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        row = {
+            'scenario': name,
+            'url': url,
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p90_ms': round(percentile(timings, 90), 3),
+            'p99_ms': round(percentile(timings, 99), 3),
+            'mean_ms': round(statistics.fmean(timings), 3),
+            'queries_median': statistics.median(queries),
+            'queries_max': max(queries),
+            'statuses': {str(code): count for code, count in statuses.items()},
+        }
+        self.stdout.write(
+            f'{name:<20} p50={row["p50_ms"]:>8.2f} мс  p90={row["p90_ms"]:>8.2f} мс  '
+            f'p99={row["p99_ms"]:>8.2f} мс  запросов={row["queries_median"]}'
+        )
+        return row
+
+    def compare(self, path, results):
+        with open(path, encoding='utf-8') as f:
+            previous = json.load(f)
+        baseline = {(row['hotels'], row['scenario']): row for row in previous['results']}
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'\nСравнение с {path} (коммит {previous["meta"].get("commit")})'
+        ))
+        for row in results:
+            old = baseline.get((row['hotels'], row['scenario']))
+            if not old:
+                continue
+            ratio = row['p50_ms'] / old['p50_ms'] if old['p50_ms'] else 0
+            style = self.style.ERROR if ratio > 1.1 or row['queries_median'] > old['queries_median'] else self.style.SUCCESS
+            self.stdout.write(style(
+                f'{row["hotels"]:>6} {row["scenario"]:<20} p50 {old["p50_ms"]:.2f} → {row["p50_ms"]:.2f} мс '
+                f'(x{ratio:.2f}), запросов {old["queries_median"]} → {row["queries_median"]}'
+            ))
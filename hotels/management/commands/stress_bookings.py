@@ -0,0 +1,106 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from hotels.models import Hotel, Room, Booking
+from hotels import booking as booking_service
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+import random
+import threading
+import time
+
+
+class Command(BaseCommand):
+    help = 'Нагрузочный тест конкурентного бронирования: ищет потерянные и двойные брони'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16, help='Количество потоков')
+        parser.add_argument('--attempts', type=int, default=2000, help='Всего попыток бронирования')
+        parser.add_argument('--rooms', type=int, default=20, help='Количество номеров')
+        parser.add_argument('--days', type=int, default=60, help='Горизонт дат для заездов')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--keep', action='store_true', help='Не удалять тестовые данные')
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        hotel = Hotel.objects.create(
+            name='Нагрузочный тест',
+            description='Временная гостиница для stress_bookings',
+            address='Москва',
+        )
+        rooms = Room.objects.bulk_create([
+            Room(hotel=hotel, name=f'Номер {i + 1}', description='-', area=20, price_per_night=1000)
+            for i in range(options['rooms'])
+        ])
+        room_ids = [room.id for room in rooms]
+
+        start = date.today() + timedelta(days=1)
+        requests = []
+        for i in range(options['attempts']):
+            check_in = start + timedelta(days=random.randint(0, options['days']))
+            requests.append((i, random.choice(room_ids), check_in, check_in + timedelta(days=random.randint(1, 5))))
+
+        stats = {'created': [], 'rejected': 0, 'errors': 0}
+        stats_lock = threading.Lock()
+
+        def attempt(request):
+            i, room_id, check_in, check_out = request
+            booking = Booking(
+                room_id=room_id,
+                guest_name=f'Гость {i}',
+                guest_email=f'guest{i}@example.com',
+                guest_phone='+7 999 000-00-00',
+                check_in=check_in,
+                check_out=check_out,
+                status='confirmed',
+            )
+            try:
+                booking_service.create_booking(booking, retries=10)
+            except booking_service.RoomUnavailable:
+                with stats_lock:
+                    stats['rejected'] += 1
+            except Exception as e:
+                with stats_lock:
+                    stats['errors'] += 1
+                self.stderr.write(f'Ошибка: {e}')
+            else:
+                with stats_lock:
+                    stats['created'].append(booking.pk)
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+            list(pool.map(attempt, requests))
+        elapsed = time.perf_counter() - started
+
+        created_ids = set(stats['created'])
+        stored_ids = set(Booking.objects.filter(room__hotel=hotel).values_list('id', flat=True))
+        lost = len(created_ids - stored_ids)
+        duplicates = self.count_overlaps(hotel)
+
+        self.stdout.write(f'СУБД: {connection.vendor}, потоков: {options["threads"]}')
+        self.stdout.write(f'Попыток: {options["attempts"]} за {elapsed:.2f} с')
+        self.stdout.write(f'Создано: {len(created_ids)}, отклонено: {stats["rejected"]}, ошибок: {stats["errors"]}')
+        self.stdout.write(f'Бронирований в секунду: {len(created_ids) / elapsed:.1f}')
+        style = self.style.SUCCESS if not lost and not duplicates else self.style.ERROR
+        self.stdout.write(style(f'Потеряно: {lost}, двойных бронирований: {duplicates}'))
+
+        if not options['keep']:
+            hotel.delete()
+
+    def count_overlaps(self, hotel):
+        """Количество пар активных бронирований одного номера с пересечением дат"""
+        bookings = (
+            Booking.objects.filter(room__hotel=hotel, status__in=['pending', 'confirmed'])
+            .order_by('room_id', 'check_in')
+            .values_list('room_id', 'check_in', 'check_out')
+        )
+        overlaps = 0
+        last_room_id, last_check_out = None, None
+        for room_id, check_in, check_out in bookings:
+            if room_id == last_room_id and check_in < last_check_out:
+                overlaps += 1
+                last_check_out = max(last_check_out, check_out)
+            else:
+                last_room_id, last_check_out = room_id, check_out
+        return overlaps
@@ -0,0 +1,33 @@
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand, CommandError
+from hotels import holds
+import time
+
+
+class Command(BaseCommand):
+    help = 'Удаляет просроченные удержания номеров порциями (однократно или в цикле)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=holds.BATCH_SIZE)
+        parser.add_argument('--interval', type=int, default=0,
+                            help='Повторять каждые столько секунд; 0 — один проход')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1 or options['interval'] < 0:
+            raise CommandError('--batch-size должен быть положительным, --interval — неотрицательным')
+        if isinstance(caches['default'], LocMemCache):
+            self.stderr.write(self.style.WARNING(
+                'Кэш в памяти процесса (CACHE_URL): веб-процессы не узнают об удаленных удержаниях '
+                'и будут показывать номера занятыми до истечения кэша. Укажите общий CACHE_URL.'
+            ))
+
+        while True:
+            started = time.perf_counter()
+            removed = sum(holds.sweep(batch_size=options['batch_size']))
+            if removed or not options['interval']:
+                elapsed = time.perf_counter() - started
+                self.stdout.write(f'Удалено просроченных удержаний: {removed} за {elapsed:.2f} с')
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,69 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:13
+
+from django.db import migrations, models
+
+
+# Исключающее ограничение: у одного номера не может быть двух активных
+# бронирований с пересекающимися датами. Доступно только в PostgreSQL,
+# на остальных СУБД миграция ограничивается составным индексом.
+EXCLUSION_CONSTRAINT_SQL = """
+    CREATE EXTENSION IF NOT EXISTS btree_gist;
+    ALTER TABLE hotels_booking
+        ADD CONSTRAINT booking_room_no_overlap
+        EXCLUDE USING gist (
+            room_id WITH =,
+            daterange(check_in, check_out, '[)') WITH &&
+        )
+        WHERE (status IN ('pending', 'confirmed'));
+"""
+
+DROP_EXCLUSION_CONSTRAINT_SQL = """
+    ALTER TABLE hotels_booking DROP CONSTRAINT IF EXISTS booking_room_no_overlap;
+"""
+
+OVERLAPS_SQL = """
+    SELECT COUNT(*)
+    FROM hotels_booking a
+    JOIN hotels_booking b
+        ON a.room_id = b.room_id
+        AND a.id < b.id
+        AND a.check_in < b.check_out
+        AND a.check_out > b.check_in
+    WHERE a.status IN ('pending', 'confirmed')
+        AND b.status IN ('pending', 'confirmed')
+"""
+
+
+def add_exclusion_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(OVERLAPS_SQL)
+        overlaps = cursor.fetchone()[0]
+    if overlaps:
+        raise RuntimeError(
+            f'Найдено пересекающихся бронирований: {overlaps}. '
+            'Отмените дубликаты (status=cancelled) и повторите миграцию.'
+        )
+    schema_editor.execute(EXCLUSION_CONSTRAINT_SQL)
+
+
+def drop_exclusion_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(DROP_EXCLUSION_CONSTRAINT_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotels', '0002_hotelimage'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['room', 'status', 'check_in', 'check_out'], name='booking_room_overlap_idx'),
+        ),
+        migrations.RunPython(add_exclusion_constraint, drop_exclusion_constraint),
+    ]
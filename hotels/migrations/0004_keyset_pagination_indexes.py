@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotels', '0003_booking_overlap_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='hotel',
+            index=models.Index(fields=['name', 'id'], name='hotel_name_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='room',
+            index=models.Index(fields=['hotel', 'name', 'id'], name='room_hotel_name_keyset_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:17
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotels', '0004_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomOccupancy',
+            fields=[
+                ('room', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='occupancy', serialize=False, to='hotels.room', verbose_name='Номер')),
+                ('start', models.DateField(verbose_name='Первая ночь')),
+                ('bits', models.BinaryField(verbose_name='Занятые ночи')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Занятость номера',
+                'verbose_name_plural': 'Занятость номеров',
+            },
+        ),
+    ]
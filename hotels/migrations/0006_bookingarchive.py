@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotels', '0005_roomoccupancy'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='id бронирования')),
+                ('guest_name', models.CharField(max_length=200, verbose_name='Имя гостя')),
+                ('guest_email', models.EmailField(max_length=254, verbose_name='Email гостя')),
+                ('guest_phone', models.CharField(max_length=20, verbose_name='Телефон гостя')),
+                ('check_in', models.DateField(verbose_name='Дата заезда')),
+                ('check_out', models.DateField(verbose_name='Дата выезда')),
+                ('status', models.CharField(choices=[('pending', 'Ожидает подтверждения'), ('confirmed', 'Подтверждено'), ('cancelled', 'Отменено')], max_length=20, verbose_name='Статус')),
+                ('created_at', models.DateTimeField(verbose_name='Создано')),
+                ('updated_at', models.DateTimeField(verbose_name='Изменено')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Перенесено в архив')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_bookings', to='hotels.room', verbose_name='Номер')),
+            ],
+            options={
+                'verbose_name': 'Архивное бронирование',
+                'verbose_name_plural': 'Архив бронирований',
+                'ordering': ['-check_out'],
+                'indexes': [models.Index(fields=['check_out'], name='booking_archive_checkout_idx')],
+            },
+        ),
+    ]
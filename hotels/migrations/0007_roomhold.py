@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotels', '0006_bookingarchive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=32, unique=True, verbose_name='Ключ удержания')),
+                ('check_in', models.DateField(verbose_name='Дата заезда')),
+                ('check_out', models.DateField(verbose_name='Дата выезда')),
+                ('expires_at', models.DateTimeField(verbose_name='Действует до')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='holds', to='hotels.room', verbose_name='Номер')),
+            ],
+            options={
+                'verbose_name': 'Удержание номера',
+                'verbose_name_plural': 'Удержания номеров',
+                'indexes': [models.Index(fields=['room', 'check_in', 'check_out'], name='room_hold_overlap_idx'), models.Index(fields=['expires_at'], name='room_hold_expires_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:47
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotels', '0007_roomhold'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomRateCalendar',
+            fields=[
+                ('room', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rate_calendar', serialize=False, to='hotels.room', verbose_name='Номер')),
+                ('start', models.DateField(verbose_name='Первая ночь')),
+                ('prices', models.BinaryField(verbose_name='Цены по ночам')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Тарифный календарь номера',
+                'verbose_name_plural': 'Тарифные календари номеров',
+            },
+        ),
+        migrations.AddField(
+            model_name='hotel',
+            name='weekend_uplift',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=5, validators=[django.core.validators.MinValueValidator(0)], verbose_name='Наценка за ночи пятницы и субботы, %'),
+        ),
+        migrations.CreateModel(
+            name='StayDiscount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('min_nights', models.PositiveIntegerField(validators=[django.core.validators.MinValueValidator(2)], verbose_name='От ночей')),
+                ('percent', models.DecimalField(decimal_places=2, max_digits=5, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(100)], verbose_name='Скидка, %')),
+                ('hotel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stay_discounts', to='hotels.hotel', verbose_name='Гостиница')),
+            ],
+            options={
+                'verbose_name': 'Скидка за длительность',
+                'verbose_name_plural': 'Скидки за длительность',
+                'ordering': ['hotel', 'min_nights'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RateSeason',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='Название')),
+                ('date_from', models.DateField(verbose_name='Первая ночь')),
+                ('date_to', models.DateField(verbose_name='Последняя ночь')),
+                ('multiplier', models.DecimalField(decimal_places=2, default=1, max_digits=5, validators=[django.core.validators.MinValueValidator(0)], verbose_name='Коэффициент к цене')),
+                ('hotel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rate_seasons', to='hotels.hotel', verbose_name='Гостиница')),
+            ],
+            options={
+                'verbose_name': 'Сезон',
+                'verbose_name_plural': 'Сезоны',
+                'ordering': ['hotel', 'date_from'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='staydiscount',
+            constraint=models.UniqueConstraint(fields=('hotel', 'min_nights'), name='stay_discount_unique_nights'),
+        ),
+    ]
@@ -0,0 +1,96 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:50
+
+import re
+
+from django.db import migrations, models
+
+# Копия логики hotels.search на момент миграции: миграции не должны меняться
+# вместе с кодом приложения
+SEARCH_CONFIG = 'russian'
+BATCH_SIZE = 1000
+
+_CITY_PREFIX = re.compile(r'^(г\.|г\s|город\s)\s*', re.IGNORECASE)
+_NOT_CITY = re.compile(
+    r'^(\d[\d\s]*$|россия$|рф$|ул\.|улица\s|пр\.|пр-т|проспект\s|пер\.|переулок\s|наб\.|набережная\s|'
+    r'ш\.|шоссе\s|б-р|бульвар\s|пл\.|площадь\s|д\.|дом\s|корп\.|стр\.|обл\.|.*\sобласть$|.*\sкрай$|.*\sрайон$)',
+    re.IGNORECASE,
+)
+
+
+def extract_city(address):
+    for part in (address or '').split(','):
+        part = _CITY_PREFIX.sub('', part.strip())
+        if part and not _NOT_CITY.match(part):
+            return part[:100]
+    return ''
+
+
+def city_key(city):
+    return _CITY_PREFIX.sub('', (city or '').strip()).casefold()
+
+
+def build_search_text(hotel, room_descriptions=()):
+    return ' '.join(
+        text for text in (hotel.name, hotel.city, hotel.address, hotel.description, *room_descriptions) if text
+    ).casefold()
+
+
+def fill_search_fields(apps, schema_editor):
+    Hotel = apps.get_model('hotels', 'Hotel')
+    Room = apps.get_model('hotels', 'Room')
+    descriptions = {}
+    for hotel_id, description in Room.objects.order_by('pk').values_list('hotel_id', 'description'):
+        descriptions.setdefault(hotel_id, []).append(description)
+    hotels = list(Hotel.objects.only('name', 'address', 'description'))
+    for hotel in hotels:
+        hotel.city = extract_city(hotel.address)
+        hotel.city_key = city_key(hotel.city)
+        hotel.search_text = build_search_text(hotel, descriptions.get(hotel.pk, ()))
+    Hotel.objects.bulk_update(hotels, ['city', 'city_key', 'search_text'], batch_size=BATCH_SIZE)
+
+
+# Полнотекстовый индекс доступен только в PostgreSQL; выражение совпадает
+# с hotels.search.search_vector(), чтобы планировщик сопоставил его с запросом
+def _search_index():
+    from django.contrib.postgres.indexes import GinIndex
+    from django.contrib.postgres.search import SearchVector
+    return GinIndex(SearchVector('search_text', config=SEARCH_CONFIG), name='hotel_search_idx')
+
+
+def add_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.add_index(apps.get_model('hotels', 'Hotel'), _search_index())
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.remove_index(apps.get_model('hotels', 'Hotel'), _search_index())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotels', '0008_rate_calendar'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hotel',
+            name='city',
+            field=models.CharField(blank=True, editable=False, max_length=100, verbose_name='Город'),
+        ),
+        migrations.AddField(
+            model_name='hotel',
+            name='city_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='hotel',
+            name='search_text',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.RunPython(fill_search_fields, migrations.RunPython.noop),
+        migrations.RunPython(add_search_index, drop_search_index),
+    ]
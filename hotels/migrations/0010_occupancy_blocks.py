@@ -0,0 +1,62 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:05
+
+from datetime import date, timedelta
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Копия раскладки hotels.occupancy на момент миграции
+EPOCH = date(2000, 1, 1)
+BLOCK_NIGHTS = 63
+
+
+def fill_blocks(apps, schema_editor):
+    Booking = apps.get_model('hotels', 'Booking')
+    RoomOccupancy = apps.get_model('hotels', 'RoomOccupancy')
+    current = (date.today() - EPOCH).days // BLOCK_NIGHTS
+    first_night = current * BLOCK_NIGHTS
+    bits = {}
+    stays = (
+        Booking.objects.filter(status__in=['pending', 'confirmed'], check_out__gt=EPOCH + timedelta(days=first_night))
+        .values_list('room_id', 'check_in', 'check_out')
+    )
+    for room_id, check_in, check_out in stays.iterator(chunk_size=5000):
+        for night in range(max((check_in - EPOCH).days, first_night), (check_out - EPOCH).days):
+            key = (room_id, night // BLOCK_NIGHTS)
+            bits[key] = bits.get(key, 0) | (1 << (night % BLOCK_NIGHTS))
+    RoomOccupancy.objects.bulk_create(
+        [RoomOccupancy(room_id=room_id, block=block, bits=value) for (room_id, block), value in bits.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotels', '0009_hotel_search'),
+    ]
+
+    operations = [
+        # Карты — производные данные: таблица пересоздается и заполняется заново
+        migrations.DeleteModel(
+            name='RoomOccupancy',
+        ),
+        migrations.CreateModel(
+            name='RoomOccupancy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('block', models.IntegerField(verbose_name='Блок ночей')),
+                ('bits', models.BigIntegerField(verbose_name='Занятые ночи')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occupancy', to='hotels.room', verbose_name='Номер')),
+            ],
+            options={
+                'verbose_name': 'Занятость номера',
+                'verbose_name_plural': 'Занятость номеров',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='roomoccupancy',
+            constraint=models.UniqueConstraint(fields=('room', 'block'), name='room_occupancy_block_uniq'),
+        ),
+        migrations.RunPython(fill_blocks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotels', '0010_occupancy_blocks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='roomhold',
+            name='client',
+            field=models.CharField(blank=True, default='', max_length=40, verbose_name='Клиент'),
+        ),
+        migrations.AddIndex(
+            model_name='roomhold',
+            index=models.Index(fields=['client', 'expires_at'], name='room_hold_client_idx'),
+        ),
+    ]
@@ -1,11 +1,19 @@
 from django.db import models
-from django.core.validators import MinValueValidator
+from django.core.validators import MaxValueValidator, MinValueValidator
 
 
 class Hotel(models.Model):
     name = models.CharField(max_length=200, verbose_name='Название')
     description = models.TextField(verbose_name='Описание')
     address = models.CharField(max_length=300, verbose_name='Адрес')
+    # Заполняются из адреса и описаний при сохранении (hotels.search)
+    city = models.CharField(max_length=100, blank=True, editable=False, verbose_name='Город')
+    city_key = models.CharField(max_length=100, blank=True, editable=False, db_index=True)
+    search_text = models.TextField(blank=True, editable=False)
+    weekend_uplift = models.DecimalField(
+        max_digits=5, decimal_places=2, default=0, validators=[MinValueValidator(0)],
+        verbose_name='Наценка за ночи пятницы и субботы, %'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -13,6 +21,10 @@ class Hotel(models.Model):
         verbose_name = 'Гостиница'
         verbose_name_plural = 'Гостиницы'
         ordering = ['name']
+        indexes = [
+            # Курсорная пагинация списка гостиниц (hotels.pagination)
+            models.Index(fields=['name', 'id'], name='hotel_name_keyset_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -49,11 +61,56 @@ class Room(models.Model):
         verbose_name = 'Номер'
         verbose_name_plural = 'Номера'
         ordering = ['hotel', 'name']
+        indexes = [
+            # Курсорная пагинация номеров гостиницы (hotels.pagination)
+            models.Index(fields=['hotel', 'name', 'id'], name='room_hotel_name_keyset_idx'),
+        ]
 
     def __str__(self):
         return f"{self.hotel.name} - {self.name}"
 
 
+class RateSeason(models.Model):
+    """Сезонный коэффициент к цене номеров гостиницы на даты с ``date_from`` по ``date_to`` включительно"""
+    hotel = models.ForeignKey(Hotel, on_delete=models.CASCADE, related_name='rate_seasons', verbose_name='Гостиница')
+    name = models.CharField(max_length=100, verbose_name='Название')
+    date_from = models.DateField(verbose_name='Первая ночь')
+    date_to = models.DateField(verbose_name='Последняя ночь')
+    multiplier = models.DecimalField(
+        max_digits=5, decimal_places=2, default=1, validators=[MinValueValidator(0)],
+        verbose_name='Коэффициент к цене'
+    )
+
+    class Meta:
+        verbose_name = 'Сезон'
+        verbose_name_plural = 'Сезоны'
+        ordering = ['hotel', 'date_from']
+
+    def __str__(self):
+        return f"{self.hotel.name} - {self.name} ({self.date_from} - {self.date_to})"
+
+
+class StayDiscount(models.Model):
+    """Скидка на проживание от ``min_nights`` ночей"""
+    hotel = models.ForeignKey(Hotel, on_delete=models.CASCADE, related_name='stay_discounts', verbose_name='Гостиница')
+    min_nights = models.PositiveIntegerField(validators=[MinValueValidator(2)], verbose_name='От ночей')
+    percent = models.DecimalField(
+        max_digits=5, decimal_places=2, validators=[MinValueValidator(0), MaxValueValidator(100)],
+        verbose_name='Скидка, %'
+    )
+
+    class Meta:
+        verbose_name = 'Скидка за длительность'
+        verbose_name_plural = 'Скидки за длительность'
+        ordering = ['hotel', 'min_nights']
+        constraints = [
+            models.UniqueConstraint(fields=['hotel', 'min_nights'], name='stay_discount_unique_nights'),
+        ]
+
+    def __str__(self):
+        return f"{self.hotel.name}: от {self.min_nights} ночей - {self.percent}%"
+
+
 class Booking(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Ожидает подтверждения'),
@@ -75,7 +132,119 @@ class Booking(models.Model):
         verbose_name = 'Бронирование'
         verbose_name_plural = 'Бронирования'
         ordering = ['-created_at']
+        indexes = [
+            # Покрывает предикат пересечения дат в hotels.availability
+            models.Index(
+                fields=['room', 'status', 'check_in', 'check_out'],
+                name='booking_room_overlap_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.room} - {self.guest_name} ({self.check_in} - {self.check_out})"
+
+
+class RoomHold(models.Model):
+    """Временное удержание номера на даты, пока гость заполняет форму.
+
+    До ``expires_at`` удержание считается занятостью во всех проверках
+    доступности, кроме проверок с тем же ``token``. Просроченные удержания
+    запросы просто не видят, а удаляет их команда ``sweep_holds``.
+    """
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='holds', verbose_name='Номер')
+    token = models.CharField(max_length=32, unique=True, verbose_name='Ключ удержания')
+    # Ключ сессии гостя: число его активных удержаний ограничено ROOM_HOLD_LIMIT
+    client = models.CharField(max_length=40, blank=True, default='', verbose_name='Клиент')
+    check_in = models.DateField(verbose_name='Дата заезда')
+    check_out = models.DateField(verbose_name='Дата выезда')
+    expires_at = models.DateTimeField(verbose_name='Действует до')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Удержание номера'
+        verbose_name_plural = 'Удержания номеров'
+        indexes = [
+            models.Index(fields=['room', 'check_in', 'check_out'], name='room_hold_overlap_idx'),
+            models.Index(fields=['expires_at'], name='room_hold_expires_idx'),
+            models.Index(fields=['client', 'expires_at'], name='room_hold_client_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.room} ({self.check_in} - {self.check_out}) до {self.expires_at:%H:%M}"
+
+
+class BookingArchive(models.Model):
+    """Прошедшие и давно отмененные бронирования.
+
+    Переносятся из ``Booking`` командой ``archive_bookings`` с сохранением id,
+    чтобы рабочая таблица, которую читает поиск по датам, не росла со временем.
+    """
+    id = models.BigIntegerField(primary_key=True, verbose_name='id бронирования')
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='archived_bookings', verbose_name='Номер')
+    guest_name = models.CharField(max_length=200, verbose_name='Имя гостя')
+    guest_email = models.EmailField(verbose_name='Email гостя')
+    guest_phone = models.CharField(max_length=20, verbose_name='Телефон гостя')
+    check_in = models.DateField(verbose_name='Дата заезда')
+    check_out = models.DateField(verbose_name='Дата выезда')
+    status = models.CharField(max_length=20, choices=Booking.STATUS_CHOICES, verbose_name='Статус')
+    created_at = models.DateTimeField(verbose_name='Создано')
+    updated_at = models.DateTimeField(verbose_name='Изменено')
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name='Перенесено в архив')
+
+    class Meta:
+        verbose_name = 'Архивное бронирование'
+        verbose_name_plural = 'Архив бронирований'
+        ordering = ['-check_out']
+        indexes = [
+            models.Index(fields=['check_out'], name='booking_archive_checkout_idx'),
+        ]
 
     def __str__(self):
         return f"{self.room} - {self.guest_name} ({self.check_in} - {self.check_out})"
 
+
+
+class RoomOccupancy(models.Model):
+    """Занятые ночи номера в одном блоке из ``hotels.occupancy.BLOCK_NIGHTS`` ночей.
+
+    Бит ``i`` поля ``bits`` соответствует ночи ``block * BLOCK_NIGHTS + i``
+    дней от ``hotels.occupancy.EPOCH``. Строки есть только у блоков с
+    занятыми ночами, начиная с текущего; проверка дат — ``bits & маска`` в
+    SQL. Карта обновляется в транзакции изменения брони и командой
+    ``rebuild_occupancy``.
+    """
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='occupancy', verbose_name='Номер')
+    block = models.IntegerField(verbose_name='Блок ночей')
+    bits = models.BigIntegerField(verbose_name='Занятые ночи')
+
+    class Meta:
+        verbose_name = 'Занятость номера'
+        verbose_name_plural = 'Занятость номеров'
+        constraints = [
+            # Индекс ограничения обслуживает проверку дат по номеру и блоку
+            models.UniqueConstraint(fields=['room', 'block'], name='room_occupancy_block_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.room}, блок {self.block}"
+
+
+class RoomRateCalendar(models.Model):
+    """Предрассчитанные цены номера по ночам.
+
+    ``prices`` — массив int32 в копейках, элемент ``i`` соответствует ночи
+    ``start + i`` дней на горизонте ``hotels.pricing.HORIZON_DAYS``. Учитывает
+    базовую цену, сезоны и наценку выходных; скидки за длительность
+    применяются при расчете стоимости.
+    """
+    room = models.OneToOneField(Room, on_delete=models.CASCADE, primary_key=True, related_name='rate_calendar', verbose_name='Номер')
+    start = models.DateField(verbose_name='Первая ночь')
+    prices = models.BinaryField(verbose_name='Цены по ночам')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Тарифный календарь номера'
+        verbose_name_plural = 'Тарифные календари номеров'
+
+    def __str__(self):
+        return f"{self.room} с {self.start}"
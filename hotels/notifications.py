@@ -0,0 +1,94 @@
+"""Уведомления о новых бронированиях.
+
+Письмо гостю и письмо администраторам гостиницы (``BOOKING_NOTIFICATION_EMAILS``).
+Отправка — медленная сетевая операция, поэтому в async-представлениях письма
+уходят параллельно и не занимают воркер на время ожидания SMTP, а синхронные
+представления передают их после фиксации транзакции в общий пул потоков
+(``schedule_booking_notifications``) и сразу отвечают гостю.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import logging
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.mail import send_mail
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+# Потоков отправки в процессе
+SEND_WORKERS = 2
+
+
+def booking_emails(booking):
+    """Список писем (тема, текст, получатели) о бронировании.
+
+    ``booking.room`` должен быть загружен вместе с ``hotel``.
+    """
+    room = booking.room
+    stay = f'{booking.check_in:%d.%m.%Y} — {booking.check_out:%d.%m.%Y}'
+    emails = [(
+        f'Заявка на бронирование: {room.hotel.name}',
+        f'Здравствуйте, {booking.guest_name}!\n\n'
+        f'Мы получили вашу заявку на номер «{room.name}» в гостинице '
+        f'«{room.hotel.name}» на даты {stay}. Мы свяжемся с вами для подтверждения.',
+        [booking.guest_email],
+    )]
+    staff = getattr(settings, 'BOOKING_NOTIFICATION_EMAILS', [])
+    if staff:
+        emails.append((
+            f'Новая бронь #{booking.pk}: {room.hotel.name}, {room.name}',
+            f'{booking.guest_name}, {booking.guest_email}, {booking.guest_phone}\n'
+            f'Номер: {room.name}\nДаты: {stay}',
+            list(staff),
+        ))
+    return emails
+
+
+def _send(subject, message, recipients):
+    try:
+        send_mail(subject, message, None, recipients)
+    except Exception:
+        # Недоставленное письмо не должно отменять уже сохраненную бронь
+        logger.exception('Не удалось отправить уведомление «%s»', subject)
+
+
+def send_booking_notifications(booking):
+    for subject, message, recipients in booking_emails(booking):
+        _send(subject, message, recipients)
+
+
+async def asend_booking_notifications(booking):
+    """Отправляет все письма одновременно в пуле потоков"""
+    send = sync_to_async(_send, thread_sensitive=False)
+    await asyncio.gather(*(
+        send(subject, message, recipients)
+        for subject, message, recipients in booking_emails(booking)
+    ))
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _shared_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=SEND_WORKERS, thread_name_prefix='booking-mail')
+        return _pool
+
+
+def schedule_booking_notifications(booking):
+    """Отправить письма в фоне после фиксации транзакции"""
+    # Письма собираются сразу: фоновому потоку не нужна база
+    emails = booking_emails(booking)
+
+    def submit():
+        pool = _shared_pool()
+        for subject, message, recipients in emails:
+            pool.submit(_send, subject, message, recipients)
+
+    transaction.on_commit(submit)
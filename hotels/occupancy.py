@@ -0,0 +1,176 @@
+"""Предрассчитанная занятость номеров по ночам.
+
+Занятые ночи каждого номера хранятся битовыми блоками по ``BLOCK_NIGHTS``
+ночей (``RoomOccupancy``, строка на номер и блок с занятыми ночами).
+Проверка диапазона дат — это ``bits & маска`` по одному-двум блокам номера,
+и выполняется она в SQL: ``free_rooms`` и ``hotels_with_free_rooms`` —
+обычные фильтры queryset, которые сочетаются с поиском и сортировкой в
+одном запросе, а по номеру читается не больше строк, чем блоков в
+диапазоне, сколько бы броней у него ни было.
+
+Карта номера пересчитывается в транзакции изменения брони под блокировкой
+строки номера (``update_room``), поэтому параллельные брони одного номера
+не перезапишут ее устаревшими данными. Блоки до текущего удаляются
+ежедневной командой ``rebuild_occupancy``; даты раньше начала текущего
+блока и временные удержания проверяются запросами ``hotels.availability``.
+"""
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Q
+
+from . import availability
+from .models import Room, RoomOccupancy
+
+EPOCH = date(2000, 1, 1)
+# 63 бита: маска любого блока помещается в положительный BIGINT
+BLOCK_NIGHTS = 63
+
+
+def block_of(day):
+    return (day - EPOCH).days // BLOCK_NIGHTS
+
+
+def block_start(block):
+    return EPOCH + timedelta(days=block * BLOCK_NIGHTS)
+
+
+def first_block():
+    """Первый хранимый блок — блок, в который попадает сегодняшняя ночь"""
+    return block_of(date.today())
+
+
+def block_masks(check_in, check_out):
+    """{блок: маска ночей [check_in, check_out) в нем}"""
+    first = (check_in - EPOCH).days
+    last = (check_out - EPOCH).days
+    masks = {}
+    for block in range(first // BLOCK_NIGHTS, (last - 1) // BLOCK_NIGHTS + 1):
+        offset = block * BLOCK_NIGHTS
+        low = max(first, offset) - offset
+        high = min(last, offset + BLOCK_NIGHTS) - offset
+        masks[block] = ((1 << (high - low)) - 1) << low
+    return masks
+
+
+def _bits_for(stays, blocks):
+    """{блок: биты} занятых ночей ``stays`` в блоках ``blocks``; пустые блоки опускаются"""
+    bits = {}
+    for check_in, check_out in stays:
+        if check_out <= check_in:
+            continue
+        for block, mask in block_masks(check_in, check_out).items():
+            if block in blocks:
+                bits[block] = bits.get(block, 0) | mask
+    return bits
+
+
+def _stays(room_ids, blocks):
+    """Активные брони номеров, задевающие блоки от меньшего до большего из ``blocks``"""
+    return (
+        availability.overlapping_bookings(block_start(min(blocks)), block_start(max(blocks) + 1))
+        .filter(room_id__in=room_ids)
+        .order_by()
+        .values_list('room_id', 'check_in', 'check_out')
+    )
+
+
+def _lock_rooms(room_ids):
+    """Блокирует строки номеров в порядке id, как ``hotels.booking``; возвращает найденные id"""
+    return list(
+        Room.objects.filter(pk__in=room_ids).order_by('pk')
+        .select_for_update().values_list('pk', flat=True)
+    )
+
+
+def update_room(room_id, *stays):
+    """Пересчитывает блоки номера, задетые периодами ``stays`` [(check_in, check_out), ...].
+
+    Вызывается из сигналов брони в ее транзакции: строка номера блокируется
+    так же, как при бронировании, и карта читает уже сохраненную бронь.
+    """
+    current = first_block()
+    blocks = set()
+    for check_in, check_out in stays:
+        if check_out > check_in:
+            blocks.update(block for block in block_masks(check_in, check_out) if block >= current)
+    if not blocks:
+        return
+    with transaction.atomic():
+        if not _lock_rooms([room_id]):
+            return
+        stays_by_room = {}
+        for _, check_in, check_out in _stays([room_id], blocks):
+            stays_by_room.setdefault(room_id, []).append((check_in, check_out))
+        bits = _bits_for(stays_by_room.get(room_id, ()), blocks)
+        RoomOccupancy.objects.filter(room_id=room_id, block__in=blocks - set(bits)).delete()
+        _save([RoomOccupancy(room_id=room_id, block=block, bits=value) for block, value in bits.items()])
+
+
+def rebuild_all(batch_size=1000, room_ids=None):
+    """Пересчитывает карты всех номеров (или ``room_ids``) пачками по ``batch_size``.
+
+    Каждая пачка пересчитывается в своей транзакции под блокировкой номеров.
+    Блоки до текущего удаляются. Возвращает количество обработанных номеров.
+    """
+    current = first_block()
+    rooms = Room.objects.order_by('pk')
+    if room_ids is not None:
+        rooms = rooms.filter(pk__in=list(room_ids))
+    room_ids = list(rooms.values_list('pk', flat=True))
+    total = 0
+    for i in range(0, len(room_ids), batch_size):
+        with transaction.atomic():
+            batch_ids = _lock_rooms(room_ids[i:i + batch_size])
+            stays = (
+                availability.overlapping_bookings(block_start(current), date.max)
+                .filter(room_id__in=batch_ids)
+                .order_by()
+                .values_list('room_id', 'check_in', 'check_out')
+            )
+            bits = {}
+            for room_id, check_in, check_out in stays:
+                for block, mask in block_masks(max(check_in, block_start(current)), check_out).items():
+                    bits[room_id, block] = bits.get((room_id, block), 0) | mask
+            RoomOccupancy.objects.filter(room_id__in=batch_ids).delete()
+            _save([RoomOccupancy(room_id=room_id, block=block, bits=value) for (room_id, block), value in bits.items()])
+            total += len(batch_ids)
+    if room_ids:
+        RoomOccupancy.objects.filter(block__lt=current).delete()
+    return total
+
+
+def _save(rows):
+    RoomOccupancy.objects.bulk_create(
+        rows,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['room', 'block'],
+        update_fields=['bits'],
+    )
+
+
+def _occupied(check_in, check_out):
+    """EXISTS: у номера есть занятая по карте ночь в [check_in, check_out)"""
+    busy = Q()
+    masked = {}
+    for i, (block, mask) in enumerate(block_masks(check_in, check_out).items()):
+        masked[f'masked_{i}'] = F('bits').bitand(mask)
+        busy |= Q(block=block) & ~Q(**{f'masked_{i}': 0})
+    return Exists(RoomOccupancy.objects.filter(room_id=OuterRef('pk')).alias(**masked).filter(busy))
+
+
+def free_rooms(check_in, check_out, rooms=None):
+    """Номера, свободные в указанные даты; как ``availability.free_rooms``, но по картам"""
+    if rooms is None:
+        rooms = Room.objects.all()
+    if check_out <= check_in or block_of(check_in) < first_block():
+        return availability.free_rooms(check_in, check_out, rooms)
+    # Удержания живут минуты и в карты не попадают; их таблица невелика
+    held = Exists(availability.active_holds(check_in, check_out).filter(room_id=OuterRef('pk')))
+    return rooms.filter(~_occupied(check_in, check_out), ~held)
+
+
+def hotels_with_free_rooms(check_in, check_out, hotels):
+    """Гостиницы из ``hotels``, где свободен хотя бы один номер (полусоединение EXISTS)"""
+    return hotels.filter(Exists(free_rooms(check_in, check_out).filter(hotel_id=OuterRef('pk'))))
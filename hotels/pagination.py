@@ -0,0 +1,188 @@
+"""Курсорная (keyset) пагинация.
+
+Вместо OFFSET следующая страница выбирается условием «после последней
+показанной строки» по ключам сортировки, поэтому стоимость запроса не растет
+с глубиной прокрутки. Курсор — base64 от JSON со значениями ключей.
+"""
+import base64
+import binascii
+import bisect
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 24
+MAX_PAGE_SIZE = 100
+
+
+class KeysetPage:
+    """Страница результатов с курсорами на соседние страницы"""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def encode_cursor(direction, values):
+    payload = json.dumps([direction, values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Возвращает (направление, значения ключей) или None для битого курсора"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        direction, values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError, TypeError):
+        return None
+    if direction not in ('next', 'prev') or not isinstance(values, list):
+        return None
+    return direction, values
+
+
+def page_size_from(value):
+    """Размер страницы из GET-параметра, ограниченный MAX_PAGE_SIZE"""
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def _after(keys, values, descending):
+    """Условие «строго после values» для лексикографического порядка keys"""
+    lookup = 'lt' if descending else 'gt'
+    condition = Q()
+    for i, key in enumerate(keys):
+        step = Q(**{key: value for key, value in zip(keys[:i], values[:i])})
+        step &= Q(**{f'{key}__{lookup}': values[i]})
+        condition |= step
+    return condition
+
+
+def _decode(cursor, keys, converters=None):
+    """Значения курсора, приведенные ``converters`` к типам ключей, и направление.
+
+    Битый или подделанный курсор (чужие типы значений) дает первую страницу.
+    """
+    decoded = decode_cursor(cursor) if cursor else None
+    if not decoded or len(decoded[1]) != len(keys) or None in decoded[1]:
+        return None, False
+    direction, values = decoded
+    if converters is not None:
+        try:
+            values = [convert(value) for convert, value in zip(converters, values)]
+        except (ValidationError, ValueError, TypeError, ArithmeticError):
+            return None, False
+    return values, direction == 'prev'
+
+
+def _field_converters(model, keys):
+    """Приведение значений курсора к полям модели с их проверками (диапазон id и т. п.)"""
+    converters = []
+    for key in keys:
+        try:
+            field = model._meta.get_field(key)
+        except FieldDoesNotExist:
+            converters.append(lambda value: value)
+            continue
+        # Для внешнего ключа — поле первичного ключа без запроса к связанной таблице
+        field = field.target_field if field.is_relation else field
+        converters.append(lambda value, field=field: _clean(field, value))
+    return converters
+
+
+def _clean(field, value):
+    value = field.clean(value, None)
+    # Не все СУБД задают полям диапазон (SQLite), а база не примет число длиннее 64 бит
+    if isinstance(value, int) and not -2 ** 63 <= value < 2 ** 63:
+        raise ValueError('Значение курсора вне диапазона')
+    return value
+
+
+def _page_queryset(queryset, keys, cursor, page_size):
+    keys = list(keys) + ['id']
+    values, backwards = _decode(cursor, keys, _field_converters(queryset.model, keys))
+
+    ordering = [f'-{key}' for key in keys] if backwards else keys
+    queryset = queryset.order_by(*ordering)
+    if values is not None:
+        queryset = queryset.filter(_after(keys, values, descending=backwards))
+    return queryset[:page_size + 1], keys, values, backwards
+
+
+def _build_page(items, keys, values, backwards, page_size):
+    has_more = len(items) > page_size
+    items = items[:page_size]
+    if backwards:
+        items.reverse()
+
+    if not items:
+        return KeysetPage(items)
+
+    def key_values(obj):
+        return [getattr(obj, key) for key in keys]
+
+    # При движении вперед «еще» означает следующую страницу, назад — предыдущую
+    has_next = has_more if not backwards else True
+    has_previous = values is not None if not backwards else has_more
+    return KeysetPage(
+        items,
+        next_cursor=encode_cursor('next', key_values(items[-1])) if has_next else None,
+        previous_cursor=encode_cursor('prev', key_values(items[0])) if has_previous else None,
+    )
+
+
+def keyset_paginate(queryset, keys, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """Одна страница ``queryset``, упорядоченного по ``keys`` и первичному ключу.
+
+    ``keys`` — имена полей модели (для внешних ключей — ``*_id``), совпадающие
+    с ``Meta.ordering``; ``id`` добавляется для однозначности порядка.
+    """
+    queryset, keys, values, backwards = _page_queryset(queryset, keys, cursor, page_size)
+    return _build_page(list(queryset), keys, values, backwards, page_size)
+
+
+async def akeyset_paginate(queryset, keys, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """Асинхронный вариант ``keyset_paginate`` для async-представлений"""
+    queryset, keys, values, backwards = _page_queryset(queryset, keys, cursor, page_size)
+    items = [obj async for obj in queryset]
+    return _build_page(items, keys, values, backwards, page_size)
+
+
+def keyset_paginate_list(items, keys, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """``keyset_paginate`` для списка, уже упорядоченного по ``keys`` и ``id``.
+
+    Нужен для результатов, порядок которых вычисляется вне базы, например
+    поиска для групп по итоговой стоимости.
+    """
+    keys = list(keys) + ['id']
+    # Значения курсора сравниваются с ключами элементов и должны быть их типов
+    converters = [type(getattr(items[0], key)) for key in keys] if items else None
+    values, backwards = _decode(cursor, keys, converters)
+    positions = [[getattr(item, key) for key in keys] for item in items]
+    if values is None:
+        page = items[:page_size + 1]
+    elif backwards:
+        end = bisect.bisect_left(positions, values)
+        page = items[max(end - page_size - 1, 0):end][::-1]
+    else:
+        start = bisect.bisect_right(positions, values)
+        page = items[start:start + page_size + 1]
+    return _build_page(list(page), keys, values, backwards, page_size)
@@ -0,0 +1,201 @@
+"""Расчет стоимости проживания по тарифному календарю.
+
+Цена ночи = базовая цена номера × коэффициент сезона (``RateSeason``) ×
+наценка выходных (``Hotel.weekend_uplift``) — заранее рассчитывается на
+горизонт ``HORIZON_DAYS`` и хранится в ``RoomRateCalendar`` массивом int32
+в копейках. Стоимость диапазона дат — разность префиксных сумм, поэтому
+``quote_ranges`` считает все номера и все диапазоны поиска одной матричной
+операцией numpy по календарям, прочитанным одним запросом. Скидка за
+длительность (``StayDiscount``) применяется к сумме.
+
+Номера без календаря (созданные массово) и даты за горизонтом считаются
+по правилам на лету. Календари пересчитываются сигналами при изменении
+цен, сезонов и скидок и командой ``rebuild_rates``.
+"""
+from collections import defaultdict, namedtuple
+from datetime import date
+from decimal import Decimal
+
+from django.db import transaction
+import numpy as np
+
+from .models import Hotel, RateSeason, Room, RoomRateCalendar, StayDiscount
+
+HORIZON_DAYS = 730
+PRICE_DTYPE = np.dtype('<i4')
+# Ночи с пятницы на субботу и с субботы на воскресенье
+WEEKEND_NIGHTS = (4, 5)
+
+Quote = namedtuple('Quote', ['nights', 'subtotal', 'discount', 'total'])
+
+
+def kopecks(value):
+    return int((Decimal(value) * 100).to_integral_value())
+
+
+def _rubles(value):
+    return Decimal(int(value)).scaleb(-2)
+
+
+def _rules(hotel_ids):
+    """{hotel_id: (наценка выходных, [(первая ночь, последняя ночь, коэффициент)])}"""
+    seasons = defaultdict(list)
+    rows = (
+        RateSeason.objects.filter(hotel_id__in=hotel_ids)
+        .order_by('date_from', 'id')
+        .values_list('hotel_id', 'date_from', 'date_to', 'multiplier')
+    )
+    for hotel_id, date_from, date_to, multiplier in rows:
+        seasons[hotel_id].append((date_from, date_to, float(multiplier)))
+    uplifts = Hotel.objects.filter(pk__in=hotel_ids).values_list('pk', 'weekend_uplift')
+    return {hotel_id: (float(uplift), seasons[hotel_id]) for hotel_id, uplift in uplifts}
+
+
+def nightly_prices(base_price, start, days, rules):
+    """Цены ночей [start, start + days) в копейках по правилам гостиницы"""
+    if days <= 0:
+        return np.zeros(0, dtype=np.int64)
+    weekend_uplift, seasons = rules
+    factors = np.ones(days)
+    # Пересекающиеся сезоны: действует начавшийся позже
+    for date_from, date_to, multiplier in seasons:
+        first = max((date_from - start).days, 0)
+        last = min((date_to - start).days + 1, days)
+        if first < last:
+            factors[first:last] = multiplier
+    if weekend_uplift:
+        weekdays = (np.arange(days) + start.weekday()) % 7
+        factors[np.isin(weekdays, WEEKEND_NIGHTS)] *= 1 + weekend_uplift / 100
+    return np.rint(kopecks(base_price) * factors).astype(np.int64)
+
+
+def rebuild_all(start=None, batch_size=1000, room_ids=None):
+    """Пересчитывает календари всех номеров (или ``room_ids``) пачками.
+
+    Возвращает количество обработанных номеров.
+    """
+    start = start or date.today()
+    rooms = Room.objects.order_by('pk')
+    if room_ids is not None:
+        rooms = rooms.filter(pk__in=list(room_ids))
+    rows = list(rooms.values_list('pk', 'hotel_id', 'price_per_night'))
+    limit = np.iinfo(PRICE_DTYPE).max
+    total = 0
+    for i in range(0, len(rows), batch_size):
+        batch = rows[i:i + batch_size]
+        rules = _rules({hotel_id for _, hotel_id, _ in batch})
+        calendars = []
+        oversized = []
+        for room_id, hotel_id, price in batch:
+            prices = nightly_prices(price, start, HORIZON_DAYS, rules[hotel_id])
+            if prices.max() > limit:
+                # Ночь дороже int32 не помещается в календарь — такие номера
+                # считаются по правилам на лету в int64
+                oversized.append(room_id)
+                continue
+            calendars.append(RoomRateCalendar(room_id=room_id, start=start, prices=prices.astype(PRICE_DTYPE).tobytes()))
+        RoomRateCalendar.objects.bulk_create(
+            calendars,
+            update_conflicts=True,
+            unique_fields=['room'],
+            update_fields=['start', 'prices', 'updated_at'],
+        )
+        if oversized:
+            RoomRateCalendar.objects.filter(room_id__in=oversized).delete()
+        total += len(batch)
+    return total
+
+
+def schedule_rebuild(room_ids=None, hotel_id=None):
+    """Пересчитать календари номеров или всей гостиницы после фиксации транзакции"""
+    def rebuild():
+        ids = room_ids
+        if hotel_id is not None:
+            ids = Room.objects.filter(hotel_id=hotel_id).values_list('pk', flat=True)
+        rebuild_all(room_ids=ids)
+
+    transaction.on_commit(rebuild)
+
+
+def _discounts(hotel_ids):
+    """{hotel_id: [(от ночей, скидка в сотых долях процента)]} по убыванию числа ночей"""
+    discounts = defaultdict(list)
+    rows = (
+        StayDiscount.objects.filter(hotel_id__in=hotel_ids)
+        .order_by('-min_nights')
+        .values_list('hotel_id', 'min_nights', 'percent')
+    )
+    for hotel_id, min_nights, percent in rows:
+        discounts[hotel_id].append((min_nights, kopecks(percent)))
+    return discounts
+
+
+def _quote(nights, subtotal, discounts):
+    percent = next((percent for min_nights, percent in discounts if nights >= min_nights), 0)
+    discount = (int(subtotal) * percent + 5000) // 10000
+    return Quote(nights, _rubles(subtotal), _rubles(discount), _rubles(subtotal - discount))
+
+
+def quote_ranges(room_ids, ranges):
+    """Стоимость проживания для каждого номера и каждого диапазона дат.
+
+    Возвращает список словарей {room_id: Quote} в порядке ``ranges``;
+    для диапазонов без ночей (выезд не позже заезда) словарь пуст.
+    Запросы — календари и скидки — не зависят ни от числа номеров, ни от
+    числа диапазонов.
+    """
+    room_ids = list(room_ids)
+    results = [{} for _ in ranges]
+    valid = [index for index, (check_in, check_out) in enumerate(ranges) if check_out > check_in]
+    if not room_ids or not valid:
+        return results
+
+    calendars = defaultdict(list)
+    hotels = {}
+    rows = RoomRateCalendar.objects.filter(room_id__in=room_ids).values_list('room_id', 'room__hotel_id', 'start', 'prices')
+    for room_id, hotel_id, start, prices in rows:
+        hotels[room_id] = hotel_id
+        if len(prices) == HORIZON_DAYS * PRICE_DTYPE.itemsize:
+            calendars[start].append((room_id, bytes(prices)))
+    missing = set(room_ids) - {room_id for group in calendars.values() for room_id, _ in group}
+    if missing:
+        for room_id, hotel_id in Room.objects.filter(pk__in=missing).values_list('pk', 'hotel_id'):
+            hotels[room_id] = hotel_id
+    discounts = _discounts(set(hotels.values()))
+
+    # Матрица номера × ночи на каждую дату начала календаря; обычно она одна
+    fallback = [set(missing) if index in valid else set() for index in range(len(ranges))]
+    for start, group in calendars.items():
+        prices = np.frombuffer(b''.join(blob for _, blob in group), dtype=PRICE_DTYPE).reshape(len(group), HORIZON_DAYS)
+        # Суммы — в int64: сумма за долгое дорогое проживание не помещается в int32
+        sums = np.zeros((len(group), HORIZON_DAYS + 1), dtype=np.int64)
+        np.cumsum(prices, axis=1, dtype=np.int64, out=sums[:, 1:])
+        for index in valid:
+            check_in, check_out = ranges[index]
+            first = (check_in - start).days
+            last = (check_out - start).days
+            if first < 0 or last > HORIZON_DAYS:
+                fallback[index].update(room_id for room_id, _ in group)
+                continue
+            subtotals = (sums[:, last] - sums[:, first]).tolist()
+            nights = last - first
+            for (room_id, _), subtotal in zip(group, subtotals):
+                results[index][room_id] = _quote(nights, subtotal, discounts[hotels[room_id]])
+
+    fallback_ids = set().union(*fallback)
+    if fallback_ids:
+        rooms = list(Room.objects.filter(pk__in=fallback_ids).values_list('pk', 'hotel_id', 'price_per_night'))
+        rules = _rules({hotel_id for _, hotel_id, _ in rooms})
+        for index in valid:
+            check_in, check_out = ranges[index]
+            nights = (check_out - check_in).days
+            for room_id, hotel_id, price in rooms:
+                if room_id in fallback[index]:
+                    subtotal = nightly_prices(price, check_in, nights, rules[hotel_id]).sum()
+                    results[index][room_id] = _quote(nights, subtotal, discounts[hotel_id])
+    return results
+
+
+def quote_rooms(room_ids, check_in, check_out):
+    """{room_id: Quote} для одного диапазона дат"""
+    return quote_ranges(room_ids, [(check_in, check_out)])[0]
@@ -0,0 +1,219 @@
+"""Уменьшенные копии фотографий номеров и галерей гостиниц.
+
+Для каждого исходного файла строятся копии шириной ``WIDTHS`` в форматах
+WebP и JPEG; копии не увеличиваются сверх размера оригинала. Имена
+копий детерминированы — зависят от имени исходника и ``SPEC_VERSION`` — поэтому
+повторная генерация ничего не делает, а шаблонам не нужна база, чтобы найти
+копию. Пережатие выполняется Pillow в пуле процессов: при загрузке (сигналы
+``hotels.signals``, без ожидания результата) и массово командой
+``build_renditions``.
+
+Копии хранятся рядом с медиафайлами в ``MEDIA_ROOT/renditions``. Список
+построенных копий файла кэшируется (``available``), чтобы показ фото не
+опрашивал хранилище о каждой копии; после построения он сбрасывается.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+WIDTHS = (320, 640, 1280, 1920)
+FORMATS = ('webp', 'jpeg')
+QUALITY = {'webp': 80, 'jpeg': 82}
+# Повышается при изменении размеров или качества — меняет все имена копий
+SPEC_VERSION = 1
+RENDITIONS_DIR = 'renditions'
+GENERATE_TIMEOUT = 60
+# Сколько хранится список копий: полный — сутки, неполный (копии еще строятся) — минуту
+MANIFEST_TIMEOUT = 60 * 60 * 24
+PENDING_TIMEOUT = 60
+
+
+def rendition_name(name, width, fmt):
+    """Имя копии ``name`` (имя файла в хранилище) заданной ширины и формата"""
+    digest = hashlib.md5(f'{name}:{SPEC_VERSION}'.encode()).hexdigest()[:10]
+    stem = os.path.splitext(os.path.basename(name))[0]
+    folder = os.path.dirname(name)
+    return f'{RENDITIONS_DIR}/{folder}/{stem}.{digest}.{width}.{"jpg" if fmt == "jpeg" else fmt}'
+
+
+def _specs(name):
+    return [(width, fmt, rendition_name(name, width, fmt)) for width in WIDTHS for fmt in FORMATS]
+
+
+def _manifest_key(name):
+    return f'renditions:{SPEC_VERSION}:{hashlib.md5(name.encode()).hexdigest()}'
+
+
+def available(name):
+    """{формат: [(ширина, url), ...]} для уже построенных копий"""
+    key = _manifest_key(name)
+    result = cache.get(key)
+    if result is None:
+        result = {}
+        found = 0
+        for width, fmt, path in _specs(name):
+            if default_storage.exists(path):
+                result.setdefault(fmt, []).append((width, default_storage.url(path)))
+                found += 1
+        complete = found == len(WIDTHS) * len(FORMATS)
+        cache.set(key, result, MANIFEST_TIMEOUT if complete else PENDING_TIMEOUT)
+    return result
+
+
+def _render(source, targets):
+    """Строит копии одного файла. Выполняется в дочернем процессе.
+
+    ``targets`` — список (ширина, формат, абсолютный путь). Возвращает число
+    записанных файлов.
+    """
+    from PIL import Image, ImageOps
+
+    targets = [target for target in targets if not os.path.exists(target[2])]
+    if not targets:
+        return 0
+    by_width = {}
+    for width, fmt, path in targets:
+        by_width.setdefault(width, []).append((fmt, path))
+
+    written = 0
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+        # От большей ширины к меньшей: каждая копия уменьшается из предыдущей
+        base = image
+        for width in sorted(by_width, reverse=True):
+            size = min(width, image.width)
+            if size < base.width:
+                height = max(1, round(image.height * size / image.width))
+                base = base.resize((size, height), Image.LANCZOS)
+            for fmt, path in by_width[width]:
+                written += _save(base, fmt, path)
+    return written
+
+
+def _save(image, fmt, path):
+    if os.path.exists(path):
+        return 0
+    if fmt == 'jpeg' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    options = {'quality': QUALITY[fmt]}
+    if fmt == 'jpeg':
+        options.update(optimize=True, progressive=True)
+    else:
+        options['method'] = 4
+    # Запись во временный файл и переименование: читатель не увидит недописанную копию
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    image.save(tmp_path, fmt.upper(), **options)
+    os.replace(tmp_path, path)
+    return 1
+
+
+def _missing_targets(name):
+    return [
+        (width, fmt, default_storage.path(path))
+        for width, fmt, path in _specs(name)
+        if not default_storage.exists(path)
+    ]
+
+
+def process_pool(workers):
+    """Пул процессов Pillow"""
+    # spawn: дочерним процессам не достаются потоки и соединения с базой веб-воркера
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _shared_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = process_pool(getattr(settings, 'RENDITION_WORKERS', 2))
+        return _pool
+
+
+def _discard_pool(executor):
+    """Упавший общий пул заменяется новым при следующей загрузке"""
+    global _pool
+    with _pool_lock:
+        if _pool is executor:
+            _pool = None
+
+
+def _outcome(name, future, executor, timeout=None):
+    """Число записанных файлов или исключение; ошибки пишутся в лог"""
+    try:
+        return future.result(timeout=timeout)
+    except BrokenProcessPool as e:
+        logger.exception('Пул процессов Pillow остановился при обработке %s', name)
+        _discard_pool(executor)
+        return e
+    except Exception as e:
+        logger.exception('Не удалось построить копии %s', name)
+        return e
+
+
+def generate(names, executor=None):
+    """Строит недостающие копии файлов ``names`` параллельно и ждет их.
+
+    Возвращает словарь {имя: число записанных файлов или исключение}.
+    """
+    executor = executor or _shared_pool()
+    futures = {}
+    for name in names:
+        if not default_storage.exists(name):
+            logger.warning('Исходный файл %s не найден', name)
+            continue
+        targets = _missing_targets(name)
+        if targets:
+            futures[name] = executor.submit(_render, default_storage.path(name), targets)
+    results = {name: _outcome(name, future, executor, GENERATE_TIMEOUT) for name, future in futures.items()}
+    cache.delete_many([_manifest_key(name) for name in results])
+    return results
+
+
+def _start(name, on_done):
+    """Отправляет файл в общий пул и сразу возвращается"""
+    executor = _shared_pool()
+    # Уже построенные копии пропускает _save: запрос не ждет проверок хранилища
+    targets = [(width, fmt, default_storage.path(path)) for width, fmt, path in _specs(name)]
+    try:
+        future = executor.submit(_render, default_storage.path(name), targets)
+    except BrokenProcessPool:
+        logger.exception('Пул процессов Pillow остановился, копии %s не построены', name)
+        _discard_pool(executor)
+        return
+
+    def finished(future):
+        _outcome(name, future, executor)
+        cache.delete(_manifest_key(name))
+        if on_done is not None:
+            on_done()
+
+    future.add_done_callback(finished)
+
+
+def schedule(fieldfile, on_done=None):
+    """Построить копии загруженного файла после фиксации транзакции.
+
+    Запрос не ждет построения; ``on_done`` вызывается, когда копии готовы,
+    например чтобы сбросить закэшированный HTML со ссылкой на исходный файл.
+    """
+    if fieldfile:
+        name = fieldfile.name
+        transaction.on_commit(lambda: _start(name, on_done))
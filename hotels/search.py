@@ -0,0 +1,110 @@
+"""Текстовый поиск гостиниц и поиск по городу.
+
+Название, город, адрес и описание гостиницы вместе с описаниями ее номеров
+сводятся в одно поле ``Hotel.search_text``. В PostgreSQL по нему построен
+GIN-индекс ``to_tsvector('russian', search_text)`` (миграция 0009), и запрос
+ищется полнотекстово с учетом словоформ; на остальных СУБД (SQLite в
+разработке и тестах) каждое слово ищется подстрокой. Фильтр поиска — обычное
+условие WHERE, поэтому список гостиниц с фильтром по датам
+(``occupancy.hotels_with_free_rooms``, EXISTS) строится одним запросом. В
+поиске групп рейтинг считается отдельно, и текст отбирает гостиницы из него
+одним дополнительным запросом.
+
+Город извлекается из адреса в ``Hotel.city``, а его нормализованная форма —
+в индексированное ``Hotel.city_key``: поиск по городу — точное сравнение
+без ``LIKE '%...'``. ``city_key`` и ``search_text`` приводятся к нижнему
+регистру средствами Python, потому что ``LIKE`` и ``UPPER`` в SQLite не
+знают кириллицы.
+"""
+import re
+
+from django.db import connection
+
+from .models import Hotel, Room
+
+SEARCH_CONFIG = 'russian'
+BATCH_SIZE = 1000
+
+_CITY_PREFIX = re.compile(r'^(г\.|г\s|город\s)\s*', re.IGNORECASE)
+_NOT_CITY = re.compile(
+    r'^(\d[\d\s]*$|россия$|рф$|ул\.|улица\s|пр\.|пр-т|проспект\s|пер\.|переулок\s|наб\.|набережная\s|'
+    r'ш\.|шоссе\s|б-р|бульвар\s|пл\.|площадь\s|д\.|дом\s|корп\.|стр\.|обл\.|.*\sобласть$|.*\sкрай$|.*\sрайон$)',
+    re.IGNORECASE,
+)
+
+
+def extract_city(address):
+    """Город из адреса вида «[индекс,] [Россия,] [г.] Город, улица, дом»"""
+    for part in (address or '').split(','):
+        part = _CITY_PREFIX.sub('', part.strip())
+        if part and not _NOT_CITY.match(part):
+            return part[:100]
+    return ''
+
+
+def city_key(city):
+    return _CITY_PREFIX.sub('', (city or '').strip()).casefold()
+
+
+def build_search_text(hotel, room_descriptions=()):
+    return ' '.join(
+        text for text in (hotel.name, hotel.city, hotel.address, hotel.description, *room_descriptions) if text
+    ).casefold()
+
+
+def refresh(hotel_ids=None, batch_size=BATCH_SIZE):
+    """Пересчитывает город и ``search_text`` гостиниц пачками; возвращает их число"""
+    hotels = Hotel.objects.order_by('pk')
+    if hotel_ids is not None:
+        hotels = hotels.filter(pk__in=list(hotel_ids))
+    ids = list(hotels.values_list('pk', flat=True))
+    for i in range(0, len(ids), batch_size):
+        batch = list(Hotel.objects.filter(pk__in=ids[i:i + batch_size]).only('name', 'address', 'description'))
+        descriptions = {}
+        rows = Room.objects.filter(hotel_id__in=[hotel.pk for hotel in batch]).order_by('pk').values_list('hotel_id', 'description')
+        for hotel_id, description in rows:
+            descriptions.setdefault(hotel_id, []).append(description)
+        for hotel in batch:
+            hotel.city = extract_city(hotel.address)
+            hotel.city_key = city_key(hotel.city)
+            hotel.search_text = build_search_text(hotel, descriptions.get(hotel.pk, ()))
+        # bulk_update не трогает updated_at, от которого зависят ключи карточек
+        Hotel.objects.bulk_update(batch, ['city', 'city_key', 'search_text'])
+    return len(ids)
+
+
+def search_vector():
+    """Выражение индекса hotel_search_idx; запрос должен совпадать с ним дословно.
+
+    Индекс создан миграцией 0009 с копией этого выражения: при его изменении
+    нужна новая миграция, пересоздающая индекс.
+    """
+    from django.contrib.postgres.search import SearchVector
+    return SearchVector('search_text', config=SEARCH_CONFIG)
+
+
+def search_hotels(hotels, query):
+    """Гостиницы из ``hotels``, подходящие под текстовый запрос"""
+    query = (query or '').strip()
+    if not query:
+        return hotels
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery
+        return hotels.alias(search=search_vector()).filter(
+            search=SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch')
+        )
+    for word in query.casefold().split():
+        hotels = hotels.filter(search_text__contains=word)
+    return hotels
+
+
+def filter_city(hotels, city, lookup='city_key'):
+    """Гостиницы города ``city`` без учета регистра.
+
+    ``lookup`` — путь к полю для выборок по связанным моделям, например
+    ``hotel__city_key`` для номеров.
+    """
+    key = city_key(city)
+    if not key:
+        return hotels
+    return hotels.filter(**{lookup: key})
@@ -0,0 +1,152 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from pages import cache as page_cache
+
+from . import caching, occupancy, pricing, renditions, search
+from .models import Booking, Hotel, HotelImage, RateSeason, Room, StayDiscount
+
+
+def _hotel_id(room_id):
+    return Room.objects.filter(pk=room_id).values_list('hotel_id', flat=True).first()
+
+
+@receiver(pre_save, sender=Booking)
+def remember_booking_state(sender, instance, **kwargs):
+    """Запоминает прежние номер и даты, чтобы при изменении брони обновить и их"""
+    instance._previous_stay = None
+    if instance.pk:
+        instance._previous_stay = (
+            Booking.objects.filter(pk=instance.pk)
+            .values_list('room_id', 'room__hotel_id', 'check_in', 'check_out')
+            .first()
+        )
+
+
+@receiver(post_save, sender=Booking)
+def update_occupancy_on_save(sender, instance, raw=False, **kwargs):
+    """Создание, перенос и смена статуса брони пересчитывают карту номера в той же транзакции"""
+    if raw:
+        return
+    stays = [(instance.check_in, instance.check_out)]
+    previous = getattr(instance, '_previous_stay', None)
+    if previous and previous[0] != instance.room_id:
+        occupancy.update_room(previous[0], (previous[2], previous[3]))
+    elif previous:
+        stays.append((previous[2], previous[3]))
+    occupancy.update_room(instance.room_id, *stays)
+
+
+@receiver(post_save, sender=Booking)
+def invalidate_search_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    hotel_id = _hotel_id(instance.room_id)
+    previous = getattr(instance, '_previous_stay', None)
+
+    def invalidate():
+        caching.invalidate_stay(hotel_id, instance.check_in, instance.check_out)
+        if previous:
+            caching.invalidate_stay(previous[1], previous[2], previous[3])
+
+    transaction.on_commit(invalidate)
+
+
+@receiver(post_delete, sender=Booking)
+def update_on_delete(sender, instance, **kwargs):
+    occupancy.update_room(instance.room_id, (instance.check_in, instance.check_out))
+    hotel_id = _hotel_id(instance.room_id)
+    if hotel_id:
+        transaction.on_commit(
+            lambda: caching.invalidate_stay(hotel_id, instance.check_in, instance.check_out)
+        )
+
+
+@receiver(pre_save, sender=Hotel)
+def fill_search_fields(sender, instance, raw=False, **kwargs):
+    """Город и текст для поиска обновляются вместе с гостиницей"""
+    if raw:
+        return
+    instance.city = search.extract_city(instance.address)
+    instance.city_key = search.city_key(instance.city)
+    descriptions = []
+    if instance.pk:
+        descriptions = Room.objects.filter(hotel_id=instance.pk).order_by('pk').values_list('description', flat=True)
+    instance.search_text = search.build_search_text(instance, descriptions)
+
+
+@receiver(pre_save, sender=Room)
+@receiver(pre_save, sender=HotelImage)
+def remember_image_name(sender, instance, raw=False, **kwargs):
+    """Запоминает прежнее имя файла фото, чтобы строить копии только для нового"""
+    field = 'photo' if sender is Room else 'image'
+    instance._previous_image = None
+    if instance.pk and not raw:
+        instance._previous_image = sender.objects.filter(pk=instance.pk).values_list(field, flat=True).first()
+
+
+def _image_changed(instance, fieldfile, created):
+    return created or (fieldfile.name or None) != (getattr(instance, '_previous_image', None) or None)
+
+
+@receiver(post_save, sender=Room)
+def update_on_room_save(sender, instance, created, raw=False, **kwargs):
+    """Поиск по гостинице устаревает; карта занятости новому номеру не нужна"""
+    if raw:
+        return
+    pricing.schedule_rebuild(room_ids=[instance.pk])
+    card_key = caching.room_card_key(instance)
+
+    def renditions_ready():
+        # Карточка и страницы, показанные до готовности копий, ссылаются на оригинал
+        cache.delete(card_key)
+        page_cache.invalidate()
+
+    if _image_changed(instance, instance.photo, created):
+        renditions.schedule(instance.photo, on_done=renditions_ready)
+    transaction.on_commit(lambda: caching.invalidate_rooms(instance.hotel_id))
+    transaction.on_commit(lambda: search.refresh([instance.hotel_id]))
+
+
+@receiver(post_delete, sender=Room)
+def update_on_room_delete(sender, instance, **kwargs):
+    transaction.on_commit(lambda: caching.invalidate_rooms(instance.hotel_id))
+    transaction.on_commit(lambda: search.refresh([instance.hotel_id]))
+
+
+@receiver(post_save, sender=Hotel)
+@receiver(post_delete, sender=Hotel)
+def update_on_hotel_change(sender, instance, raw=False, **kwargs):
+    """Адрес гостиницы влияет на поиск по городу"""
+    if raw:
+        return
+    transaction.on_commit(lambda: caching.invalidate_rooms(instance.pk))
+
+
+@receiver(post_save, sender=Hotel)
+def update_rates_on_hotel_save(sender, instance, created, raw=False, **kwargs):
+    """Наценка выходных входит в цены ночей всех номеров гостиницы"""
+    if raw or created:
+        return
+    pricing.schedule_rebuild(hotel_id=instance.pk)
+
+
+@receiver(post_save, sender=RateSeason)
+@receiver(post_delete, sender=RateSeason)
+@receiver(post_save, sender=StayDiscount)
+@receiver(post_delete, sender=StayDiscount)
+def update_on_rates_change(sender, instance, raw=False, **kwargs):
+    """Сезоны меняют календари цен, скидки — только итоговые суммы поиска"""
+    if raw:
+        return
+    if sender is RateSeason:
+        pricing.schedule_rebuild(hotel_id=instance.hotel_id)
+    transaction.on_commit(lambda: caching.invalidate_rooms(instance.hotel_id))
+
+
+@receiver(post_save, sender=HotelImage)
+def build_gallery_renditions(sender, instance, created, raw=False, **kwargs):
+    if raw or not _image_changed(instance, instance.image, created):
+        return
+    renditions.schedule(instance.image, on_done=page_cache.invalidate)
@@ -0,0 +1,45 @@
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from hotels import renditions
+
+register = template.Library()
+
+
+def _srcset(items):
+    return ', '.join(f'{url} {width}w' for width, url in items)
+
+
+@register.simple_tag
+def responsive_image(fieldfile, alt='', css_class='', sizes='100vw', loading='lazy', default_width=640):
+    """<picture> с WebP/JPEG-копиями фото; без копий — исходный файл"""
+    if not fieldfile:
+        return ''
+    copies = renditions.available(fieldfile.name)
+    jpeg = copies.get('jpeg')
+    if not jpeg:
+        return format_html(
+            '<img src="{}" class="{}" alt="{}" loading="{}" decoding="async">',
+            fieldfile.url, css_class, alt, loading,
+        )
+    src = next((url for width, url in jpeg if width >= default_width), jpeg[-1][1])
+    sources = format_html_join(
+        '', '<source type="{}" srcset="{}" sizes="{}">',
+        [(f'image/{fmt}', _srcset(copies[fmt]), sizes) for fmt in ('webp',) if fmt in copies],
+    )
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" class="{}" alt="{}" loading="{}" decoding="async"></picture>',
+        sources, src, _srcset(jpeg), sizes, css_class, alt, loading,
+    )
+
+
+@register.filter
+def rendition_url(fieldfile, width=1920):
+    """URL JPEG-копии не шире ``width`` (для просмотра в полный размер)"""
+    if not fieldfile:
+        return ''
+    jpeg = renditions.available(fieldfile.name).get('jpeg')
+    if not jpeg:
+        return fieldfile.url
+    fitting = [url for copy_width, url in jpeg if copy_width <= int(width)]
+    return fitting[-1] if fitting else jpeg[0][1]
@@ -0,0 +1,21 @@
+"""Создание гостиниц и номеров для тестов"""
+from decimal import Decimal
+from itertools import count
+
+from hotels.models import Hotel, Room
+
+_numbers = count(1)
+
+
+def make_hotel(**fields):
+    number = next(_numbers)
+    fields.setdefault('name', f'Гостиница {number}')
+    fields.setdefault('address', f'г. Москва, ул. Тверская, {number}')
+    fields.setdefault('description', 'Описание')
+    return Hotel.objects.create(**fields)
+
+
+def make_room(hotel, price='1000', area='20', **fields):
+    fields.setdefault('name', f'Номер {next(_numbers)}')
+    fields.setdefault('description', 'Описание номера')
+    return Room.objects.create(hotel=hotel, price_per_night=Decimal(price), area=Decimal(area), **fields)
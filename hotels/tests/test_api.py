@@ -0,0 +1,61 @@
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from hotels import booking
+from hotels.models import Booking
+
+from .factories import make_hotel, make_room
+
+
+class AvailabilityApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.hotel = make_hotel()
+        cls.rooms = [make_room(cls.hotel, price='1000'), make_room(cls.hotel, price='2000')]
+        cls.check_in = date.today() + timedelta(days=15)
+        cls.check_out = cls.check_in + timedelta(days=2)
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, **headers):
+        params = {'hotel': self.hotel.pk, 'check_in': self.check_in, 'check_out': self.check_out}
+        return self.client.get(reverse('hotels:api_availability'), params, **headers)
+
+    def room_ids(self, response):
+        return [row[0] for row in response.json()['results'][0]['rooms']]
+
+    def test_rooms_and_totals(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['columns'][0], 'room_id')
+        rows = data['results'][0]['rooms']
+        self.assertEqual([row[0] for row in rows], sorted(room.pk for room in self.rooms))
+        self.assertEqual({row[-1] for row in rows}, {'2000.00', '4000.00'})
+
+    def test_matching_etag_answers_304_without_queries(self):
+        etag = self.get()['ETag']
+        with self.assertNumQueries(0):
+            response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_booking_changes_etag(self):
+        etag = self.get()['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.create_booking(Booking(
+                room=self.rooms[0], guest_name='Гость', guest_email='guest@example.com',
+                check_in=self.check_in, check_out=self.check_out,
+            ))
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(self.room_ids(response), [self.rooms[1].pk])
+
+    def test_bad_request(self):
+        response = self.client.get(reverse('hotels:api_availability'), {'hotel': 'x', 'check_in': 'x'})
+        self.assertEqual(response.status_code, 400)
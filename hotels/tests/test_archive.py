@@ -0,0 +1,50 @@
+from datetime import date
+
+from django.db.models.signals import post_delete
+from django.test import TestCase
+
+from hotels import archive
+from hotels.models import Booking, BookingArchive
+
+from .factories import make_hotel, make_room
+
+
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        room = make_room(make_hotel())
+        for day in (1, 5, 9):
+            Booking.objects.create(
+                room=room, guest_name='Гость', guest_email='guest@example.com', guest_phone='+7',
+                check_in=date(2020, 1, day), check_out=date(2020, 1, day + 2), status='confirmed',
+            )
+        cls.current = Booking.objects.create(
+            room=room, guest_name='Гость', guest_email='guest@example.com', guest_phone='+7',
+            check_in=date(2030, 1, 1), check_out=date(2030, 1, 3), status='confirmed',
+        )
+
+    def test_batches_move_rows_without_delete_signals(self):
+        deleted = []
+
+        def receiver(sender, **kwargs):
+            deleted.append(kwargs['instance'])
+
+        post_delete.connect(receiver, sender=Booking)
+        self.addCleanup(post_delete.disconnect, receiver, sender=Booking)
+
+        self.assertEqual(list(archive.archive(date(2025, 1, 1), batch_size=2)), [2, 1])
+        self.assertEqual(list(Booking.objects.values_list('pk', flat=True)), [self.current.pk])
+        self.assertEqual(BookingArchive.objects.count(), 3)
+        self.assertEqual(deleted, [])
+
+    def test_batch_larger_than_sqlite_variable_limit(self):
+        room = make_room(make_hotel())
+        Booking.objects.bulk_create([
+            Booking(
+                room=room, guest_name='Гость', guest_email='guest@example.com', guest_phone='+7',
+                check_in=date(2019, 1, 1), check_out=date(2019, 1, 2), status='confirmed',
+            )
+            for _ in range(1200)
+        ])
+        self.assertEqual(archive.archive_batch(date(2025, 1, 1), batch_size=1500), 1203)
+        self.assertEqual(list(Booking.objects.values_list('pk', flat=True)), [self.current.pk])
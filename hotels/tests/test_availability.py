@@ -0,0 +1,68 @@
+from datetime import date, timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from hotels import availability
+from hotels.models import Booking, Hotel, RoomHold
+
+from .factories import make_hotel, make_room
+
+
+class AvailabilityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.day = date.today() + timedelta(days=30)
+        cls.busy_hotel = make_hotel()
+        cls.booked = make_room(cls.busy_hotel)
+        cls.held = make_room(cls.busy_hotel)
+        cls.free_hotel = make_hotel()
+        cls.free = [make_room(cls.free_hotel) for _ in range(2)]
+        cls.empty_hotel = make_hotel()
+        Booking.objects.create(
+            room=cls.booked, guest_name='Гость', guest_email='guest@example.com',
+            check_in=cls.day, check_out=cls.day + timedelta(days=3), status='confirmed',
+        )
+        Booking.objects.create(
+            room=cls.free[0], guest_name='Гость', guest_email='guest@example.com',
+            check_in=cls.day, check_out=cls.day + timedelta(days=3), status='cancelled',
+        )
+        RoomHold.objects.create(
+            room=cls.held, token='a' * 32, check_in=cls.day, check_out=cls.day + timedelta(days=3),
+            expires_at=timezone.now() + timedelta(minutes=10),
+        )
+
+    def period(self, start=0, nights=2):
+        check_in = self.day + timedelta(days=start)
+        return check_in, check_in + timedelta(days=nights)
+
+    def test_free_rooms_skip_bookings_and_holds(self):
+        ids = set(availability.free_rooms(*self.period()).values_list('pk', flat=True))
+        self.assertEqual(ids, {room.pk for room in self.free})
+        # Выезд в день заезда — не пересечение
+        ids = set(availability.free_rooms(*self.period(3)).values_list('pk', flat=True))
+        self.assertEqual(ids, {self.booked.pk, self.held.pk, *(room.pk for room in self.free)})
+
+    def test_free_room_ids(self):
+        ids = availability.free_room_ids(*self.period(), [self.booked.pk, self.free[1].pk])
+        self.assertEqual(ids, {self.free[1].pk})
+
+    def test_is_room_free_respects_own_hold(self):
+        self.assertFalse(availability.is_room_free(self.booked, *self.period()))
+        self.assertFalse(availability.is_room_free(self.held.pk, *self.period()))
+        self.assertTrue(availability.is_room_free(self.held.pk, *self.period(), hold_token='a' * 32))
+        self.assertTrue(availability.is_room_free(self.free[0], *self.period()))
+
+    def test_expired_hold_does_not_block(self):
+        RoomHold.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertTrue(availability.is_room_free(self.held, *self.period()))
+
+    def test_hotels_with_free_rooms(self):
+        def ids(hotels):
+            return set(hotels.values_list('pk', flat=True))
+
+        self.assertEqual(ids(availability.hotels_with_free_rooms(*self.period())), {self.free_hotel.pk})
+        self.assertEqual(ids(availability.hotels_with_free_rooms(*self.period(), min_rooms=2)), {self.free_hotel.pk})
+        self.assertEqual(ids(availability.hotels_with_free_rooms(*self.period(), min_rooms=3)), set())
+        hotels = Hotel.objects.filter(pk__in=[self.busy_hotel.pk, self.empty_hotel.pk])
+        self.assertEqual(ids(availability.hotels_with_free_rooms(*self.period(3), hotels=hotels)), {self.busy_hotel.pk})
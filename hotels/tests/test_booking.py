@@ -0,0 +1,54 @@
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+from django.db import IntegrityError
+from django.test import SimpleTestCase, TestCase
+
+from hotels import booking
+from hotels.models import Booking
+
+from .factories import make_hotel, make_room
+
+
+class OverlapErrorTests(SimpleTestCase):
+    def error(self, message='', **fields):
+        # Так Django оборачивает исключение драйвера psycopg2
+        cause = Exception(message)
+        cause.__dict__.update(fields)
+        error = IntegrityError(message)
+        error.__cause__ = cause
+        return error
+
+    def test_only_exclusion_violation_is_overlap(self):
+        self.assertTrue(booking._is_overlap(self.error(pgcode=booking.EXCLUSION_VIOLATION)))
+        self.assertTrue(booking._is_overlap(self.error(diag=SimpleNamespace(constraint_name=booking.OVERLAP_CONSTRAINT))))
+        self.assertFalse(booking._is_overlap(self.error('NOT NULL constraint failed', pgcode='23502')))
+        self.assertFalse(booking._is_overlap(IntegrityError('UNIQUE constraint failed')))
+
+
+class CreateBookingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.room = make_room(make_hotel())
+        cls.check_in = date.today() + timedelta(days=5)
+
+    def make_booking(self, **fields):
+        fields.setdefault('guest_name', 'Гость')
+        return Booking(
+            room=self.room, guest_email='guest@example.com',
+            check_in=self.check_in, check_out=self.check_in + timedelta(days=2), **fields,
+        )
+
+    def test_overlapping_booking_is_unavailable(self):
+        booking.create_booking(self.make_booking())
+        with self.assertRaises(booking.RoomUnavailable):
+            booking.create_booking(self.make_booking())
+
+    def test_other_integrity_errors_are_not_hidden(self):
+        with self.assertRaises(IntegrityError):
+            booking.create_booking(self.make_booking(guest_name=None))
+        self.assertFalse(Booking.objects.exists())
+
+    def test_local_locks_are_striped(self):
+        self.assertIs(booking._room_lock(3), booking._room_lock(3 + booking.LOCK_STRIPES))
+        self.assertEqual(len(booking._local_locks), booking.LOCK_STRIPES)
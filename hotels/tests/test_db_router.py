@@ -0,0 +1,83 @@
+import time
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import resolve, reverse
+
+from hotel_project import db_router
+from hotels.models import Hotel
+
+from .factories import make_hotel, make_room
+
+REPLICA_SETTINGS = {
+    'DATABASE_REPLICAS': ['replica'],
+    'DATABASE_REPLICA_LAG': 5,
+    'DATABASE_REPLICA_VIEWS': ['hotels:hotel_list'],
+}
+
+
+@override_settings(**REPLICA_SETTINGS)
+class ReplicaMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def serve(self, request):
+        """База чтения и срок кэша, которые увидело бы представление"""
+        seen = {}
+
+        def view(request):
+            seen['alias'] = db_router.ReplicaRouter().db_for_read(Hotel)
+            seen['timeout'] = db_router.result_timeout(600)
+            return HttpResponse()
+
+        request.resolver_match = resolve(request.path)
+        middleware = db_router.ReplicaMiddleware(lambda r: middleware.process_view(r, view, (), {}) or view(r))
+        response = middleware(request)
+        return seen, response
+
+    def test_listed_get_views_read_from_replica(self):
+        seen, response = self.serve(RequestFactory().get(reverse('hotels:hotel_list')))
+        self.assertEqual(seen['alias'], 'replica')
+        self.assertNotIn('db_primary', response.cookies)
+        self.assertIsNone(db_router.replica_alias())
+
+        seen, _ = self.serve(RequestFactory().get(reverse('hotels:room_list', args=[1])))
+        self.assertEqual(seen['alias'], 'default')
+
+    def test_writes_pin_client_to_primary(self):
+        seen, response = self.serve(RequestFactory().post(reverse('hotels:hotel_list')))
+        self.assertEqual(seen['alias'], 'default')
+        self.assertEqual(response.cookies['db_primary']['max-age'], 5)
+
+        request = RequestFactory().get(reverse('hotels:hotel_list'))
+        request.COOKIES['db_primary'] = '1'
+        seen, _ = self.serve(request)
+        self.assertEqual(seen['alias'], 'default')
+
+    def test_result_timeout_is_cut_after_recent_write(self):
+        seen, _ = self.serve(RequestFactory().get(reverse('hotels:hotel_list')))
+        self.assertEqual(seen['timeout'], 600)
+        cache.set(db_router.WRITE_KEY, time.time() - 2)
+        seen, _ = self.serve(RequestFactory().get(reverse('hotels:hotel_list')))
+        self.assertIn(seen['timeout'], (1, 2, 3))
+        cache.set(db_router.WRITE_KEY, time.time() - 60)
+        seen, _ = self.serve(RequestFactory().get(reverse('hotels:hotel_list')))
+        self.assertEqual(seen['timeout'], 600)
+
+    def test_writes_always_go_to_primary(self):
+        self.assertEqual(db_router.ReplicaRouter().db_for_write(Hotel), 'default')
+
+
+@override_settings(**REPLICA_SETTINGS)
+class ReplicaCookieTests(TestCase):
+    def test_hold_sets_primary_cookie(self):
+        room = make_room(make_hotel())
+        check_in = date.today() + timedelta(days=7)
+        response = self.client.post(
+            reverse('hotels:room_hold', args=[room.pk]),
+            {'check_in': check_in, 'check_out': check_in + timedelta(days=1)},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.cookies['db_primary']['max-age'], 5)
@@ -0,0 +1,38 @@
+import csv
+import io
+import json
+from datetime import date, timedelta
+
+from django.test import TestCase
+
+from hotels import exports
+from hotels.models import Booking
+
+from .factories import make_hotel, make_room
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        room = make_room(make_hotel(name='=cmd|calc'))
+        check_in = date.today() + timedelta(days=3)
+        cls.booking = Booking.objects.create(
+            room=room, guest_name='=HYPERLINK("http://example.com")', guest_email='guest@example.com',
+            guest_phone='+7 900 000-00-00', check_in=check_in, check_out=check_in + timedelta(days=1),
+        )
+
+    def export(self, fmt):
+        return ''.join(exports.stream(exports.export_rows(), fmt))
+
+    def test_csv_cells_cannot_start_formulas(self):
+        header, row = csv.reader(io.StringIO(self.export('csv')))
+        values = dict(zip(header, row))
+        self.assertEqual(values['guest_name'], '\'=HYPERLINK("http://example.com")')
+        self.assertEqual(values['hotel'], "'=cmd|calc")
+        self.assertEqual(values['guest_phone'], "'+7 900 000-00-00")
+        self.assertEqual(values['booking_id'], str(self.booking.pk))
+        self.assertEqual(values['guest_email'], 'guest@example.com')
+
+    def test_jsonl_keeps_values(self):
+        row = json.loads(self.export('jsonl'))
+        self.assertEqual(row['guest_name'], self.booking.guest_name)
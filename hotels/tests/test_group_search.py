@@ -0,0 +1,72 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import combinations
+import random
+
+import numpy as np
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from hotels import group_search
+from hotels.pagination import encode_cursor
+
+from .factories import make_hotel, make_room
+
+
+class CheapestWithAreaTests(SimpleTestCase):
+    def test_matches_exhaustive_search(self):
+        rng = random.Random(7)
+        for _ in range(200):
+            size = rng.randint(1, 8)
+            count = rng.randint(1, size)
+            prices = np.array([rng.randint(1, 50) * 100 for _ in range(size)], dtype=np.int64)
+            areas = np.array([rng.choice([1000, 1550, 2000, 3525, 4000]) for _ in range(size)], dtype=np.int64)
+            min_area = rng.randint(1, 12) * 1000
+            options = [
+                sum(prices[list(rows)]) for rows in combinations(range(size), count)
+                if sum(areas[list(rows)]) >= min_area
+            ]
+            picked = group_search._cheapest_with_area(prices, areas, count, min_area)
+            if not options:
+                self.assertIsNone(picked)
+                continue
+            self.assertEqual(len(picked), count)
+            self.assertGreaterEqual(areas[picked].sum(), min_area)
+            self.assertEqual(prices[picked].sum(), min(options))
+
+
+class GroupOffersTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.hotel = make_hotel()
+        cls.small = [make_room(cls.hotel, price='1000', area='10') for _ in range(3)]
+        cls.large = [make_room(cls.hotel, price='3000', area='40') for _ in range(2)]
+        cls.tiny_hotel = make_hotel()
+        for _ in range(3):
+            make_room(cls.tiny_hotel, price='500', area='12')
+        cls.check_in = date.today() + timedelta(days=30)
+        cls.check_out = cls.check_in + timedelta(days=2)
+
+    def test_cheapest_rooms_too_small_but_other_rooms_fit(self):
+        offers = group_search.group_offers(self.check_in, self.check_out, 2, Decimal('50'))
+        self.assertEqual([offer.hotel_id for offer in offers], [self.hotel.pk])
+        offer = offers[0]
+        self.assertEqual(offer.area, Decimal('50'))
+        self.assertEqual(offer.total, Decimal('8000'))
+        self.assertEqual(len(set(offer.room_ids) & {room.pk for room in self.large}), 1)
+        self.assertEqual(len(set(offer.room_ids) & {room.pk for room in self.small}), 1)
+
+    def test_without_area_cheapest_rooms(self):
+        offers = group_search.group_offers(self.check_in, self.check_out, 2)
+        self.assertEqual([offer.hotel_id for offer in offers], [self.tiny_hotel.pk, self.hotel.pk])
+        self.assertEqual(set(offers[1].room_ids), {room.pk for room in self.small[:2]})
+
+    def test_tampered_cursor_in_group_mode(self):
+        params = {'check_in': self.check_in, 'check_out': self.check_out, 'rooms': 2, 'page_size': 1}
+        url = reverse('hotels:hotel_list')
+        first_page = [offer.hotel_id for offer in self.client.get(url, params).context['page']]
+        for values in (['abc', 1], [[1], 1], [1, {'a': 1}]):
+            with self.subTest(values=values):
+                response = self.client.get(url, dict(params, cursor=encode_cursor('next', values)))
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual([offer.hotel_id for offer in response.context['page']], first_page)
@@ -0,0 +1,91 @@
+from datetime import date, timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from hotels import availability, booking, caching, holds
+from hotels.models import Booking, RoomHold
+
+from .factories import make_hotel, make_room
+
+
+class HoldTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.hotel = make_hotel()
+        cls.room = make_room(cls.hotel)
+        cls.check_in = date.today() + timedelta(days=10)
+        cls.check_out = cls.check_in + timedelta(days=2)
+
+    def setUp(self):
+        cache.clear()
+
+    def hold(self, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return booking.place_hold(self.room.pk, self.check_in, self.check_out, **kwargs)
+
+    def make_booking(self, **fields):
+        return Booking(
+            room=self.room, guest_name='Гость', guest_email='guest@example.com',
+            check_in=self.check_in, check_out=self.check_out, **fields,
+        )
+
+    def test_hold_blocks_others_until_it_expires(self):
+        held = self.hold()
+        self.assertEqual(held.expires_at.timestamp() % caching.HOLD_STEP, 0)
+        self.assertFalse(availability.is_room_free(self.room, self.check_in, self.check_out))
+        self.assertTrue(availability.is_room_free(self.room, self.check_in, self.check_out, held.token))
+        with self.assertRaises(booking.RoomUnavailable):
+            self.hold()
+
+        RoomHold.objects.filter(pk=held.pk).update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertTrue(availability.is_room_free(self.room, self.check_in, self.check_out))
+        self.assertEqual(sum(holds.sweep()), 1)
+        self.assertFalse(RoomHold.objects.exists())
+
+    def test_booking_with_own_token_releases_hold(self):
+        held = self.hold()
+        with self.assertRaises(booking.RoomUnavailable):
+            booking.create_booking(self.make_booking())
+        saved = booking.create_booking(self.make_booking(), hold_token=held.token)
+        self.assertIsNotNone(saved.pk)
+        self.assertFalse(RoomHold.objects.exists())
+
+    @override_settings(ROOM_HOLD_LIMIT=2)
+    def test_active_holds_are_limited_per_client(self):
+        rooms = [make_room(self.hotel) for _ in range(3)]
+        first = booking.place_hold(rooms[0].pk, self.check_in, self.check_out, client='session')
+        booking.place_hold(rooms[1].pk, self.check_in, self.check_out, client='session')
+        with self.assertRaises(booking.TooManyHolds):
+            booking.place_hold(rooms[2].pk, self.check_in, self.check_out, client='session')
+        # Перенос своего удержания и другой клиент лимитом не ограничены
+        booking.place_hold(rooms[2].pk, self.check_in, self.check_out, token=first.token, client='session')
+        booking.place_hold(rooms[0].pk, self.check_in, self.check_out, client='other')
+
+    @override_settings(ROOM_HOLD_LIMIT=1)
+    def test_hold_view_answers_429_over_limit(self):
+        other = make_room(self.hotel)
+        data = {'check_in': self.check_in, 'check_out': self.check_out}
+        response = self.client.post(reverse('hotels:room_hold', args=[self.room.pk]), data)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['hold_token'])
+        response = self.client.post(reverse('hotels:room_hold', args=[other.pk]), data)
+        self.assertEqual(response.status_code, 429)
+
+    def test_search_etag_changes_when_hold_expires(self):
+        etag = caching.search_etag('q', self.check_in, self.check_out)
+        held = self.hold()
+        held_etag = caching.search_etag('q', self.check_in, self.check_out)
+        self.assertNotEqual(held_etag, etag)
+        self.assertEqual(caching.search_etag('q', self.check_in, self.check_out), held_etag)
+
+        after = held.expires_at + timedelta(seconds=1)
+        with mock.patch('django.utils.timezone.now', return_value=after):
+            expired_etag = caching.search_etag('q', self.check_in, self.check_out)
+            self.assertNotEqual(expired_etag, held_etag)
+        # После истечения последнего удержания ETag больше не меняется
+        with mock.patch('django.utils.timezone.now', return_value=after + timedelta(hours=1)):
+            self.assertEqual(caching.search_etag('q', self.check_in, self.check_out), expired_etag)
@@ -0,0 +1,50 @@
+import csv
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from hotels import imports
+
+
+class ParseRowTests(SimpleTestCase):
+    def test_non_object_json_lines_are_rejected(self):
+        lines = ['[1, 2]', '"text"', '42', 'null', 'true', '{broken']
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False, encoding='utf-8') as f:
+            f.write('\n'.join(lines))
+        self.addCleanup(os.remove, f.name)
+        rows = list(imports.read_rows(f.name))
+        self.assertEqual(len(rows), len(lines))
+        for line, row in zip(lines, rows):
+            with self.subTest(line=line), self.assertRaises(imports.RowError):
+                imports.parse_row(row)
+
+    def test_object_row_is_parsed(self):
+        row = json.loads(
+            '{"room_id": 1, "guest_name": "Гость", "guest_email": "guest@example.com", '
+            '"guest_phone": "+7", "check_in": "2030-01-01", "check_out": "2030-01-03"}'
+        )
+        booking = imports.parse_row(row)
+        self.assertEqual((booking.room_id, booking.status), (1, 'confirmed'))
+
+
+class ImportCommandTests(SimpleTestCase):
+    def test_non_object_rows_are_written_to_rejects(self):
+        lines = ['[1, 2]', '42', 'null', '{"room_id": "x"}']
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'bookings.jsonl')
+            rejects_path = os.path.join(tmp, 'rejects.csv')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('\n'.join(lines))
+            call_command('import_bookings', path, rejects=rejects_path, stdout=StringIO())
+            with open(rejects_path, encoding='utf-8', newline='') as f:
+                rows = list(csv.reader(f))
+        self.assertEqual(rows[0], ['row', 'reason', 'detail'] + imports.FIELDS)
+        self.assertEqual([row[0] for row in rows[1:]], ['1', '2', '3', '4'])
+        for row in rows[1:4]:
+            self.assertEqual(row[1], imports.INVALID)
+            self.assertEqual(row[3:], [''] * len(imports.FIELDS))
+        self.assertEqual(rows[4][3 + imports.FIELDS.index('room_id')], 'x')
@@ -0,0 +1,76 @@
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from hotels import occupancy, pricing
+from hotels.models import Booking
+
+from .factories import make_hotel, make_room
+
+
+class ListQueryCountTests(TestCase):
+    """Число запросов списков не зависит от числа гостиниц, номеров и броней"""
+    check_in = date.today() + timedelta(days=30)
+    check_out = check_in + timedelta(days=3)
+
+    def add_hotels(self, count, rooms_per_hotel):
+        hotels = [make_hotel() for _ in range(count)]
+        for hotel in hotels:
+            for number in range(rooms_per_hotel):
+                room = make_room(hotel, price=str(1000 + number * 100))
+                if number % 2:
+                    Booking.objects.create(
+                        room=room, guest_name='Гость', guest_email='guest@example.com', guest_phone='+7',
+                        check_in=self.check_in, check_out=self.check_out, status='confirmed',
+                    )
+        # В TestCase on_commit не срабатывает, поэтому таблицы строятся явно
+        occupancy.rebuild_all()
+        pricing.rebuild_all()
+        return hotels
+
+    def get(self, url, params):
+        cache.clear()
+        response = self.client.get(url, {'page_size': 48, **params})
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def assert_constant_queries(self, url_func, params_list, grow):
+        small = {}
+        for params in params_list:
+            with CaptureQueriesContext(connection) as queries:
+                self.get(url_func(), params)
+            small[tuple(sorted(params.items()))] = len(queries)
+        grow()
+        for params in params_list:
+            with self.subTest(params=params), self.assertNumQueries(small[tuple(sorted(params.items()))]):
+                self.get(url_func(), params)
+
+    def dates(self):
+        return {'check_in': self.check_in.isoformat(), 'check_out': self.check_out.isoformat()}
+
+    def test_hotel_list(self):
+        self.add_hotels(2, 4)
+        self.assert_constant_queries(
+            lambda: reverse('hotels:hotel_list'),
+            [{}, self.dates(), {**self.dates(), 'rooms': 2}],
+            lambda: self.add_hotels(20, 6),
+        )
+
+    def test_room_list(self):
+        hotel = self.add_hotels(1, 4)[0]
+
+        def grow():
+            for number in range(30):
+                make_room(hotel, price=str(2000 + number))
+            occupancy.rebuild_all()
+            pricing.rebuild_all()
+
+        self.assert_constant_queries(
+            lambda: reverse('hotels:room_list', args=[hotel.pk]),
+            [{}, self.dates(), {**self.dates(), 'rooms': 2}],
+            grow,
+        )
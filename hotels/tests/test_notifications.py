@@ -0,0 +1,29 @@
+from datetime import date, timedelta
+
+from django.core import mail
+from django.test import TestCase
+from django.urls import reverse
+
+from hotels.models import Booking
+
+from .factories import make_hotel, make_room
+
+
+class BookingNotificationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.room = make_room(make_hotel())
+
+    def test_emails_are_sent_after_commit_off_the_request(self):
+        check_in = date.today() + timedelta(days=10)
+        data = {
+            'guest_name': 'Гость', 'guest_email': 'guest@example.com', 'guest_phone': '+7',
+            'check_in': check_in.isoformat(), 'check_out': (check_in + timedelta(days=2)).isoformat(),
+        }
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(reverse('hotels:room_detail', args=[self.room.pk]), data)
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(Booking.objects.filter(room=self.room).exists())
+        # Ответ готов до отправки: письма только поставлены в очередь
+        self.assertEqual(mail.outbox, [])
+        self.assertTrue(callbacks)
@@ -0,0 +1,84 @@
+from datetime import date, timedelta
+
+from django.test import TestCase
+
+from hotels import availability, occupancy
+from hotels.models import Booking, Hotel, RoomOccupancy
+
+from .factories import make_hotel, make_room
+
+
+def book(room, check_in, nights, status='confirmed'):
+    return Booking.objects.create(
+        room=room, guest_name='Гость', guest_email='guest@example.com', guest_phone='+7',
+        check_in=check_in, check_out=check_in + timedelta(days=nights), status=status,
+    )
+
+
+class OccupancyMapTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.hotel = make_hotel()
+        cls.rooms = [make_room(cls.hotel) for _ in range(3)]
+        # Начало блока через год: проживания пересекают границу блоков
+        cls.boundary = occupancy.block_start(occupancy.first_block() + 6)
+
+    def free_ids(self, check_in, check_out, source=occupancy):
+        return set(source.free_rooms(check_in, check_out).values_list('id', flat=True))
+
+    def test_booking_changes_update_map_in_transaction(self):
+        room = self.rooms[0]
+        check_in = self.boundary - timedelta(days=2)
+        booking = book(room, check_in, 4)
+        self.assertEqual(RoomOccupancy.objects.filter(room=room).count(), 2)
+        self.assertNotIn(room.pk, self.free_ids(self.boundary + timedelta(days=1), self.boundary + timedelta(days=3)))
+
+        booking.check_in += timedelta(days=10)
+        booking.check_out += timedelta(days=10)
+        booking.save()
+        self.assertIn(room.pk, self.free_ids(check_in, check_in + timedelta(days=4)))
+        self.assertNotIn(room.pk, self.free_ids(booking.check_in, booking.check_out))
+
+        booking.status = 'cancelled'
+        booking.save()
+        self.assertFalse(RoomOccupancy.objects.filter(room=room).exists())
+
+        booking.status = 'confirmed'
+        booking.room = self.rooms[1]
+        booking.save()
+        booking.delete()
+        self.assertFalse(RoomOccupancy.objects.exists())
+
+    def test_update_recomputes_from_bookings(self):
+        room = self.rooms[0]
+        first = book(room, self.boundary, 2)
+        # Устаревшая карта (например, после записи мимо сигналов) исправляется
+        # следующим изменением брони в том же блоке
+        RoomOccupancy.objects.filter(room=room).update(bits=0)
+        book(room, self.boundary + timedelta(days=5), 1)
+        self.assertNotIn(room.pk, self.free_ids(first.check_in, first.check_out))
+
+    def test_matches_booking_queries(self):
+        today = date.today()
+        stays = [(0, 1, 3), (0, 5, 2), (1, 60, 10), (1, 200, 1), (2, 3, 1)]
+        for index, offset, nights in stays:
+            book(self.rooms[index], today + timedelta(days=offset), nights)
+        book(self.rooms[2], today + timedelta(days=10), 5, status='cancelled')
+        occupancy.rebuild_all()
+        for offset in range(0, 220, 3):
+            for nights in (1, 4, 30):
+                check_in = today + timedelta(days=offset)
+                check_out = check_in + timedelta(days=nights)
+                with self.subTest(check_in=check_in, nights=nights):
+                    self.assertEqual(self.free_ids(check_in, check_out), self.free_ids(check_in, check_out, availability))
+
+    def test_hotels_with_free_rooms_is_a_filter(self):
+        check_in = self.boundary
+        for room in self.rooms:
+            book(room, check_in, 3)
+        other = make_hotel()
+        make_room(other)
+        hotels = occupancy.hotels_with_free_rooms(check_in, check_in + timedelta(days=1), Hotel.objects.all())
+        self.assertEqual(list(hotels.values_list('pk', flat=True)), [other.pk])
+        with self.assertNumQueries(1):
+            list(hotels)
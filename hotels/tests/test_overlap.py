@@ -0,0 +1,64 @@
+from datetime import date, timedelta
+from unittest import mock, skipUnless
+
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase
+
+from hotels import availability, booking
+from hotels.models import Booking
+
+from .factories import make_hotel, make_room
+
+
+class OverlapTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.room = make_room(make_hotel())
+        cls.day = date.today() + timedelta(days=20)
+
+    def make_booking(self, start, nights, status='confirmed'):
+        check_in = self.day + timedelta(days=start)
+        return Booking(
+            room=self.room, guest_name='Гость', guest_email='guest@example.com',
+            check_in=check_in, check_out=check_in + timedelta(days=nights), status=status,
+        )
+
+    def test_overlap_index_exists(self):
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, Booking._meta.db_table)
+        self.assertEqual(
+            constraints['booking_room_overlap_idx']['columns'],
+            ['room_id', 'status', 'check_in', 'check_out'],
+        )
+
+    @skipUnless(connection.vendor == 'sqlite', 'план запроса SQLite')
+    def test_overlap_check_uses_index(self):
+        queryset = availability.overlapping_bookings(self.day, self.day + timedelta(days=2)).filter(room_id=self.room.pk)
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn('booking_room_overlap_idx', plan)
+
+    def test_service_rejects_only_overlapping_active_bookings(self):
+        booking.create_booking(self.make_booking(0, 3))
+        booking.create_booking(self.make_booking(3, 2))
+        booking.create_booking(self.make_booking(-2, 2))
+        self.make_booking(6, 2, status='cancelled').save()
+        for start, nights in ((0, 1), (2, 2), (-1, 10), (4, 1)):
+            with self.subTest(start=start, nights=nights), self.assertRaises(booking.RoomUnavailable):
+                booking.create_booking(self.make_booking(start, nights))
+        # Отмененная бронь номер не занимает
+        booking.create_booking(self.make_booking(6, 1))
+        self.assertEqual(Booking.objects.count(), 5)
+
+    @skipUnless(connection.vendor == 'postgresql', 'исключающее ограничение есть только в PostgreSQL')
+    def test_exclusion_constraint(self):
+        self.make_booking(0, 3).save()
+        self.make_booking(1, 1, status='cancelled').save()
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.make_booking(2, 2).save()
+        # Если проверка сервиса пропустила пересечение, ограничение дает RoomUnavailable
+        with mock.patch.object(availability, 'is_room_free', return_value=True):
+            with self.assertRaises(booking.RoomUnavailable):
+                booking.create_booking(self.make_booking(1, 1))
@@ -0,0 +1,55 @@
+from datetime import date, timedelta
+
+from django.test import TestCase
+from django.urls import reverse
+
+from hotels.forms import HotelSearchForm
+from hotels.pagination import encode_cursor
+
+from .factories import make_hotel, make_room
+
+
+class TamperedCursorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.hotels = [make_hotel(name=f'Гостиница {i:02d}') for i in range(5)]
+        for hotel in cls.hotels:
+            make_room(hotel)
+
+    def get(self, url, cursor):
+        return self.client.get(url, {'cursor': cursor, 'page_size': 2})
+
+    def test_mismatched_types_fall_back_to_first_page(self):
+        url = reverse('hotels:hotel_list')
+        first_page = [hotel.pk for hotel in self.get(url, '').context['page']]
+        for values in (['a', 'abc'], ['a', [1]], ['a', 10 ** 30], ['a', None], [{'x': 1}, 1]):
+            with self.subTest(values=values):
+                response = self.get(url, encode_cursor('next', values))
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual([hotel.pk for hotel in response.context['page']], first_page)
+
+    def test_bad_page_size_keeps_date_filter(self):
+        check_in = date.today() + timedelta(days=10)
+        params = {'check_in': check_in, 'check_out': check_in + timedelta(days=2)}
+        for page_size in ('abc', '-5', '1e9', '100000'):
+            with self.subTest(page_size=page_size):
+                form = HotelSearchForm({**params, 'page_size': page_size})
+                self.assertTrue(form.is_valid())
+                self.assertEqual(form.cleaned_data['check_in'], check_in)
+                response = self.client.get(reverse('hotels:hotel_list'), {**params, 'page_size': page_size})
+                self.assertEqual(response.context['check_in'], check_in)
+
+    def test_reported_cursor(self):
+        response = self.get(reverse('hotels:hotel_list'), 'WyJuZXh0IixbImEiLCJhYmMiXV0')
+        self.assertEqual(response.status_code, 200)
+
+    def test_room_list_cursor_with_foreign_key(self):
+        url = reverse('hotels:room_list', args=[self.hotels[0].pk])
+        response = self.get(url, encode_cursor('next', ['x', 'Номер', 1]))
+        self.assertEqual(response.status_code, 200)
+
+    def test_valid_cursor_still_pages(self):
+        url = reverse('hotels:hotel_list')
+        first = self.get(url, '').context['page']
+        second = self.get(url, first.next_cursor).context['page']
+        self.assertEqual([hotel.pk for hotel in second], [hotel.pk for hotel in self.hotels[2:4]])
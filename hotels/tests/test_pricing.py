@@ -0,0 +1,55 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.urls import reverse
+
+from hotels import pricing
+from hotels.forms import DateFilterForm
+
+from .factories import make_hotel, make_room
+
+
+class ReversedDatesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.hotel = make_hotel()
+        cls.room = make_room(cls.hotel, price='7000')
+        pricing.rebuild_all()
+
+    def test_form_rejects_reversed_dates(self):
+        form = DateFilterForm({'check_in': '2026-12-12', 'check_out': '2026-12-10'})
+        self.assertFalse(form.is_valid())
+
+    def test_quote_is_empty_for_reversed_dates(self):
+        future = date.today() + timedelta(days=60)
+        past = date(2020, 1, 12)
+        for check_in in (future, past):
+            with self.subTest(check_in=check_in):
+                self.assertEqual(pricing.quote_rooms([self.room.pk], check_in, check_in - timedelta(days=2)), {})
+                self.assertEqual(pricing.quote_rooms([self.room.pk], check_in, check_in), {})
+
+    def test_nightly_prices_without_nights(self):
+        rules = pricing._rules({self.hotel.pk})[self.hotel.pk]
+        self.assertEqual(len(pricing.nightly_prices(Decimal('7000'), date(2020, 1, 12), -2, rules)), 0)
+
+    def test_room_list_with_reversed_dates(self):
+        url = reverse('hotels:room_list', args=[self.hotel.pk])
+        for check_in, check_out in (('2026-12-12', '2026-12-10'), ('2020-01-12', '2020-01-10')):
+            with self.subTest(check_in=check_in):
+                response = self.client.get(url, {'check_in': check_in, 'check_out': check_out})
+                self.assertEqual(response.status_code, 200)
+                self.assertNotContains(response, 'Ночей: -')
+
+
+class LargeTotalTests(TestCase):
+    def test_long_expensive_stay_does_not_overflow(self):
+        hotel = make_hotel()
+        cheap = make_room(hotel, price='5000000')
+        expensive = make_room(hotel, price='99999999.99')
+        pricing.rebuild_all()
+        check_in = date.today() + timedelta(days=10)
+        check_out = check_in + timedelta(days=400)
+        quotes = pricing.quote_rooms([cheap.pk, expensive.pk], check_in, check_out)
+        self.assertEqual(quotes[cheap.pk].total, Decimal('5000000') * 400)
+        self.assertEqual(quotes[expensive.pk].total, Decimal('99999999.99') * 400)
@@ -0,0 +1,67 @@
+import shutil
+import tempfile
+from concurrent.futures import Future
+from io import BytesIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from hotels import renditions
+from hotels.models import Room
+
+from .factories import make_hotel, make_room
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class RenditionsTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        data = BytesIO()
+        Image.new('RGB', (400, 300), (10, 20, 30)).save(data, 'JPEG')
+        self.name = default_storage.save('rooms/photo.jpg', ContentFile(data.getvalue()))
+
+    def test_available_asks_storage_once(self):
+        with mock.patch.object(default_storage, 'exists', wraps=default_storage.exists) as exists:
+            renditions.available(self.name)
+            renditions.available(self.name)
+        self.assertEqual(exists.call_count, len(renditions.WIDTHS) * len(renditions.FORMATS))
+
+    def test_schedule_does_not_wait_for_pool(self):
+        future = Future()
+        executor = mock.Mock(submit=mock.Mock(return_value=future))
+        done = mock.Mock()
+        with mock.patch.object(renditions, '_shared_pool', return_value=executor):
+            renditions.available(self.name)
+            with self.captureOnCommitCallbacks(execute=True):
+                renditions.schedule(Room(photo=self.name).photo, on_done=done)
+        executor.submit.assert_called_once()
+        done.assert_not_called()
+
+        # Готовые копии сбрасывают закэшированный список
+        _, source, targets = executor.submit.call_args.args
+        self.assertEqual(renditions._render(source, targets), len(targets))
+        future.set_result(len(targets))
+        done.assert_called_once()
+        self.assertEqual(len(renditions.available(self.name)['jpeg']), len(renditions.WIDTHS))
+
+    def test_room_save_schedules_only_new_photo(self):
+        room = make_room(make_hotel())
+        with mock.patch.object(renditions, 'schedule') as schedule:
+            room.photo = self.name
+            room.save()
+            room.name = 'Другое название'
+            room.save()
+            Room.objects.get(pk=room.pk).save()
+        self.assertEqual(schedule.call_count, 1)
+        self.assertEqual(schedule.call_args.args[0].name, self.name)
@@ -0,0 +1,69 @@
+from datetime import date, timedelta
+
+from django.test import SimpleTestCase, TestCase
+
+from hotels import occupancy, search
+from hotels.models import Booking, Hotel
+
+from .factories import make_hotel, make_room
+
+
+class ExtractCityTests(SimpleTestCase):
+    def test_city_is_found_after_index_and_country(self):
+        cases = {
+            'г. Москва, ул. Тверская, 1': 'Москва',
+            '190000, Россия, Санкт-Петербург, Невский пр., 10': 'Санкт-Петербург',
+            'РФ, город Казань, ул. Баумана, 5': 'Казань',
+            'Ленинградская область, г Выборг, пл. Рыночная, 1': 'Выборг',
+            'ул. Ленина, 3': '',
+            '': '',
+            None: '',
+        }
+        for address, city in cases.items():
+            with self.subTest(address=address):
+                self.assertEqual(search.extract_city(address), city)
+
+    def test_city_key_ignores_case_and_prefix(self):
+        self.assertEqual(search.city_key('г. МОСКВА '), search.city_key('москва'))
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.moscow = make_hotel(name='Парк Отель', address='г. Москва, ул. Тверская, 1', description='Тихий двор')
+        cls.kazan = make_hotel(name='Волга', address='г. Казань, ул. Баумана, 5', description='Вид на реку')
+        cls.moscow_room = make_room(cls.moscow, description='Номер с балконом')
+        cls.kazan_room = make_room(cls.kazan, description='Номер с кухней')
+        search.refresh()
+
+    def names(self, hotels):
+        return sorted(hotels.values_list('name', flat=True))
+
+    def test_every_word_must_match_hotel_or_room_text(self):
+        hotels = Hotel.objects.all()
+        self.assertEqual(self.names(search.search_hotels(hotels, 'ПАРК')), ['Парк Отель'])
+        self.assertEqual(self.names(search.search_hotels(hotels, 'балконом тихий')), ['Парк Отель'])
+        self.assertEqual(self.names(search.search_hotels(hotels, 'казань кухней')), ['Волга'])
+        self.assertEqual(self.names(search.search_hotels(hotels, 'балконом казань')), [])
+        self.assertEqual(self.names(search.search_hotels(hotels, '  ')), ['Волга', 'Парк Отель'])
+
+    def test_filter_city(self):
+        hotels = Hotel.objects.all()
+        self.assertEqual(self.names(search.filter_city(hotels, 'г. КАЗАНЬ')), ['Волга'])
+        self.assertEqual(self.names(search.filter_city(hotels, '')), ['Волга', 'Парк Отель'])
+        self.assertEqual(self.names(search.filter_city(hotels, 'Тверь')), [])
+
+    def test_search_and_date_filter_run_in_one_query(self):
+        check_in = date.today() + timedelta(days=20)
+        check_out = check_in + timedelta(days=2)
+        Booking.objects.create(
+            room=self.moscow_room, guest_name='Гость', guest_email='guest@example.com',
+            check_in=check_in, check_out=check_out, status='confirmed',
+        )
+        occupancy.rebuild_all()
+        hotels = search.filter_city(search.search_hotels(Hotel.objects.all(), 'номер'), 'москва')
+        with self.assertNumQueries(1):
+            self.assertEqual(self.names(occupancy.hotels_with_free_rooms(check_in, check_out, hotels)), [])
+        hotels = search.search_hotels(Hotel.objects.all(), 'номер')
+        with self.assertNumQueries(1):
+            self.assertEqual(self.names(occupancy.hotels_with_free_rooms(check_in, check_out, hotels)), ['Волга'])
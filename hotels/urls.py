@@ -1,12 +1,19 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import api, async_views, views
+
+# Под ASGI-сервером публичные страницы обслуживают асинхронные представления
+pages = async_views if settings.ASYNC_VIEWS else views
 
 app_name = 'hotels'
 
 urlpatterns = [
-    path('', views.hotel_list, name='hotel_list'),
-    path('hotel/<int:hotel_id>/', views.room_list, name='room_list'),
-    path('room/<int:room_id>/', views.room_detail, name='room_detail'),
+    path('', pages.hotel_list, name='hotel_list'),
+    path('hotel/<int:hotel_id>/', pages.room_list, name='room_list'),
+    path('room/<int:room_id>/', pages.room_detail, name='room_detail'),
+    path('room/<int:room_id>/hold/', views.hold_room, name='room_hold'),
+    path('api/availability/', api.availability_search, name='api_availability'),
+    path('export/bookings/', views.export_bookings, name='export_bookings'),
 ]
 
 
@@ -1,14 +1,117 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from django.db.models import Q
 from django.contrib import messages
-from .models import Hotel, Room, Booking
-from .forms import BookingForm, DateFilterForm
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import Http404, HttpResponseBadRequest, JsonResponse, QueryDict, StreamingHttpResponse
+from django.utils import timezone
+from django.views.decorators.http import require_POST
+from django.db.models import Count, IntegerField, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
+from pages.models import HotelPage
+from .models import Hotel, HotelImage, Room
+from .forms import BookingExportForm, BookingForm, GroupSearchForm, HotelSearchForm, RoomHoldForm
+from . import availability
+from . import booking as booking_service
+from . import caching
+from . import exports
+from . import group_search
+from . import notifications
+from . import occupancy
+from . import pricing
+from . import search
+from .pagination import keyset_paginate, keyset_paginate_list, page_size_from
+
+
+def _count_subquery(model):
+    """Количество связанных с гостиницей строк ``model`` без размножения JOIN"""
+    counts = (
+        model.objects.filter(hotel_id=OuterRef('pk'))
+        .order_by()
+        .values('hotel_id')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def hotel_cards(hotels):
+    """Гостиницы с данными для карточек списка за фиксированное число запросов"""
+    return hotels.defer('search_text').annotate(
+        rooms_count=_count_subquery(Room),
+        photos_count=_count_subquery(HotelImage),
+    ).prefetch_related(
+        # Гостиница уже загружена — JOIN из менеджера HotelPage не нужен
+        Prefetch('pages', queryset=HotelPage.objects.live().select_related(None).only('id', 'url_path', 'hotel_id'))
+    )
+
+
+def room_offers(rooms, cards, check_in=None, check_out=None):
+    """Пары (карточка, стоимость проживания или None); все номера считаются разом"""
+    quotes = {}
+    if check_in and check_out:
+        quotes = pricing.quote_rooms([room.pk for room in rooms], check_in, check_out)
+    return [(card, quotes.get(room.pk)) for room, card in zip(rooms, cards)]
+
+
+def _page_query(request):
+    """Параметры текущего запроса без курсора — для ссылок пагинации"""
+    query = request.GET.copy()
+    query.pop('cursor', None)
+    return query.urlencode()
+
+
+def _group_params(form):
+    """(число номеров, общая площадь) для поиска группы или None"""
+    if not (form.is_valid() and form.group_mode()):
+        return None
+    return form.cleaned_data.get('rooms') or 1, form.cleaned_data.get('min_area')
+
+
+def _group_query(form):
+    """Параметры поиска группы для ссылок на номера гостиницы"""
+    query = QueryDict(mutable=True)
+    for name in ('check_in', 'check_out', 'rooms', 'min_area'):
+        if form.cleaned_data.get(name):
+            query[name] = form.cleaned_data[name]
+    return query.urlencode()
+
+
+def group_hotels_page(request, hotels, check_in, check_out, rooms_count, min_area):
+    """Страница предложений для группы по возрастанию итоговой стоимости.
+
+    Возвращает страницу и пары (гостиница, предложение) в ее порядке.
+    """
+    offers = caching.group_offers(
+        check_in, check_out, rooms_count, min_area,
+        lambda: group_search.group_offers(check_in, check_out, rooms_count, min_area),
+    )
+    if hotels.query.has_filters():
+        # Текст и город отбирают гостиницы из готового рейтинга одним запросом
+        matching = set(hotels.filter(id__in=[offer.hotel_id for offer in offers]).values_list('id', flat=True))
+        offers = [offer for offer in offers if offer.hotel_id in matching]
+    page = keyset_paginate_list(
+        offers,
+        ['total_kopecks'],
+        cursor=request.GET.get('cursor'),
+        page_size=page_size_from(request.GET.get('page_size')),
+    )
+    cards = hotel_cards(Hotel.objects.filter(id__in=[offer.hotel_id for offer in page])).in_bulk()
+    return page, [(cards[offer.hotel_id], offer) for offer in page if offer.hotel_id in cards]
+
+
+def render_hotel_offers(offers, request=None):
+    """Пары (карточка гостиницы, предложение для группы или None)"""
+    cards = caching.render_cards(
+        [hotel for hotel, _ in offers], 'hotels/hotel_card.html', caching.hotel_card_key,
+        request=request, context_func=lambda hotel: {'hotel': hotel},
+    )
+    return [(card, offer) for card, (_, offer) in zip(cards, offers)]
 
 
 def hotel_list(request):
-    """Список гостиниц с фильтрацией по датам"""
-    form = DateFilterForm(request.GET)
+    """Список гостиниц с поиском и фильтрацией по датам"""
+    form = HotelSearchForm(request.GET)
     hotels = Hotel.objects.all()
+    group = _group_params(form)
     
     check_in = None
     check_out = None
@@ -16,22 +119,35 @@ def hotel_list(request):
     if form.is_valid():
         check_in = form.cleaned_data.get('check_in')
         check_out = form.cleaned_data.get('check_out')
+        # Текст и город — условия WHERE того же queryset; фильтр по датам
+        # добавляется к ним через EXISTS, и список строится одним запросом
+        hotels = search.filter_city(
+            search.search_hotels(hotels, form.cleaned_data.get('q')),
+            form.cleaned_data.get('city'),
+        )
         
-        if check_in and check_out:
-            # Находим гостиницы, у которых есть свободные номера в указанные даты
-            booked_room_ids = Booking.objects.filter(
-                Q(check_in__lt=check_out) & Q(check_out__gt=check_in),
-                status__in=['pending', 'confirmed']
-            ).values_list('room_id', flat=True)
-            
-            hotels_with_rooms = Room.objects.exclude(
-                id__in=booked_room_ids
-            ).values_list('hotel_id', flat=True).distinct()
-            
-            hotels = hotels.filter(id__in=hotels_with_rooms)
+        if check_in and check_out and not group:
+            # Гостиницы со свободными номерами по картам занятости
+            hotels = occupancy.hotels_with_free_rooms(check_in, check_out, hotels)
+    
+    if group:
+        # Для группы гостиницы ранжируются по итоговой стоимости нескольких номеров
+        page, offers = group_hotels_page(request, hotels, check_in, check_out, *group)
+    else:
+        page = keyset_paginate(
+            hotel_cards(hotels),
+            ['name'],
+            cursor=request.GET.get('cursor'),
+            page_size=page_size_from(request.GET.get('page_size')),
+        )
+        offers = [(hotel, None) for hotel in page]
     
     context = {
-        'hotels': hotels,
+        'hotels': page,
+        'hotel_offers': render_hotel_offers(offers, request),
+        'page': page,
+        'page_query': _page_query(request),
+        'group_query': _group_query(form) if group else '',
         'form': form,
         'check_in': check_in,
         'check_out': check_out,
@@ -42,8 +158,10 @@ def hotel_list(request):
 def room_list(request, hotel_id):
     """Список номеров в гостинице с фильтрацией по датам"""
     hotel = get_object_or_404(Hotel, id=hotel_id)
-    form = DateFilterForm(request.GET)
+    form = GroupSearchForm(request.GET)
     rooms = hotel.rooms.all()
+    group = _group_params(form)
+    group_offer = None
     
     check_in = None
     check_out = None
@@ -52,18 +170,33 @@ def room_list(request, hotel_id):
         check_in = form.cleaned_data.get('check_in')
         check_out = form.cleaned_data.get('check_out')
         
-        if check_in and check_out:
-            # Находим забронированные номера в указанные даты
-            booked_room_ids = Booking.objects.filter(
-                Q(check_in__lt=check_out) & Q(check_out__gt=check_in),
-                status__in=['pending', 'confirmed']
-            ).values_list('room_id', flat=True)
-            
-            rooms = rooms.exclude(id__in=booked_room_ids)
+        if group:
+            # Для группы показываем только номера самого дешевого подходящего набора
+            group_offer = group_search.hotel_offer(hotel.id, check_in, check_out, *group)
+            rooms = rooms.filter(id__in=group_offer.room_ids) if group_offer else rooms.none()
+        elif check_in and check_out:
+            # Оставляем только номера, свободные в указанные даты
+            free_room_ids = caching.free_room_ids(
+                hotel.id, check_in, check_out,
+                lambda: set(availability.free_rooms(check_in, check_out, rooms).values_list('id', flat=True)),
+            )
+            rooms = rooms.filter(id__in=free_room_ids)
+    
+    page = keyset_paginate(
+        rooms,
+        ['hotel_id', 'name'],
+        cursor=request.GET.get('cursor'),
+        page_size=page_size_from(request.GET.get('page_size')),
+    )
     
     context = {
         'hotel': hotel,
-        'rooms': rooms,
+        'rooms': page,
+        'room_offers': room_offers(page, caching.render_room_cards(page, request), check_in, check_out),
+        'group': group,
+        'group_offer': group_offer,
+        'page': page,
+        'page_query': _page_query(request),
         'form': form,
         'check_in': check_in,
         'check_out': check_out,
@@ -73,7 +206,7 @@ def room_list(request, hotel_id):
 
 def room_detail(request, room_id):
     """Детальная информация о номере и форма бронирования"""
-    room = get_object_or_404(Room, id=room_id)
+    room = get_object_or_404(Room.objects.select_related('hotel'), id=room_id)
     
     if request.method == 'POST':
         form = BookingForm(request.POST)
@@ -81,21 +214,13 @@ def room_detail(request, room_id):
             booking = form.save(commit=False)
             booking.room = room
             
-            # Проверяем, свободен ли номер в указанные даты
-            check_in = form.cleaned_data['check_in']
-            check_out = form.cleaned_data['check_out']
-            
-            conflicting_bookings = Booking.objects.filter(
-                room=room,
-                check_in__lt=check_out,
-                check_out__gt=check_in,
-                status__in=['pending', 'confirmed']
-            )
-            
-            if conflicting_bookings.exists():
+            # Проверка занятости и сохранение выполняются под блокировкой номера
+            try:
+                booking_service.create_booking(booking, hold_token=form.cleaned_data['hold_token'] or None)
+            except booking_service.RoomUnavailable:
                 messages.error(request, 'К сожалению, номер уже забронирован на указанные даты.')
             else:
-                booking.save()
+                notifications.schedule_booking_notifications(booking)
                 messages.success(request, 'Ваша заявка на бронирование успешно отправлена! Мы свяжемся с вами в ближайшее время.')
                 return redirect('hotels:room_detail', room_id=room.id)
     else:
@@ -107,3 +232,55 @@ def room_detail(request, room_id):
     }
     return render(request, 'hotels/room_detail.html', context)
 
+
+@require_POST
+def hold_room(request, room_id):
+    """Удерживает номер на выбранные даты, пока гость заполняет форму (JSON)"""
+    form = RoomHoldForm(request.POST)
+    if not form.is_valid():
+        return JsonResponse({'error': form.errors.as_text()}, status=400, json_dumps_params={'ensure_ascii': False})
+    if not request.session.session_key:
+        request.session.save()
+    try:
+        hold = booking_service.place_hold(
+            room_id,
+            form.cleaned_data['check_in'],
+            form.cleaned_data['check_out'],
+            token=form.cleaned_data['hold_token'] or None,
+            client=request.session.session_key,
+        )
+    except Room.DoesNotExist:
+        raise Http404('Номер не найден')
+    except booking_service.TooManyHolds:
+        return JsonResponse(
+            {'error': 'Слишком много удерживаемых номеров: завершите или отмените одно из бронирований.'},
+            status=429, json_dumps_params={'ensure_ascii': False},
+        )
+    except booking_service.RoomUnavailable:
+        return JsonResponse(
+            {'error': 'Номер уже забронирован или удерживается на эти даты.'},
+            status=409, json_dumps_params={'ensure_ascii': False},
+        )
+    return JsonResponse({'hold_token': hold.token, 'expires_at': hold.expires_at.isoformat()})
+
+
+@staff_member_required
+def export_bookings(request):
+    """Потоковая выгрузка бронирований в CSV или JSON Lines для сотрудников"""
+    form = BookingExportForm(request.GET)
+    if not form.is_valid():
+        return HttpResponseBadRequest(form.errors.as_text(), content_type='text/plain; charset=utf-8')
+
+    fmt = form.cleaned_data['format'] or 'csv'
+    rows = exports.export_rows(
+        date_from=form.cleaned_data['date_from'],
+        date_to=form.cleaned_data['date_to'],
+        hotel_id=form.cleaned_data['hotel'],
+        statuses=form.cleaned_data['status'],
+    )
+    response = StreamingHttpResponse(exports.stream(rows, fmt), content_type=exports.FORMATS[fmt])
+    filename = f'bookings-{timezone.localdate():%Y%m%d}.{fmt}'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    # Иначе nginx буферизует ответ и первый байт придет только в конце
+    response['X-Accel-Buffering'] = 'no'
+    return response
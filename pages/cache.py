@@ -0,0 +1,142 @@
+"""Кэш готового HTML опубликованных страниц Wagtail.
+
+``PageCacheMiddleware`` срабатывает в ``process_view`` — после разбора URL,
+но до маршрутизации Wagtail (``wagtail_serve``), поэтому попадание в кэш не
+обращается к базе: ни за сайтом, ни за страницей, ни за связанными
+гостиницами. Кэшируются только ответы анонимным посетителям без cookie
+сессии и сообщений и без параметров запроса.
+
+Все страницы помечены общей версией; сигналы ``pages.signals`` повышают ее
+при публикации, снятии с публикации, перемещении и удалении страниц, а также
+при изменении гостиниц, номеров и фотографий. Версия сбрасывает кэш только
+там, где ее видят все процессы, поэтому на кэше в памяти процесса (locmem)
+кэш страниц выключен.
+"""
+import uuid
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import HttpResponse
+from django.http.request import split_domain_port
+from wagtail.models import Site
+
+from hotel_project import db_router
+from hotels.caching import stats
+
+VERSION_KEY = 'pages:v'
+
+
+def _version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        token = uuid.uuid4().hex
+        version = token if cache.add(VERSION_KEY, token, None) else cache.get(VERSION_KEY, token)
+    return version
+
+
+def invalidate():
+    """Сбрасывает кэш всех страниц"""
+    cache.set_many({VERSION_KEY: uuid.uuid4().hex, **db_router.write_marker()}, None)
+
+
+def _sites(version, timeout):
+    """[(hostname, port, сайт по умолчанию, id корневой страницы)] всех сайтов"""
+    key = f'pages:sites:{version}'
+    sites = cache.get(key)
+    if sites is None:
+        sites = list(Site.objects.values_list('hostname', 'port', 'is_default_site', 'root_page_id'))
+        cache.set(key, sites, timeout)
+    return sites
+
+
+def _site_root(request, version, timeout):
+    """Корневая страница сайта запроса, как ``Site.find_for_request``, или None"""
+    hostname = split_domain_port(request.get_host())[0]
+    port = int(request.get_port())
+
+    def match(site):
+        host, site_port, is_default, _ = site
+        if host == hostname and site_port == port:
+            return 0
+        if host == hostname and is_default:
+            return 1
+        return 2 if is_default else 3
+
+    sites = sorted((site for site in _sites(version, timeout) if site[0] == hostname or site[2]), key=match)
+    if not sites:
+        return None
+    if len(sites) == 1 or match(sites[0]) < 2:
+        return sites[0][3]
+    if match(sites[0]) == 2:
+        return sites[len(sites) == 2][3]
+    return None
+
+
+def _cacheable_request(request):
+    if request.method not in ('GET', 'HEAD') or request.GET:
+        return False
+    cookies = request.COOKIES
+    # Сессия может принадлежать сотруднику, а сообщения выводятся в шаблоне
+    return settings.SESSION_COOKIE_NAME not in cookies and 'messages' not in cookies
+
+
+def _cacheable_response(response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and 'private' not in response.get('Cache-Control', '')
+    )
+
+
+class PageCacheMiddleware:
+    """Отдает страницы Wagtail из кэша; подключается последним в MIDDLEWARE"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.timeout = getattr(settings, 'PAGE_CACHE_TIMEOUT', 3600)
+        if isinstance(caches['default'], LocMemCache):
+            # Другие воркеры не узнали бы о сбросе и час отдавали бы старые страницы
+            self.timeout = 0
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return self._store(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self._store(request, await self.get_response(request))
+
+    def _store(self, request, response):
+        key = getattr(request, '_page_cache_key', None)
+        if key and _cacheable_response(response):
+            cache.set(key, (response.content, response['Content-Type']), db_router.result_timeout(self.timeout))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        match = request.resolver_match
+        if not self.timeout or match.url_name != 'wagtail_serve' or not _cacheable_request(request):
+            return None
+        version = _version()
+        root = _site_root(request, version, self.timeout)
+        if root is None:
+            return None
+        key = f'pages:html:{version}:{root}:{request.path}'
+        cached = cache.get(key)
+        if cached is None:
+            stats.record('pages', misses=1)
+            request._page_cache_key = key
+            return None
+        stats.record('pages', hits=1)
+        request.performance_label = 'wagtail:cached'
+        content, content_type = cached
+        response = HttpResponse(content, content_type=content_type)
+        response['X-Page-Cache'] = 'hit'
+        return response
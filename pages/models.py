@@ -1,5 +1,6 @@
 from django.db import models
-from wagtail.models import Page
+from django.db.models import prefetch_related_objects
+from wagtail.models import Page, PageManager
 from wagtail.fields import RichTextField, StreamField
 from wagtail.admin.panels import FieldPanel, MultiFieldPanel, InlinePanel
 from wagtail import blocks
@@ -7,7 +8,9 @@ from wagtail.images.blocks import ImageChooserBlock
 from wagtail.embeds.blocks import EmbedBlock
 from modelcluster.fields import ParentalKey
 from modelcluster.models import ClusterableModel
+from hotels.caching import render_room_cards
 from hotels.models import Hotel
+from .prefetch import prefetch_stream_renditions
 
 
 class YouTubeBlock(blocks.StructBlock):
@@ -81,6 +84,13 @@ class ContactPage(Page):
         verbose_name = "Страница контактов"
 
 
+class HotelPageManager(PageManager):
+    def get_queryset(self):
+        # Wagtail получает конкретную страницу через менеджер по умолчанию,
+        # поэтому гостиница приходит тем же запросом
+        return super().get_queryset().select_related('hotel').defer('hotel__search_text')
+
+
 class HotelPage(Page):
     """Страница гостиницы с редактируемым контентом"""
     hotel = models.ForeignKey(
@@ -91,6 +101,8 @@ class HotelPage(Page):
     )
     body = StreamField(ContentStreamBlock(), use_json_field=True, blank=True, verbose_name="Контент")
     
+    objects = HotelPageManager()
+    
     content_panels = Page.content_panels + [
         FieldPanel('hotel'),
         FieldPanel('body'),
@@ -101,7 +113,12 @@ class HotelPage(Page):
     
     def get_context(self, request):
         context = super().get_context(request)
-        context['hotel'] = self.hotel
-        context['rooms'] = self.hotel.rooms.all()
+        # Число запросов не зависит ни от номеров и фото, ни от числа блоков
+        hotel = self.hotel
+        prefetch_related_objects([hotel], 'rooms', 'gallery_images')
+        prefetch_stream_renditions(self.body)
+        context['hotel'] = hotel
+        context['rooms'] = hotel.rooms.all()
+        context['room_cards'] = render_room_cards(context['rooms'], request)
         return context
 
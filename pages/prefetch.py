@@ -0,0 +1,61 @@
+"""Пакетная загрузка изображений и их версий для StreamField.
+
+Wagtail загружает изображения блоков одним запросом на тип блока, но версии
+(renditions) ищет для каждого изображения отдельно: обращение к кэшу, а при
+промахе — запрос к базе. ``prefetch_stream_renditions`` находит версии всех
+изображений страницы одним ``get_many`` в кэше и не более чем одним запросом
+к базе и кладет их в ``prefetched_renditions``, откуда их берет
+``Image.get_rendition``.
+"""
+from collections import defaultdict
+
+from wagtail.images import get_image_model
+from wagtail.images.models import Filter
+
+# Версии, которые запрашивают шаблоны блоков ContentStreamBlock
+STREAM_RENDITIONS = ('original',)
+
+
+def stream_images(stream_value):
+    """Изображения блоков image и image_with_caption в порядке страницы"""
+    images = []
+    for block in stream_value:
+        if block.block_type == 'image':
+            images.append(block.value)
+        elif block.block_type == 'image_with_caption':
+            images.append(block.value.get('image'))
+    return [image for image in images if image is not None]
+
+
+def prefetch_renditions(images, specs=STREAM_RENDITIONS):
+    """Загружает версии ``specs`` для всех ``images`` разом"""
+    if not images:
+        return
+    Rendition = get_image_model().get_rendition_model()
+    filters = [Filter(spec) for spec in specs]
+
+    found = defaultdict(dict)
+    cache_keys = {}
+    for image in {image.pk: image for image in images}.values():
+        for image_filter in filters:
+            key = Rendition.construct_cache_key(image, image_filter.get_cache_key(image), image_filter.spec)
+            cache_keys[key] = image.pk
+    for key, rendition in Rendition.cache_backend.get_many(list(cache_keys)).items():
+        found[cache_keys[key]][(rendition.filter_spec, rendition.focal_point_key)] = rendition
+
+    missing = {pk for pk in cache_keys.values() if len(found[pk]) < len(filters)}
+    if missing:
+        renditions = Rendition.objects.filter(image_id__in=missing, filter_spec__in=specs)
+        for rendition in renditions:
+            found[rendition.image_id].setdefault((rendition.filter_spec, rendition.focal_point_key), rendition)
+
+    for image in images:
+        # Недостающие версии Image.get_rendition создаст и допишет сюда же
+        image.prefetched_renditions = list(found[image.pk].values())
+        for rendition in image.prefetched_renditions:
+            # alt и url версии обращаются к изображению — оно уже загружено
+            rendition.image = image
+
+
+def prefetch_stream_renditions(stream_value, specs=STREAM_RENDITIONS):
+    prefetch_renditions(stream_images(stream_value), specs)
@@ -0,0 +1,37 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from wagtail.images import get_image_model
+from wagtail.models import Page, Site
+from wagtail.signals import page_published, page_unpublished, post_page_move
+
+from hotels.models import Hotel, HotelImage, Room
+
+from . import cache
+
+
+@receiver(page_published)
+@receiver(page_unpublished)
+@receiver(post_page_move)
+@receiver(post_delete, sender=Page)
+@receiver(post_save, sender=Site)
+@receiver(post_delete, sender=Site)
+def invalidate_on_page_change(sender, **kwargs):
+    """Публикация, снятие, перемещение и удаление страницы меняют и меню, и списки;
+    изменение сайтов — выбор корневой страницы по Host"""
+    transaction.on_commit(cache.invalidate)
+
+
+@receiver(post_save, sender=Hotel)
+@receiver(post_delete, sender=Hotel)
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+@receiver(post_save, sender=HotelImage)
+@receiver(post_delete, sender=HotelImage)
+@receiver(post_save, sender=get_image_model())
+@receiver(post_delete, sender=get_image_model())
+def invalidate_on_content_change(sender, raw=False, **kwargs):
+    """Гостиницы, номера и фото выводятся на страницах гостиниц и на главной"""
+    if raw:
+        return
+    transaction.on_commit(cache.invalidate)
@@ -0,0 +1,86 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.core.cache import cache
+from django.core.files.images import ImageFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image as PILImage
+from wagtail.images.models import Image
+from wagtail.models import Site
+from wagtail.rich_text import RichText
+
+from hotels.tests.factories import make_hotel, make_room
+from pages.models import HotelPage
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_image(number):
+    data = BytesIO()
+    PILImage.new('RGB', (80, 60), (number, 0, 0)).save(data, 'JPEG')
+    return Image.objects.create(title=f'Фото {number}', file=ImageFile(data, name=f'photo{number}.jpg'))
+
+
+def stream_blocks(count, images):
+    """Блоки всех типов по кругу, изображения повторяются"""
+    blocks = []
+    for i in range(count):
+        kind = i % 5
+        if kind == 0:
+            blocks.append(('image', images[i % len(images)]))
+        elif kind == 1:
+            blocks.append(('image_with_caption', {'image': images[(i + 3) % len(images)], 'caption': 'Подпись'}))
+        elif kind == 2:
+            blocks.append(('paragraph', RichText('<p>Текст</p>')))
+        elif kind == 3:
+            blocks.append(('heading', 'Заголовок'))
+        else:
+            blocks.append(('quote', 'Цитата'))
+    return blocks
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, PAGE_CACHE_TIMEOUT=0)
+class HotelPageQueryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        images = [make_image(number) for number in range(10)]
+        root = Site.objects.get(is_default_site=True).root_page
+        cls.pages = {}
+        for count in (5, 50):
+            hotel = make_hotel()
+            for _ in range(3):
+                make_room(hotel)
+            page = HotelPage(title=hotel.name, slug=f'hotel-{count}-blocks', hotel=hotel, body=stream_blocks(count, images))
+            root.add_child(instance=page)
+            cls.pages[count] = page
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def render(self, page):
+        # Версии изображений и карточки номеров ищутся в базе, а не в кэше
+        cache.clear()
+        response = self.client.get(page.url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_query_count_does_not_depend_on_blocks(self):
+        # Первый показ создает версии изображений, сравниваются повторные;
+        # на обеих страницах есть блоки всех типов
+        for page in self.pages.values():
+            self.render(page)
+        with CaptureQueriesContext(connection) as small:
+            self.render(self.pages[5])
+        with self.assertNumQueries(len(small)):
+            response = self.render(self.pages[50])
+        # Сайт, страница и ее модель с гостиницей, алиасы, ограничения
+        # просмотра, номера, фото гостиницы, изображения блоков (два
+        # запроса) и их версии. Новый запрос на странице должен быть осознанным
+        with self.assertNumQueries(10):
+            self.render(self.pages[50])
+        self.assertContains(response, 'Цитата', count=10)
@@ -0,0 +1,59 @@
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+from wagtail.models import Site
+
+from hotels.tests.factories import make_hotel
+from pages import cache as page_cache
+from pages.models import HotelPage
+
+CACHE_DIR = tempfile.mkdtemp()
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': CACHE_DIR}},
+    PAGE_CACHE_TIMEOUT=3600,
+)
+class PageCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        hotel = make_hotel()
+        root = Site.objects.get(is_default_site=True).root_page
+        cls.page = root.add_child(instance=HotelPage(title=hotel.name, slug='cached-hotel', hotel=hotel))
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+
+    def setUp(self):
+        page_cache.cache.clear()
+
+    def test_repeated_view_is_served_from_cache_without_queries(self):
+        first = self.client.get(self.page.url)
+        self.assertEqual(first.status_code, 200)
+        self.assertNotIn('X-Page-Cache', first)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.page.url)
+        self.assertEqual(second['X-Page-Cache'], 'hit')
+        self.assertEqual(second.content, first.content)
+
+    def test_key_uses_site_root_not_host(self):
+        self.client.get(self.page.url)
+        # Неизвестный Host попадает на сайт по умолчанию и в ту же запись
+        with self.assertNumQueries(0):
+            response = self.client.get(self.page.url, HTTP_HOST='other.example')
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+
+    def test_invalidate_drops_cached_pages(self):
+        self.client.get(self.page.url)
+        page_cache.invalidate()
+        response = self.client.get(self.page.url)
+        self.assertNotIn('X-Page-Cache', response)
+
+    def test_session_cookie_bypasses_cache(self):
+        self.client.get(self.page.url)
+        self.client.cookies['sessionid'] = 'anything'
+        response = self.client.get(self.page.url)
+        self.assertNotIn('X-Page-Cache', response)
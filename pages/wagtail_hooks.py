@@ -0,0 +1,7 @@
+from wagtail import hooks
+
+
+@hooks.register('before_serve_page')
+def label_page_request(page, request, serve_args, serve_kwargs):
+    """Метка запроса для метрик производительности — тип страницы Wagtail"""
+    request.performance_label = f'wagtail:{page.specific_class._meta.label}'